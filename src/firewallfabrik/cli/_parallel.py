@@ -0,0 +1,112 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Compile several firewalls of one database in worker processes.
+
+`fwf-ipt` and `fwf-nft` load the database once and then hand each
+firewall to a compile function of the form
+``compile_one(db, args, fw_id, fw_name, announce) -> bool``. With
+``--jobs 1`` the CLI calls it inline; with more jobs this module fans
+the calls out to a process pool.
+
+Each worker gets the loaded database as an SQLite image (the bytes
+``DatabaseManager.serialize()`` returns) and restores it once, in the
+pool initializer, so the `.fwf` file is parsed exactly once no matter
+how many workers there are. `fwf-compile-server` uses the same pool
+through worker_pool(). A compile is CPU-bound Python, which is why
+this is a process pool and not a thread pool.
+
+Whatever a compile prints goes into a buffer of its own and is written
+out by the parent in the order the firewalls were given, so the output
+of ``--jobs 8`` reads the same as the output of a sequential run: no
+firewall's errors end up in the middle of another firewall's block.
+"""
+
+import concurrent.futures
+import contextlib
+import io
+import sys
+
+import firewallfabrik.core
+
+# The database of the current worker process, restored once by
+# _init_worker() and used by every compile that runs in this worker.
+_worker_db = None
+
+
+def _init_worker(image, ref_index):
+    global _worker_db
+    _worker_db = firewallfabrik.core.DatabaseManager()
+    _worker_db.deserialize(image)
+    _worker_db.ref_index = ref_index
+
+
+def worker_pool(db, jobs):
+    """Return a process pool of *jobs* workers that each hold a copy of *db*."""
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_init_worker,
+        initargs=(db.serialize(), db.ref_index),
+    )
+
+
+def worker_db():
+    """Return the database copy of the current worker process."""
+    return _worker_db
+
+
+def _compile_in_worker(compile_one, args, fw_id, fw_name, announce):
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        ok = compile_one(_worker_db, args, fw_id, fw_name, announce)
+    return ok, stdout.getvalue(), stderr.getvalue()
+
+
+def compile_firewalls(db, args, fw_list, compile_one, jobs=1):
+    """Compile every ``(fw_id, fw_name)`` of *fw_list* and return ``(ok, failed)``.
+
+    With *jobs* > 1 the compiles run in up to *jobs* worker processes;
+    the output of each one is written once it and every firewall before
+    it in *fw_list* are done.
+    """
+    announce = len(fw_list) > 1
+    compiled_ok = 0
+    compiled_err = 0
+
+    jobs = min(jobs, len(fw_list))
+    if jobs <= 1:
+        for fw_id, fw_name in fw_list:
+            if compile_one(db, args, fw_id, fw_name, announce):
+                compiled_ok += 1
+            else:
+                compiled_err += 1
+        return compiled_ok, compiled_err
+
+    with worker_pool(db, jobs) as executor:
+        futures = [
+            executor.submit(
+                _compile_in_worker, compile_one, args, fw_id, fw_name, announce
+            )
+            for fw_id, fw_name in fw_list
+        ]
+        for future in futures:
+            ok, stdout, stderr = future.result()
+            sys.stdout.write(stdout)
+            sys.stdout.flush()
+            sys.stderr.write(stderr)
+            sys.stderr.flush()
+            if ok:
+                compiled_ok += 1
+            else:
+                compiled_err += 1
+    return compiled_ok, compiled_err
@@ -0,0 +1,237 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Long-lived compile worker: load a database once, compile many firewalls.
+
+Every `fwf-ipt` / `fwf-nft` run parses the whole database file before it
+compiles anything, and on a large `.fwf` that load costs more than the
+compile itself. The compile dialog used to start one such run per
+firewall. `fwf-compile-server` loads the file once and then takes
+compile requests on stdin, one JSON object per line:
+
+    {"id": "fw1", "platform": "nftables", "args": ["Firewalls/fw1", "-p", "-v"]}
+
+*args* are the command-line arguments of the platform's compiler
+without ``-f``: the server passes them, together with its own ``-f``,
+to the same ``main()`` the CLI runs, so a request behaves exactly like
+the command line it stands for. For every request the server answers
+on stdout with the lines the compiler printed (stdout and stderr merged,
+in the order they were written) and then the exit code the CLI would
+have returned:
+
+    {"id": "fw1", "event": "output", "line": "Compiling 'fw1' ..."}
+    {"id": "fw1", "event": "finished", "exit_code": 0}
+
+With ``--jobs N`` up to N requests compile at the same time, in worker
+processes that each restore the loaded database once; answers then come
+back in the order the compiles finish, which is what *id* is for. The
+server compiles the file as it was when the server started and exits
+when stdin is closed. A file it cannot load is reported as a single
+``{"event": "error", "message": ...}`` line and exit code 1.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import threading
+import traceback
+
+import firewallfabrik
+import firewallfabrik.cli._parallel
+from firewallfabrik.cli import fwf_ipt, fwf_nft
+
+__author__ = 'Linuxfabrik GmbH, Zurich/Switzerland'
+
+DESCRIPTION = """FirewallFabrik compile server. Loads a firewall object database once and compiles
+iptables and nftables firewalls of it on request, reading JSON lines on stdin and
+answering with JSON lines on stdout."""
+
+_PLATFORM_MAIN = {
+    'iptables': fwf_ipt.main,
+    'nftables': fwf_nft.main,
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='fwf-compile-server',
+        description=DESCRIPTION,
+    )
+
+    parser.add_argument(
+        '-f',
+        '--file',
+        required=True,
+        dest='FILE',
+        help='path to the .fwb / .fwf database file',
+    )
+
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=1,
+        dest='JOBS',
+        help='compile up to this many requests at the same time, each in a '
+        'worker process of its own. Default: %(default)s',
+    )
+
+    parser.add_argument(
+        '--load-cache',
+        action='store_true',
+        dest='LOAD_CACHE',
+        help='keep the loaded database in <file>.cache and load it from there '
+        'while the file is unchanged, instead of parsing the file every run',
+    )
+
+    parser.add_argument(
+        '-V',
+        '--version',
+        action='version',
+        version=f'%(prog)s: v{firewallfabrik.__version__} by {__author__}',
+    )
+
+    return parser.parse_args(argv)
+
+
+def compile_request(db, path, platform, args):
+    """Run the compiler of *platform* for *args* against the loaded *db*.
+
+    Returns ``(exit_code, lines)``, *lines* being everything the compiler
+    printed. A request the server cannot make sense of fails with exit
+    code 2, the code argparse exits with on a bad command line.
+    """
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+        main = _PLATFORM_MAIN.get(platform)
+        if main is None:
+            print(f"Error: unknown platform '{platform}'")
+            exit_code = 2
+        else:
+            try:
+                exit_code = main(['-f', path, *args], db=db)
+            except SystemExit as e:
+                # argparse: bad arguments, or --help / --version
+                exit_code = e.code if isinstance(e.code, int) else 2
+            except Exception as e:
+                print(f'Error: compiler failed: {e}')
+                print(traceback.format_exc().rstrip())
+                exit_code = 1
+    return exit_code, output.getvalue().splitlines()
+
+
+def _compile_in_worker(path, platform, args):
+    return compile_request(
+        firewallfabrik.cli._parallel.worker_db(), path, platform, args
+    )
+
+
+class _Responder:
+    """Write the JSON-lines answers to stdout, one whole answer at a time.
+
+    Answers of different requests come from different pool threads, and
+    a half-written line would break the client's parser.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def send(self, request_id, exit_code, lines):
+        with self._lock:
+            for line in lines:
+                self._write({'id': request_id, 'event': 'output', 'line': line})
+            self._write({'id': request_id, 'event': 'finished', 'exit_code': exit_code})
+            sys.stdout.flush()
+
+    def error(self, message):
+        with self._lock:
+            self._write({'event': 'error', 'message': message})
+            sys.stdout.flush()
+
+    @staticmethod
+    def _write(message):
+        sys.stdout.write(json.dumps(message) + '\n')
+
+
+def _parse_request(line):
+    """Return ``(id, platform, args)`` of a request line, or raise ValueError."""
+    request = json.loads(line)
+    if not isinstance(request, dict):
+        raise ValueError('request is not a JSON object')
+    args = request.get('args', [])
+    if not isinstance(args, list) or not all(isinstance(a, str) for a in args):
+        raise ValueError('"args" is not a list of strings')
+    return request.get('id'), request.get('platform', ''), args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.JOBS < 1:
+        print('Error: --jobs must be at least 1', file=sys.stderr)
+        return 1
+
+    responder = _Responder()
+    load_errors = io.StringIO()
+    with contextlib.redirect_stderr(load_errors):
+        db = fwf_ipt.load_database(args.FILE, cache=args.LOAD_CACHE)
+    sys.stderr.write(load_errors.getvalue())
+    if db is None:
+        responder.error(load_errors.getvalue().strip().splitlines()[-1])
+        return 1
+
+    executor = None
+    if args.JOBS > 1:
+        executor = firewallfabrik.cli._parallel.worker_pool(db, args.JOBS)
+
+    try:
+        for line in sys.stdin:
+            if not line.strip():
+                continue
+            try:
+                request_id, platform, request_args = _parse_request(line)
+            except ValueError as e:
+                # json.JSONDecodeError is a ValueError as well
+                responder.send(None, 2, [f'Error: invalid request: {e}'])
+                continue
+
+            if executor is None:
+                responder.send(
+                    request_id,
+                    *compile_request(db, args.FILE, platform, request_args),
+                )
+                continue
+
+            future = executor.submit(
+                _compile_in_worker, args.FILE, platform, request_args
+            )
+
+            def _done(future, request_id=request_id):
+                try:
+                    exit_code, lines = future.result()
+                except Exception as e:
+                    # The worker process died (BrokenProcessPool)
+                    exit_code, lines = 1, [f'Error: compile worker failed: {e}']
+                responder.send(request_id, exit_code, lines)
+
+            future.add_done_callback(_done)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -21,8 +21,10 @@ import sqlalchemy
 import sqlalchemy.exc
 
 import firewallfabrik
+import firewallfabrik.cli._parallel
 import firewallfabrik.core
 import firewallfabrik.core.objects
+from firewallfabrik.compiler._dns import DNSCache
 
 __author__ = 'Linuxfabrik GmbH, Zurich/Switzerland'
 
@@ -68,6 +70,49 @@ def parse_args(argv=None):
         help='output directory for generated scripts. Default: %(default)s',
     )
 
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=1,
+        dest='JOBS',
+        help='compile up to this many firewalls at the same time, each in a '
+        'worker process of its own. Default: %(default)s',
+    )
+
+    parser.add_argument(
+        '--load-cache',
+        action='store_true',
+        dest='LOAD_CACHE',
+        help='keep the loaded database in <file>.cache and load it from there '
+        'while the file is unchanged, instead of parsing the file every run',
+    )
+
+    parser.add_argument(
+        '--dns-cache',
+        default='',
+        dest='DNS_CACHE',
+        help='file to keep the answers of compile-time DNS lookups in, for '
+        'later runs to reuse while they are younger than --dns-cache-ttl',
+    )
+
+    parser.add_argument(
+        '--dns-cache-ttl',
+        type=float,
+        default=DNSCache.TTL,
+        dest='DNS_CACHE_TTL',
+        help='seconds an answer from --dns-cache is good for. Default: %(default)s',
+    )
+
+    parser.add_argument(
+        '--dns-timeout',
+        type=float,
+        default=DNSCache.TIMEOUT,
+        dest='DNS_TIMEOUT',
+        help='seconds the compile-time DNS lookups of a firewall may take '
+        'together. Default: %(default)s',
+    )
+
     fw_lookup = parser.add_mutually_exclusive_group()
     fw_lookup.add_argument(
         '-i',
@@ -159,22 +204,74 @@ def parse_args(argv=None):
     return parser.parse_args(argv)
 
 
-def main(argv=None):
-    args = parse_args(argv)
+def compile_firewall(db, args, fw_id, fw_name, announce=False):
+    """Compile one firewall of the loaded database *db*.
 
-    if not args.firewall_names and not args.COMPILE_ALL:
-        print('Error: specify firewall name(s) or use --all', file=sys.stderr)
-        return 1
+    Prints progress, errors and warnings to stderr and returns True when
+    the firewall compiled without errors. *announce* prints the
+    ``--- name ---`` header that separates firewalls in a multi-firewall
+    run.
+    """
+    from firewallfabrik.platforms.nftables._compiler_driver import CompilerDriver_nft
 
-    t_start = time.monotonic()
+    if announce:
+        print(f'\n--- {fw_name} ---', file=sys.stderr)
+    print(f"Compiling '{fw_name}' (id: {fw_id}) ...", file=sys.stderr)
 
-    print(f'Loading database from {args.FILE} ...', file=sys.stderr)
+    driver = CompilerDriver_nft(db)
+    driver.dns_cache = DNSCache(
+        timeout=args.DNS_TIMEOUT,
+        path=args.DNS_CACHE or None,
+        ttl=args.DNS_CACHE_TTL,
+    )
+    driver.wdir = args.DESTDIR
+    driver.source_dir = str(Path(args.FILE).parent)
+    driver.verbose = args.VERBOSE
+
+    if args.OUTPUT:
+        driver.file_name_setting = args.OUTPUT
+    if args.IPV4:
+        driver.ipv6_run = False
+    elif args.IPV6:
+        driver.ipv4_run = False
+    if args.SINGLE_RULE:
+        driver.single_rule_compile_on = True
+        driver.single_rule_id = args.SINGLE_RULE
+    if args.DEBUG_POLICY_RULE is not None:
+        driver.debug_rule_policy = args.DEBUG_POLICY_RULE
+    if args.DEBUG_NAT_RULE is not None:
+        driver.debug_rule_nat = args.DEBUG_NAT_RULE
+    if args.DEBUG_ROUTING_RULE is not None:
+        driver.debug_rule_routing = args.DEBUG_ROUTING_RULE
+
+    result = driver.run(cluster_id='', fw_id=fw_id, single_rule_id=args.SINGLE_RULE)
+
+    if result:
+        print(f'Compiler returned: {result}', file=sys.stderr)
+
+    failed = bool(driver.all_errors or result)
+    if failed:
+        for err in dict.fromkeys(driver.all_errors):
+            print(f'Error: {err}', file=sys.stderr)
+    for warn in dict.fromkeys(driver.all_warnings):
+        print(f'Warning: {warn}', file=sys.stderr)
+    return not failed
+
+
+def load_database(path, cache=False):
+    """Load the database file *path* and return its DatabaseManager.
+
+    With *cache*, the database comes from ``<path>.cache`` while that is
+    current (``--load-cache``). Prints the reason to stderr and returns
+    None when the file cannot be loaded.
+    """
+    print(f'Loading database from {path} ...', file=sys.stderr)
 
     db = firewallfabrik.core.DatabaseManager()
     try:
-        db.load(args.FILE)
+        db.load(path, cache=cache)
     except sqlalchemy.exc.IntegrityError as e:
-        msg = f'Error: failed to load database from {args.FILE}: '
+        msg = f'Error: failed to load database from {path}: '
         if 'UNIQUE constraint failed' in str(e):
             lib_names = getattr(db, '_library_names', None)
             parent_names = getattr(db, '_parent_names', None)
@@ -184,7 +281,7 @@ def main(argv=None):
                 parent_names=parent_names,
             )
             detail = f': {dup}' if dup else ''
-            if args.FILE.endswith('.fwb'):
+            if path.endswith('.fwb'):
                 msg += (
                     f'Duplicate names are not allowed{detail}. Open the '
                     'database in Firewall Builder, rename the affected '
@@ -199,15 +296,35 @@ def main(argv=None):
         else:
             msg += str(e)
         print(msg, file=sys.stderr)
-        return 1
+        return None
     except Exception as e:
-        print(f'Error: failed to load database from {args.FILE}: {e}', file=sys.stderr)
+        print(f'Error: failed to load database from {path}: {e}', file=sys.stderr)
+        return None
+    return db
+
+
+def main(argv=None, db=None):
+    args = parse_args(argv)
+
+    if not args.firewall_names and not args.COMPILE_ALL:
+        print('Error: specify firewall name(s) or use --all', file=sys.stderr)
+        return 1
+    if args.JOBS < 1:
+        print('Error: --jobs must be at least 1', file=sys.stderr)
         return 1
 
+    t_start = time.monotonic()
+
+    # fwf-compile-server hands in the database it loaded once
+    if db is None:
+        db = load_database(args.FILE, cache=args.LOAD_CACHE)
+        if db is None:
+            return 1
+
     # Resolve firewalls to compile
     Firewall = firewallfabrik.core.objects.Firewall
     fw_list = []
-    with db.session() as session:
+    with db.read_session() as session:
         if args.COMPILE_ALL:
             all_fws = (
                 session.execute(
@@ -278,50 +395,15 @@ def main(argv=None):
         print('Error: no firewalls found to compile', file=sys.stderr)
         return 1
 
-    # Compile each firewall (single DB load, sequential compilation)
-    from firewallfabrik.platforms.nftables._compiler_driver import CompilerDriver_nft
-
-    compiled_ok = 0
-    compiled_err = 0
-    for fw_id, fw_name in fw_list:
-        if len(fw_list) > 1:
-            print(f'\n--- {fw_name} ---', file=sys.stderr)
-        print(f"Compiling '{fw_name}' (id: {fw_id}) ...", file=sys.stderr)
-
-        driver = CompilerDriver_nft(db)
-        driver.wdir = args.DESTDIR
-        driver.source_dir = str(Path(args.FILE).parent)
-        driver.verbose = args.VERBOSE
-
-        if args.OUTPUT:
-            driver.file_name_setting = args.OUTPUT
-        if args.IPV4:
-            driver.ipv6_run = False
-        elif args.IPV6:
-            driver.ipv4_run = False
-        if args.SINGLE_RULE:
-            driver.single_rule_compile_on = True
-            driver.single_rule_id = args.SINGLE_RULE
-        if args.DEBUG_POLICY_RULE is not None:
-            driver.debug_rule_policy = args.DEBUG_POLICY_RULE
-        if args.DEBUG_NAT_RULE is not None:
-            driver.debug_rule_nat = args.DEBUG_NAT_RULE
-        if args.DEBUG_ROUTING_RULE is not None:
-            driver.debug_rule_routing = args.DEBUG_ROUTING_RULE
-
-        result = driver.run(cluster_id='', fw_id=fw_id, single_rule_id=args.SINGLE_RULE)
-
-        if result:
-            print(f'Compiler returned: {result}', file=sys.stderr)
-
-        if driver.all_errors or result:
-            compiled_err += 1
-            for err in dict.fromkeys(driver.all_errors):
-                print(f'Error: {err}', file=sys.stderr)
-        else:
-            compiled_ok += 1
-        for warn in dict.fromkeys(driver.all_warnings):
-            print(f'Warning: {warn}', file=sys.stderr)
+    # Compile each firewall (single DB load, sequential compilation unless
+    # --jobs asks for worker processes)
+    compiled_ok, compiled_err = firewallfabrik.cli._parallel.compile_firewalls(
+        db,
+        args,
+        fw_list,
+        compile_firewall,
+        jobs=args.JOBS,
+    )
 
     elapsed = time.monotonic() - t_start
     hours, remainder = divmod(int(elapsed), 3600)
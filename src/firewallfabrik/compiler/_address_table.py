@@ -0,0 +1,167 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Compile-time Address Tables, read once per file and address family.
+
+A block list easily runs to hundreds of thousands of lines, and every
+compiler that met the table - one per rule set and address family - read
+the whole file again and built a network object per line.
+
+`read_address_table` streams a file into `TableAddress` values, plain
+tuples holding what a line says. `load_address_table` keeps them for the
+rest of the process, keyed by the file, its modification time and size
+and the address family, so a file is read again only when it changes; the
+last `_MAX_TABLES` files are kept, so renamed and abandoned ones drop out.
+`address_table_objects` builds the network objects from them once per
+compile and keeps them in ``session.info``, so the compilers of one
+compile share them and they go away with its session. The objects are
+transient: no session ever adds them, and nothing in a compile changes
+an address object.
+
+Matches C++ ``AddressTable::loadFromSource()``: one address or network
+per line; a line that is empty or starts with ``#`` is skipped, and of
+every other line only the leading run of ``0-9 a-f : / .`` counts.
+"""
+
+from __future__ import annotations
+
+import ipaddress
+import re
+import uuid
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+from firewallfabrik.core.objects import Network, NetworkIPv6
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    import sqlalchemy.orm
+
+# C++ keeps only valid address chars: 0-9 a-f : / .
+_ADDRESS_CHARS = re.compile(r'[0-9a-f:/.]*')
+
+
+class TableAddress(NamedTuple):
+    """One address or network of a table, as the compilers need it."""
+
+    name: str
+    address: str
+    netmask: str
+
+
+class InvalidTableAddress(ValueError):
+    """A line of a table holds something that is not an address."""
+
+    def __init__(self, line_num: int, value: str) -> None:
+        super().__init__(f'line {line_num}: "{value}"')
+        self.line_num = line_num
+        self.value = value
+
+
+def read_address_table(path: Path, ipv6: bool) -> Iterator[TableAddress]:
+    """Yield the addresses of family *ipv6* in the table file *path*.
+
+    An IPv4 pass takes the addresses that hold a dot and an IPv6 pass
+    those that hold a colon, the way the C++ compiler tells them apart.
+    Raises `InvalidTableAddress` at the first line of that family which
+    does not parse.
+    """
+    with path.open(encoding='utf-8', errors='replace') as f:
+        for line_num, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line[0] == '#':
+                continue
+            addr_str = _ADDRESS_CHARS.match(line).group()
+            if not addr_str:
+                continue
+            if not (('.' in addr_str and not ipv6) or (':' in addr_str and ipv6)):
+                continue
+            try:
+                net = ipaddress.ip_network(addr_str, strict=False)
+            except ValueError:
+                raise InvalidTableAddress(line_num, addr_str) from None
+            yield TableAddress(addr_str, str(net.network_address), str(net.netmask))
+
+
+class _Table(NamedTuple):
+    state: tuple[int, int]
+    addresses: tuple[TableAddress, ...]
+    error: InvalidTableAddress | None
+
+
+# The most recently used tables, oldest first.
+_tables: dict[tuple[str, bool], _Table] = {}
+_MAX_TABLES = 16
+
+
+def load_address_table(
+    path: Path, ipv6: bool
+) -> tuple[tuple[TableAddress, ...], InvalidTableAddress | None]:
+    """Return the addresses of the table *path* and its first error.
+
+    The addresses are those up to the first line that does not parse;
+    the error is ``None`` if there is no such line. Answered from the
+    cache while the file keeps its modification time and size.
+    """
+    st = path.stat()
+    state = (st.st_mtime_ns, st.st_size)
+    key = (str(path.resolve()), ipv6)
+    table = _tables.pop(key, None)
+    if table is None or table.state != state:
+        addresses = []
+        error = None
+        try:
+            addresses.extend(read_address_table(path, ipv6))
+        except InvalidTableAddress as e:
+            error = e
+        table = _Table(state, tuple(addresses), error)
+    # A table read again replaces its stale copy instead of adding one.
+    _tables[key] = table
+    while len(_tables) > _MAX_TABLES:
+        del _tables[next(iter(_tables))]
+    return table.addresses, table.error
+
+
+def address_table_objects(
+    session: sqlalchemy.orm.Session, path: Path, ipv6: bool
+) -> tuple[tuple, InvalidTableAddress | None]:
+    """Return the network objects of the table *path* and its first error.
+
+    Built from `load_address_table` once per *session*, that is once per
+    compile, and shared by every compiler of it.
+    """
+    addresses, error = load_address_table(path, ipv6)
+    built = session.info.setdefault('fwf_address_tables', {})
+    key = (str(path.resolve()), ipv6)
+    cached = built.get(key)
+    if cached is not None and cached[0] is addresses:
+        return cached[1], error
+
+    cls = NetworkIPv6 if ipv6 else Network
+    type_name = cls.__mapper_args__['polymorphic_identity']
+    objects = tuple(
+        cls(
+            id=uuid.uuid4(),
+            type=type_name,
+            name=a.name,
+            inet_addr_mask={'address': a.address, 'netmask': a.netmask},
+        )
+        for a in addresses
+    )
+    built[key] = (addresses, objects)
+    return objects, error
+
+
+def clear_address_tables() -> None:
+    """Forget every table read so far."""
+    _tables.clear()
@@ -48,6 +48,11 @@ class BaseCompiler:
         self._reported: set[tuple[str, str]] = set()
         self._aborted: bool = False
         self._muted: int = 0
+        # How often a muted block behaved differently for being muted: a
+        # message it discarded, or a check that asked `muted_now`.  A text
+        # rendered muted is only the text of an unmuted render when this
+        # did not move while it was built.
+        self.muted_effects: int = 0
 
     @contextlib.contextmanager
     def muted(self):
@@ -77,7 +82,10 @@ class BaseCompiler:
         subject as reported inside a muted block would swallow the message
         for good.
         """
-        return self._muted > 0
+        if self._muted:
+            self.muted_effects += 1
+            return True
+        return False
 
     @staticmethod
     def _format_rule_id(rule) -> str:
@@ -103,6 +111,7 @@ class BaseCompiler:
     def error(self, rule_or_msg, msg: str | None = None) -> None:
         """Record an error, optionally associated with a rule."""
         if self._muted:
+            self.muted_effects += 1
             return
         if msg is None:
             self._errors.append(str(rule_or_msg))
@@ -120,6 +129,7 @@ class BaseCompiler:
     def warning(self, rule_or_msg, msg: str | None = None) -> None:
         """Record a warning, optionally associated with a rule."""
         if self._muted:
+            self.muted_effects += 1
             return
         if msg is None:
             self._warnings.append(str(rule_or_msg))
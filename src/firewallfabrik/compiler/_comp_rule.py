@@ -146,6 +146,10 @@ class CompRule:
     empty_re_family_only: bool = False
     empty_re_reason: str = ''
 
+    # The text the dedup pass rendered for this rule, kept for the printer
+    # with the state it was rendered from (`Compiler.render_muted`).
+    rendered: tuple | None = dataclasses.field(default=None, repr=False, compare=False)
+
     def clone(self) -> CompRule:
         """Create a deep copy of this rule.
 
@@ -158,8 +162,26 @@ class CompRule:
             setattr(new, slot, list(getattr(self, slot)))
         new.options = dict(self.options) if self.options else {}
         new.negations = dict(self.negations) if self.negations else {}
+        new.rendered = None
         return new
 
+    def render_state(self) -> tuple:
+        """Everything about this rule a printer can read, as one value.
+
+        Two snapshots compare equal only if no processor changed a field,
+        replaced or edited an element list, or edited the options or
+        negations in between.  It is compared, never hashed, so the model
+        objects in the element lists are compared by identity.
+        """
+        return tuple(
+            tuple(value)
+            if isinstance(value, list)
+            else dict(value)
+            if isinstance(value, dict)
+            else value
+            for value in (getattr(self, name) for name in _RENDER_STATE_FIELDS)
+        )
+
     def get_option(self, key: str, default: Any = None) -> Any:
         if self.options:
             val = self.options.get(key, default)
@@ -215,20 +237,60 @@ class CompRule:
         return len(self.tsrv) == 0
 
 
+_RENDER_STATE_FIELDS = tuple(
+    field.name for field in dataclasses.fields(CompRule) if field.name != 'rendered'
+)
+
+# The tables a rule element or a group member can point into.
+_OBJECT_CLASSES = (Address, Service, Host, Interface, Interval, Group)
+
+
+def _object_classes(session) -> dict:
+    """Return which of the ``_OBJECT_CLASSES`` holds each object ID.
+
+    Read with one query per table on first use and kept in ``session.info``
+    for the life of the session, which for a compile is the compile: an ID
+    lives in exactly one table, so knowing which one saves asking the other
+    five.
+    """
+    classes = session.info.get('fwf_object_classes')
+    if classes is None:
+        classes = session.info['fwf_object_classes'] = {}
+        for model_class in _OBJECT_CLASSES:
+            for object_id in session.execute(
+                sqlalchemy.select(model_class.id)
+            ).scalars():
+                classes[object_id] = model_class
+    return classes
+
+
 def _resolve_objects(session, target_ids):
     """Batch-resolve a set of UUIDs to their model objects.
 
     Looks up objects across Address, Service, Host, Interface, Interval,
-    and Group tables.  Returns a dict mapping UUID -> model object.
+    and Group tables, asking only the tables that hold one of the IDs.
+    Returns a dict mapping UUID -> model object.
     """
     if not target_ids:
         return {}
 
-    result = {}
-    id_list = list(target_ids)
+    classes = _object_classes(session)
+    ids_by_class: dict[type, list] = defaultdict(list)
+    unknown = []
+    for target_id in target_ids:
+        model_class = classes.get(target_id)
+        if model_class is None:
+            unknown.append(target_id)
+        else:
+            ids_by_class[model_class].append(target_id)
+    if unknown:
+        # An object added since the index was read, or a dangling
+        # reference: ask every table, as there is no telling which.
+        for model_class in _OBJECT_CLASSES:
+            ids_by_class[model_class].extend(unknown)
 
-    # Query each table that might hold referenced objects
-    for model_class in (Address, Service, Host, Interface, Interval, Group):
+    result = {}
+    for model_class, id_list in ids_by_class.items():
         rows = (
             session.execute(
                 sqlalchemy.select(model_class).where(
@@ -240,6 +302,7 @@ def _resolve_objects(session, target_ids):
         )
         for obj in rows:
             result[obj.id] = obj
+            classes[obj.id] = model_class
 
     return result
 
@@ -360,11 +423,24 @@ def load_rules(session, rule_set: RuleSet) -> list[CompRule]:
     return comp_rules
 
 
-def expand_group(session, group, *, _seen: set | None = None) -> list:
+def expand_group(session, group) -> list:
     """Recursively expand a Group object into its leaf member objects.
 
     Returns a flat list of non-group objects (Address, Service, Host, etc.).
-    Handles circular references via the _seen set.
+    A compiler expands its groups through ``Compiler.group_graph`` instead,
+    which keeps the membership table and the expansions for the compile.
+    """
+    return GroupGraph(session).expand(group)
+
+
+class GroupGraph:
+    """The group membership table of one compile, held in memory.
+
+    Every group in every rule element is expanded, per rule, per address
+    family and once more in the shadowing pass, and walking the tree took
+    a query per group and nesting level each time.  The table is read
+    once, the members of a group are resolved the first time the group is
+    asked for, and the expansion of a group is kept.
 
     A MultiAddress is a leaf here although it is a group by inheritance:
     what is in it comes from a file or from DNS, never from the group
@@ -372,40 +448,86 @@ def expand_group(session, group, *, _seen: set | None = None) -> list:
     single one of them and the object disappears from the rule.  The
     caller resolves it instead.
     """
-    if _seen is None:
-        _seen = set()
-
-    if group.id in _seen:
-        return []
-    _seen.add(group.id)
-
-    # Query member IDs from the group_membership table, preserving order
-    member_ids = (
-        session.execute(
-            sqlalchemy.select(group_membership.c.member_id)
-            .where(
-                group_membership.c.group_id == group.id,
-            )
-            .order_by(group_membership.c.position),
-        )
-        .scalars()
-        .all()
-    )
-
-    if not member_ids:
-        return []
 
-    # Resolve member objects
-    obj_map = _resolve_objects(session, set(member_ids))
-
-    result = []
-    for mid in member_ids:
-        obj = obj_map.get(mid)
-        if obj is None:
-            continue
-        if isinstance(obj, Group) and not isinstance(obj, MultiAddress):
-            result.extend(expand_group(session, obj, _seen=_seen))
-        else:
-            result.append(obj)
-
-    return result
+    def __init__(self, session) -> None:
+        self.session = session
+        self._member_ids: dict[uuid.UUID, list[uuid.UUID]] | None = None
+        self._objects: dict[uuid.UUID, Any] = {}
+        self._members: dict[uuid.UUID, list] = {}
+        self._leaves: dict[uuid.UUID, list] = {}
+        self._recursive: dict[uuid.UUID, Any] = {}
+        self._acyclic: set[uuid.UUID] = set()
+
+    def members(self, group) -> list:
+        """Return the direct members of *group*, in the order of the group."""
+        members = self._members.get(group.id)
+        if members is not None:
+            return members
+        if self._member_ids is None:
+            self._member_ids = defaultdict(list)
+            for group_id, member_id in self.session.execute(
+                sqlalchemy.select(
+                    group_membership.c.group_id,
+                    group_membership.c.member_id,
+                ).order_by(group_membership.c.group_id, group_membership.c.position),
+            ):
+                self._member_ids[group_id].append(member_id)
+        member_ids = self._member_ids.get(group.id, [])
+        missing = {mid for mid in member_ids if mid not in self._objects}
+        if missing:
+            resolved = _resolve_objects(self.session, missing)
+            for mid in missing:
+                self._objects[mid] = resolved.get(mid)
+        members = [self._objects[mid] for mid in member_ids]
+        members = self._members[group.id] = [m for m in members if m is not None]
+        return members
+
+    def expand(self, group) -> list:
+        """Return the leaf members of *group*, nested groups expanded.
+
+        A group reached a second time - through a cycle, or through two
+        groups that both hold it - contributes nothing the second time.
+        """
+        leaves = self._leaves.get(group.id)
+        if leaves is None:
+            leaves = self._leaves[group.id] = self._expand(group, set())
+        return list(leaves)
+
+    def _expand(self, group, seen: set) -> list:
+        if group.id in seen:
+            return []
+        seen.add(group.id)
+        result = []
+        for obj in self.members(group):
+            if isinstance(obj, Group) and not isinstance(obj, MultiAddress):
+                result.extend(self._expand(obj, seen))
+            else:
+                result.append(obj)
+        return result
+
+    def recursive_member(self, group):
+        """Return the group through which *group* contains itself, or None.
+
+        That is the first member, depth first, that is a group on the path
+        it was reached by: *group* itself, or a group between the two.
+        """
+        if group.id in self._recursive:
+            return self._recursive[group.id]
+        path: set[uuid.UUID] = set()
+
+        def visit(grp):
+            path.add(grp.id)
+            for member in self.members(grp):
+                if not isinstance(member, Group) or member.id in self._acyclic:
+                    continue
+                if member.id in path:
+                    return member
+                found = visit(member)
+                if found is not None:
+                    return found
+            path.discard(grp.id)
+            self._acyclic.add(grp.id)
+            return None
+
+        found = self._recursive[group.id] = visit(group)
+        return found
@@ -27,13 +27,17 @@ from typing import TYPE_CHECKING
 
 import sqlalchemy
 
+from firewallfabrik.compiler._address_table import address_table_objects
 from firewallfabrik.compiler._base import BaseCompiler, CompilerStatus
 from firewallfabrik.compiler._combined_address import (
     CombinedAddress,
     host_matches_by_mac,
 )
-from firewallfabrik.compiler._comp_rule import CompRule, expand_group
+from firewallfabrik.compiler._comp_rule import CompRule, GroupGraph
+from firewallfabrik.compiler._dns import DNSCache
+from firewallfabrik.compiler._ip_range import clear_parsed_addresses, parsed_address
 from firewallfabrik.compiler._rule_processor import BasicRuleProcessor, Debug
+from firewallfabrik.core._dynamic_groups import dynamic_group_index
 from firewallfabrik.core.objects import (
     Address,
     AddressRange,
@@ -56,78 +60,6 @@ from firewallfabrik.core.objects import (
 if TYPE_CHECKING:
     import sqlalchemy.orm
 
-# Types eligible for DynamicGroup membership (mirrors fwbuilder's
-# Address::cast / ObjectGroup::cast / Host checks).
-_DG_ADDRESS_TYPES = frozenset(
-    {
-        'AddressRange',
-        'AddressTable',
-        'AttachedNetworks',
-        'DNSName',
-        'DynamicGroup',
-        'IPv4',
-        'IPv6',
-        'MultiAddress',
-        'MultiAddressRunTime',
-        'Network',
-        'NetworkIPv6',
-        'PhysAddress',
-    }
-)
-_DG_GROUP_TYPES = frozenset({'ObjectGroup'})
-_DG_DEVICE_TYPES = frozenset({'Cluster', 'Firewall', 'Host'})
-_DG_ELIGIBLE = _DG_ADDRESS_TYPES | _DG_GROUP_TYPES | _DG_DEVICE_TYPES
-
-
-def _matches_dynamic_criteria(
-    obj, criteria: list[dict], match_mode: str = 'AND'
-) -> bool:
-    """Return True if *obj* matches the *criteria* under *match_mode*.
-
-    *match_mode*:
-      - ``'AND'`` (default for new groups): every criterion must match.
-      - ``'OR'``: at least one criterion must match. Used for groups
-        imported from fwbuilder ``.fwb`` files, since fwbuilder only
-        supports OR semantics in ``DynamicGroup::isMemberOfGroup()``.
-    """
-    obj_type = getattr(obj, 'type', '')
-    if obj_type not in _DG_ELIGIBLE:
-        return False
-
-    # Exclude deleted-objects library.
-    lib = getattr(obj, 'library', None)
-    if lib is None:
-        return False
-    if getattr(lib, 'name', '') == 'Deleted Objects':
-        return False
-
-    # Exclude standard ObjectGroups near the tree root (depth <= 3).
-    if obj_type in _DG_GROUP_TYPES:
-        depth = 2
-        parent = getattr(obj, 'parent_group', None)
-        while parent is not None:
-            depth += 1
-            parent = getattr(parent, 'parent_group', None)
-        if depth <= 3:
-            return False
-
-    keywords = getattr(obj, 'keywords', None) or set()
-    active = []
-    for entry in criteria:
-        type_val = entry.get('type', 'none')
-        keyword_val = entry.get('keyword', ',')
-        if type_val == 'none' or keyword_val == ',':
-            continue
-        type_match = type_val == 'any' or obj_type == type_val
-        keyword_match = keyword_val == '' or keyword_val in keywords
-        active.append(type_match and keyword_match)
-
-    if not active:
-        return False
-    if match_mode == 'OR':
-        return any(active)
-    return all(active)
-
 
 def _is_broadcast_address(ip) -> bool:
     """Whether *ip* is what ``InetAddr::isBroadcast()`` calls a broadcast.
@@ -238,8 +170,16 @@ class Compiler(BaseCompiler):
         self.debug_rule: int = -1
         self.verbose: bool = False
         self.source_dir: str = '.'
+        # Rules the printer took from the dedup pass instead of rendering.
+        self.render_hits: int = 0
+        # Groups the platform matches as one object instead of member by
+        # member (an ipset on iptables); group expansion keeps them whole.
+        self.unexpanded_groups: set = set()
 
         self._multi_address_cache: dict = {}
+        self.dns_cache: DNSCache = DNSCache()
+        self.group_graph: GroupGraph = GroupGraph(session)
+        clear_parsed_addresses()
 
     def set_source_ruleset(self, rs: RuleSet) -> None:
         self.source_ruleset = rs
@@ -344,6 +284,7 @@ class Compiler(BaseCompiler):
             super().warning(rule_or_msg)
             return
         if self._muted:
+            self.muted_effects += 1
             return
         fw_name = self.fw.name if self.fw else ''
         rs_name = self.source_ruleset.name if self.source_ruleset else ''
@@ -364,6 +305,46 @@ class Compiler(BaseCompiler):
         """Basic debug output for a rule. Override in subclasses for richer output."""
         return rule.label
 
+    # -- Rendering a rule once --
+
+    def render_muted(self, rule: CompRule, render) -> str:
+        """Render *rule* with messages discarded, and keep the text.
+
+        The dedup pass renders every rule only to compare it, and the
+        printer then renders the same rule again.  The text is kept on the
+        rule for `render`, unless being muted made a difference while it
+        was built: a message was discarded, a check asked whether it was
+        muted and took another path, or rendering changed the rule.
+        """
+        effects = self.muted_effects
+        state = rule.render_state()
+        with self.muted():
+            text = render(rule)
+        rule.rendered = None
+        if self.muted_effects == effects and rule.render_state() == state:
+            rule.rendered = (
+                text,
+                state,
+                tuple(self._rule_errors.get(rule.label, ())),
+            )
+        return text
+
+    def render(self, rule: CompRule, render) -> str:
+        """Render *rule* for the output, reusing the dedup pass's text.
+
+        The text is reused only while the rule is as it was rendered and
+        no message about it was recorded since, because the printer
+        writes a rule's messages next to it.
+        """
+        kept, rule.rendered = rule.rendered, None
+        if kept is not None and kept[1:] == (
+            rule.render_state(),
+            tuple(self._rule_errors.get(rule.label, ())),
+        ):
+            self.render_hits += 1
+            return kept[0]
+        return render(rule)
+
     # -- Helper methods for rule processors --
 
     def expand_groups_in_element(self, comp_rule: CompRule, slot: str) -> None:
@@ -377,7 +358,8 @@ class Compiler(BaseCompiler):
         because it resolves every one of them in a preprocessor pass over
         the whole object tree before any rule is looked at
         (``Preprocessor::convertObject``).  A run-time MultiAddress is kept
-        as-is: what is in it is only known when the script runs.
+        as-is: what is in it is only known when the script runs, and so is
+        a group named in ``unexpanded_groups``.
 
         After expansion, elements are sorted by name to match C++
         Compiler::expandGroupsInRuleElement() which uses
@@ -392,8 +374,8 @@ class Compiler(BaseCompiler):
             if isinstance(obj, MultiAddress):
                 members = self._expand_multi_address_member(obj, emptied_by)
                 new_elements.extend(members)
-            elif isinstance(obj, Group):
-                for member in expand_group(self.session, obj):
+            elif isinstance(obj, Group) and obj.id not in self.unexpanded_groups:
+                for member in self.group_graph.expand(obj):
                     if isinstance(member, MultiAddress):
                         new_elements.extend(
                             self._expand_multi_address_member(member, emptied_by),
@@ -461,6 +443,10 @@ class Compiler(BaseCompiler):
     def _resolve_dynamic_group(self, obj: DynamicGroup) -> list:
         """Resolve a DynamicGroup by evaluating its criteria against the DB.
 
+        The criteria are looked up in the type and tag index of the
+        database state (`dynamic_group_index`), which every compiler and
+        the editor preview share, so a group costs what it selects.
+
         Default match mode is ``AND`` across criteria. Groups imported
         from a fwbuilder ``.fwb`` file carry an explicit
         ``match_mode='OR'``, preserving fwbuilder's original semantics
@@ -473,61 +459,52 @@ class Compiler(BaseCompiler):
             return []
         match_mode = data.get('match_mode', 'AND')
 
-        self_id = obj.id
-        result = []
-        for cls in (Address, Group, Host):
-            objs = self.session.scalars(sqlalchemy.select(cls)).unique().all()
-            for candidate in objs:
-                if candidate.id == self_id:
-                    continue
-                if _matches_dynamic_criteria(candidate, criteria, match_mode):
-                    result.append(candidate)
-        result.sort(key=lambda o: getattr(o, 'name', ''))
-        return result
+        return dynamic_group_index(self.session).members(
+            self.session, criteria, match_mode, exclude=obj.id
+        )
 
     def _resolve_dns_name(self, obj: DNSName) -> list:
-        """Resolve a compile-time DNSName via DNS lookup."""
+        """Resolve a compile-time DNSName via DNS lookup.
+
+        The answer comes from ``self.dns_cache``, which the driver shares
+        between all compilers of a run and fills up front.
+        """
         dnsrec = obj.get_source_name() or obj.name
         if not dnsrec:
             return []
 
         af = socket.AF_INET6 if self.ipv6_policy else socket.AF_INET
-        try:
-            infos = socket.getaddrinfo(dnsrec, None, af, socket.SOCK_STREAM)
-        except socket.gaierror:
+        answer = self.dns_cache.lookup(dnsrec, af)
+        if answer.error:
             self.abort(
-                f'DNSName "{obj.name}" cannot resolve "{dnsrec}": DNS lookup failed'
+                f'DNSName "{obj.name}" cannot resolve "{dnsrec}": {answer.error}'
             )
             return []
 
-        seen: set[str] = set()
-        results: list[Address] = []
         addr_type = IPv6 if self.ipv6_policy else IPv4
         netmask = (
             'ffff:ffff:ffff:ffff:ffff:ffff:ffff:ffff'
             if self.ipv6_policy
             else '255.255.255.255'
         )
-        for info in infos:
-            ip_str = str(info[4][0])
-            if ip_str in seen:
-                continue
-            seen.add(ip_str)
-            addr = addr_type(
+        return [
+            addr_type(
                 id=uuid.uuid4(),
                 type=addr_type.__mapper_args__['polymorphic_identity'],
                 name='address',
                 inet_addr_mask={'address': ip_str, 'netmask': netmask},
             )
-            results.append(addr)
-        return results
+            for ip_str in answer.addresses
+        ]
 
     def _load_address_table(self, obj: AddressTable) -> list:
         """Load addresses from a file referenced by an AddressTable object.
 
         Matches C++ AddressTable::loadFromSource().
         File format: one address or network (CIDR) per line; lines starting
-        with '#' or empty lines are ignored.
+        with '#' or empty lines are ignored.  The file is read once per
+        process and address family and again only when it changes, and
+        the objects are built once per compile (`address_table_objects`).
         """
         filename = obj.get_source_name()
         if not filename:
@@ -546,58 +523,11 @@ class Compiler(BaseCompiler):
             self.abort(f'AddressTable "{obj.name}": file not found ({filename})')
             return []
 
-        results: list[Address] = []
-        line_num = 0
-        for line in path.read_text().splitlines():
-            line_num += 1
-            line = line.strip()
-            if not line or line.startswith('#'):
-                continue
-            # C++ keeps only valid address chars: 0-9 a-f : / .
-            addr_str = ''
-            for ch in line:
-                if ch in '0123456789abcdef:/.':
-                    addr_str += ch
-                else:
-                    break
-            if not addr_str:
-                continue
-
-            # Determine if IPv4 or IPv6 and filter by address family
-            if '.' in addr_str and not self.ipv6_policy:
-                try:
-                    net = ipaddress.ip_network(addr_str, strict=False)
-                except ValueError:
-                    # C++ throws with file:line and value
-                    self.abort(f'Invalid address: {path}:{line_num} "{addr_str}"')
-                    return results
-                addr = Network(
-                    id=uuid.uuid4(),
-                    type='Network',
-                    name=addr_str,
-                    inet_addr_mask={
-                        'address': str(net.network_address),
-                        'netmask': str(net.netmask),
-                    },
-                )
-                results.append(addr)
-            elif ':' in addr_str and self.ipv6_policy:
-                try:
-                    net = ipaddress.ip_network(addr_str, strict=False)
-                except ValueError:
-                    self.abort(f'Invalid address: {path}:{line_num} "{addr_str}"')
-                    return results
-                addr = NetworkIPv6(
-                    id=uuid.uuid4(),
-                    type='NetworkIPv6',
-                    name=addr_str,
-                    inet_addr_mask={
-                        'address': str(net.network_address),
-                        'netmask': str(net.netmask),
-                    },
-                )
-                results.append(addr)
-        return results
+        objects, error = address_table_objects(self.session, path, self.ipv6_policy)
+        if error is not None:
+            # C++ throws with file:line and value
+            self.abort(f'Invalid address: {path}:{error.line_num} "{error.value}"')
+        return list(objects)
 
     def expand_addr(self, comp_rule: CompRule, slot: str) -> None:
         """Expand hosts/firewalls in an element slot into their interface addresses.
@@ -1132,13 +1062,9 @@ class Compiler(BaseCompiler):
 
 def _addr_sort_key(obj):
     """Sort key for address objects: sort by numeric IP address."""
-    if isinstance(obj, Address):
-        addr_str = obj.get_address()
-        if addr_str:
-            try:
-                return (0, int(ipaddress.ip_address(addr_str)))
-            except ValueError:
-                pass
+    address = parsed_address(obj).address
+    if address is not None:
+        return (0, address.first)
     name = getattr(obj, 'name', '')
     return (1, name)
 
@@ -1171,23 +1097,23 @@ def _check_addresses_match(a1, a2) -> bool:
     if addr1 == addr2:
         return True
 
-    # Check if one belongs to the other's network
-    try:
-        ip1 = ipaddress.ip_address(addr1)
-        ip2 = ipaddress.ip_address(addr2)
-        mask2 = a2.get_netmask() if isinstance(a2, Address) else ''
-        mask1 = a1.get_netmask() if isinstance(a1, Address) else ''
-
-        if mask2 and _defines_a_subnet(a2):
-            net2 = ipaddress.ip_network(f'{addr2}/{mask2}', strict=False)
-            if ip1 in net2:
-                return True
+    # Check if one belongs to the other's network.  An address or a
+    # network that does not parse ends the check.
+    p1 = parsed_address(a1)
+    p2 = parsed_address(a2)
+    if p1.address is None or p2.address is None:
+        return False
 
-        if mask1 and _defines_a_subnet(a1):
-            net1 = ipaddress.ip_network(f'{addr1}/{mask1}', strict=False)
-            if ip2 in net1:
-                return True
-    except ValueError:
-        pass
+    if a2.get_netmask() and _defines_a_subnet(a2):
+        if p2.network is None:
+            return False
+        if p2.network.contains(p1.address):
+            return True
+
+    if a1.get_netmask() and _defines_a_subnet(a1):
+        if p1.network is None:
+            return False
+        if p1.network.contains(p2.address):
+            return True
 
     return False
@@ -0,0 +1,255 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Compile-time DNS resolution, all names at once and each name once.
+
+A DNS Name that is resolved at compile time used to be looked up by the
+compiler that met it first, with a blocking ``getaddrinfo`` call, one name
+after the other - and again by every other compiler of the same firewall,
+because each rule set and each address family is compiled by a compiler
+of its own. A policy with a few hundred such objects spent most of its
+compile waiting for the resolver.
+
+`DNSCache` answers for a whole driver run. The driver collects the
+compile-time DNS Names the firewall's rules use (`compile_time_dns_names`)
+and resolves them up front, many at a time, within one timeout; the
+compilers then read the answers. A name nobody saw coming - one reached
+through a Dynamic Group, say - is resolved when it is asked for, and kept
+as well. Optionally the answers are written to a file and taken from
+there by later runs for as long as they are younger than the given TTL;
+failed lookups are never stored.
+
+The resolver is a callable ``resolver(name, family) -> addresses`` that
+raises ``OSError`` when the name does not resolve, so tests and offline
+builds can hand in their own.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import queue
+import socket
+import tempfile
+import threading
+import time
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import NamedTuple
+
+import sqlalchemy
+
+from firewallfabrik.core.objects import (
+    DNSName,
+    Rule,
+    RuleSet,
+    group_membership,
+    rule_elements,
+)
+
+Resolver = Callable[[str, int], Iterable[str]]
+
+_FAMILY_VERSION = {socket.AF_INET: 4, socket.AF_INET6: 6}
+_VERSION_FAMILY = {4: socket.AF_INET, 6: socket.AF_INET6}
+
+
+def getaddrinfo_resolver(name: str, family: int) -> list[str]:
+    """Resolve *name* with the system resolver (``getaddrinfo``)."""
+    infos = socket.getaddrinfo(name, None, family, socket.SOCK_STREAM)
+    return [str(info[4][0]) for info in infos]
+
+
+class DNSAnswer(NamedTuple):
+    """The addresses a name resolved to, or why it did not resolve."""
+
+    addresses: tuple[str, ...] = ()
+    error: str | None = None
+
+
+class DNSCache:
+    """Answers to ``(name, address family)`` for the length of a run.
+
+    *timeout* is how long one batch of lookups may take as a whole, in
+    seconds; *workers* how many lookups run at the same time. *path*
+    names the file answers are kept in between runs, *ttl* how many
+    seconds an answer from there is good for.
+    """
+
+    TIMEOUT = 30.0
+    WORKERS = 32
+    TTL = 300.0
+
+    def __init__(
+        self,
+        resolver: Resolver | None = None,
+        *,
+        timeout: float | None = None,
+        workers: int | None = None,
+        path: str | os.PathLike | None = None,
+        ttl: float | None = None,
+    ) -> None:
+        self.resolver: Resolver = resolver or getaddrinfo_resolver
+        self.timeout = self.TIMEOUT if timeout is None else timeout
+        self.workers = workers or self.WORKERS
+        self.path = Path(path) if path else None
+        self.ttl = self.TTL if ttl is None else ttl
+        self._answers: dict[tuple[str, int], DNSAnswer] = {}
+        # Answers read from *path*: key -> (time resolved, addresses).
+        self._stored: dict[tuple[str, int], tuple[float, tuple[str, ...]]] = {}
+        if self.path is not None:
+            self._read()
+
+    def lookup(self, name: str, family: int) -> DNSAnswer:
+        """Return the answer for *name* in *family*, resolving it if need be."""
+        key = (name, family)
+        answer = self._answers.get(key)
+        if answer is None:
+            self.resolve_all([key])
+            answer = self._answers[key]
+        return answer
+
+    def resolve_all(self, queries: Iterable[tuple[str, int]]) -> None:
+        """Resolve every ``(name, family)`` of *queries* not answered yet.
+
+        The lookups run in parallel; whatever has not answered when the
+        timeout runs out is recorded as timed out and not waited for.
+        """
+        now = time.time()
+        pending = []
+        for key in dict.fromkeys(queries):
+            if key in self._answers:
+                continue
+            stored = self._stored.get(key)
+            if stored is not None and now - stored[0] < self.ttl:
+                self._answers[key] = DNSAnswer(stored[1])
+            else:
+                pending.append(key)
+        if not pending:
+            return
+
+        work: queue.SimpleQueue = queue.SimpleQueue()
+        for key in pending:
+            work.put(key)
+        results: dict[tuple[str, int], DNSAnswer] = {}
+        finished = threading.Condition()
+
+        def worker() -> None:
+            while True:
+                try:
+                    key = work.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    addresses = tuple(dict.fromkeys(self.resolver(*key)))
+                    answer = DNSAnswer(addresses)
+                except (OSError, UnicodeError):
+                    answer = DNSAnswer(error='DNS lookup failed')
+                with finished:
+                    results[key] = answer
+                    finished.notify()
+
+        # Daemon threads: a lookup that hangs past the timeout must not
+        # hold up the compile, nor the exit of the process after it.
+        for _ in range(min(self.workers, len(pending))):
+            threading.Thread(target=worker, name='fwf-dns', daemon=True).start()
+        with finished:
+            finished.wait_for(lambda: len(results) == len(pending), self.timeout)
+            answered = dict(results)
+
+        timed_out = DNSAnswer(
+            error=f'DNS lookup timed out after {self.timeout:g} seconds'
+        )
+        for key in pending:
+            answer = answered.get(key, timed_out)
+            self._answers[key] = answer
+            if answer.error is None:
+                self._stored[key] = (now, answer.addresses)
+        if self.path is not None:
+            self._write()
+
+    def _read(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+            for entry in data['answers']:
+                key = (entry['name'], _VERSION_FAMILY[entry['family']])
+                self._stored[key] = (
+                    float(entry['resolved']),
+                    tuple(entry['addresses']),
+                )
+        except (OSError, ValueError, KeyError, TypeError):
+            # No file yet, or not one of ours: start from nothing.
+            self._stored.clear()
+
+    def _write(self) -> None:
+        now = time.time()
+        answers = [
+            {
+                'name': name,
+                'family': _FAMILY_VERSION[family],
+                'resolved': resolved,
+                'addresses': list(addresses),
+            }
+            for (name, family), (resolved, addresses) in sorted(self._stored.items())
+            if now - resolved < self.ttl
+        ]
+        # Written next to the file and renamed over it, so that a run
+        # reading it meanwhile never sees half of it.
+        with contextlib.suppress(OSError):
+            fd, tmp = tempfile.mkstemp(
+                dir=self.path.parent, prefix=f'.{self.path.name}.'
+            )
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump({'answers': answers}, f, indent=1)
+                Path(tmp).replace(self.path)
+            except OSError:
+                Path(tmp).unlink(missing_ok=True)
+                raise
+
+
+def compile_time_dns_names(session, device_id) -> list[str]:
+    """Return what the compile-time DNS Names in the rules of a device resolve.
+
+    Follows groups to any depth; a DNS Name marked for run-time
+    resolution is left to the firewall.
+    """
+    targets = set(
+        session.scalars(
+            sqlalchemy.select(rule_elements.c.target_id)
+            .join(Rule, Rule.id == rule_elements.c.rule_id)
+            .join(RuleSet, RuleSet.id == Rule.rule_set_id)
+            .where(RuleSet.device_id == device_id)
+        )
+    )
+    members: dict = {}
+    for group_id, member_id in session.execute(
+        sqlalchemy.select(group_membership.c.group_id, group_membership.c.member_id)
+    ):
+        members.setdefault(group_id, []).append(member_id)
+    todo = list(targets)
+    while todo:
+        for member_id in members.get(todo.pop(), ()):
+            if member_id not in targets:
+                targets.add(member_id)
+                todo.append(member_id)
+
+    names = []
+    for obj in session.scalars(
+        sqlalchemy.select(DNSName).where(DNSName.id.in_(targets))
+    ):
+        if (obj.data or {}).get('run_time'):
+            continue
+        name = obj.get_source_name() or obj.name
+        if name:
+            names.append(name)
+    return sorted(set(names))
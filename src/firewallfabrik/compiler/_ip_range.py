@@ -0,0 +1,161 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""The addresses an address object stands for, as integers, parsed once.
+
+An address object keeps its address and netmask as strings in JSON.
+Shadowing detection, the address sort of every expanded rule element and
+the checks that look for the interface an address belongs to all need
+them as numbers, and asked ``ipaddress`` for them again on every call -
+the shadowing pass alone compares each atomic rule with many others.
+`parsed_address` parses an object once and keeps the result until the
+next compile starts (`Compiler.__init__` calls `clear_parsed_addresses`).
+
+The cache is keyed by object ID.  Every object a compiler builds on the
+way gets an ID of its own, and nothing changes the address of an object
+while a compile runs: the compile reads the database in a read-only
+session.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import ipaddress
+import uuid
+
+from firewallfabrik.core.objects import Address, AddressRange, Network, NetworkIPv6
+
+_MAX_PREFIX = {4: 32, 6: 128}
+
+
+class IPRange:
+    """A contiguous block of addresses of one family, as integers.
+
+    *prefixlen* is set when the block is a CIDR network and ``None`` for a
+    range that is not one.
+    """
+
+    __slots__ = ('first', 'last', 'prefixlen', 'version')
+
+    def __init__(self, version: int, first: int, last: int) -> None:
+        self.version = version
+        self.first = first
+        self.last = last
+        size = last - first + 1
+        if size > 0 and not size & (size - 1) and not first & (size - 1):
+            self.prefixlen = _MAX_PREFIX[version] - size.bit_length() + 1
+        else:
+            self.prefixlen = None
+
+    def __repr__(self) -> str:
+        return f'IPRange({self.version}, {self.first}, {self.last})'
+
+    def contains(self, other: IPRange) -> bool:
+        return (
+            self.version == other.version
+            and self.first <= other.first
+            and other.last <= self.last
+        )
+
+    def addresses(self) -> tuple:
+        """Return the first and the last address as ``ipaddress`` objects."""
+        cls = ipaddress.IPv4Address if self.version == 4 else ipaddress.IPv6Address
+        return cls(self.first), cls(self.last)
+
+    @classmethod
+    def of_network(cls, network) -> IPRange:
+        return cls(
+            network.version,
+            int(network.network_address),
+            int(network.broadcast_address),
+        )
+
+
+class ParsedAddress:
+    """What `parsed_address` knows about one address object.
+
+    * *address*: the address of the object, as typed - host bits and all.
+    * *network*: the address together with the netmask.  For an
+      interface address that is the subnet of the interface.
+    * *range*: the addresses the object matches in a rule: the network
+      for a Network, start to end for an AddressRange, the address alone
+      for anything else.
+    * *is_any*: ``Address.is_any()``.
+
+    A part that is missing or does not parse is ``None``.
+    """
+
+    __slots__ = ('address', 'is_any', 'network', 'range')
+
+    def __init__(self, obj) -> None:
+        self.address = None
+        self.network = None
+        self.range = None
+        self.is_any = False
+        if not isinstance(obj, Address):
+            return
+        # AddressRange has no is_any: its address is not what it matches
+        self.is_any = not isinstance(obj, AddressRange) and obj.is_any()
+
+        if isinstance(obj, AddressRange):
+            start = _parse_address(obj.get_start_address())
+            end = _parse_address(obj.get_end_address())
+            if start and end and start.version == end.version:
+                self.range = IPRange(start.version, start.first, end.last)
+
+        addr = obj.get_address()
+        self.address = _parse_address(addr)
+        mask = obj.get_netmask()
+        if addr and mask:
+            with contextlib.suppress(ValueError):
+                self.network = IPRange.of_network(
+                    ipaddress.ip_network(f'{addr}/{mask}', strict=False)
+                )
+
+        if isinstance(obj, (Network, NetworkIPv6)):
+            self.range = self.network
+        elif not isinstance(obj, AddressRange):
+            self.range = self.address
+
+
+def _parse_address(addr: str) -> IPRange | None:
+    if not addr:
+        return None
+    try:
+        ip = ipaddress.ip_address(addr)
+    except ValueError:
+        return None
+    return IPRange(ip.version, int(ip), int(ip))
+
+
+_parsed: dict[uuid.UUID, ParsedAddress] = {}
+_NOTHING = ParsedAddress(None)
+
+
+def parsed_address(obj) -> ParsedAddress:
+    """Return the parsed addresses of *obj*, parsing it on first use."""
+    # A CombinedAddress or an interface is not an Address, and a
+    # CombinedAddress carries the ID of the address it wraps.
+    if not isinstance(obj, Address):
+        return _NOTHING
+    key = obj.id
+    if key is None:
+        return ParsedAddress(obj)
+    parsed = _parsed.get(key)
+    if parsed is None:
+        parsed = _parsed[key] = ParsedAddress(obj)
+    return parsed
+
+
+def clear_parsed_addresses() -> None:
+    """Forget everything parsed so far; a compile starts with this."""
+    _parsed.clear()
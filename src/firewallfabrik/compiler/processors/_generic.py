@@ -20,14 +20,14 @@ from __future__ import annotations
 
 import ipaddress as _ipa
 import sys
-
-import sqlalchemy
+import uuid
 
 from firewallfabrik.compiler._combined_address import (
     CombinedAddress,
     host_matches_by_mac,
 )
 from firewallfabrik.compiler._comp_rule import CompRule
+from firewallfabrik.compiler._ip_range import parsed_address
 from firewallfabrik.compiler._rule_processor import (
     BasicRuleProcessor,
     NATRuleProcessor,
@@ -46,6 +46,8 @@ from firewallfabrik.core.objects import (
     ICMPService,
     Interface,
     IPService,
+    IPv4,
+    IPv6,
     MultiAddress,
     NATRuleType,
     Network,
@@ -55,7 +57,6 @@ from firewallfabrik.core.objects import (
     Service,
     TCPService,
     TCPUDPService,
-    group_membership,
     normalize_mac_address,
 )
 
@@ -65,31 +66,6 @@ def _is_runtime(obj: MultiAddress) -> bool:
     return bool((obj.data or {}).get('run_time', False))
 
 
-def _get_group_members(session, group: Group) -> list:
-    """Return the direct members of a group (without recursive expansion).
-
-    Uses the ``group_membership`` association table to look up member IDs,
-    then resolves them to model objects.  Needed by
-    :class:`RecursiveGroupsInRE` to walk the group tree.
-    """
-    member_ids = (
-        session.execute(
-            sqlalchemy.select(group_membership.c.member_id).where(
-                group_membership.c.group_id == group.id,
-            ),
-        )
-        .scalars()
-        .all()
-    )
-    if not member_ids:
-        return []
-
-    from firewallfabrik.compiler._comp_rule import _resolve_objects
-
-    obj_map = _resolve_objects(session, set(member_ids))
-    return [obj_map[mid] for mid in member_ids if mid in obj_map]
-
-
 class Begin(BasicRuleProcessor):
     """Injects CompRules from the compiler's rules list into the pipeline.
 
@@ -293,7 +269,7 @@ class EmptyGroupsInRE(BasicRuleProcessor):
         _seen.add(obj.id)
         return sum(
             cls._count_children(compiler, member, _seen)
-            for member in _get_group_members(compiler.session, obj)
+            for member in compiler.group_graph.members(obj)
         )
 
     def process_next(self) -> bool:
@@ -371,27 +347,22 @@ class RecursiveGroupsInRE(BasicRuleProcessor):
         super().__init__(name)
         self._slot = slot
 
-    def _is_recursive_group(self, grid, obj) -> None:
-        """Recursively check whether *obj* contains a reference back to *grid*.
+    def _is_recursive_group(self, obj) -> None:
+        """Abort if *obj* contains itself, directly or through nested groups.
 
-        Matches C++ ``Compiler::recursiveGroupsInRE::isRecursiveGroup``.
+        Matches C++ ``Compiler::recursiveGroupsInRE::isRecursiveGroup``,
+        which walks the tree once with every group in it as the root.  The
+        group graph walks it once, depth first, remembers the groups it
+        has already found free of cycles, and keeps the answer for the
+        compile.
         """
-        if not isinstance(obj, Group):
-            return
-
-        members = _get_group_members(self.compiler.session, obj)
-        for member in members:
-            if not isinstance(member, Group):
-                continue
-            if member.id == grid or obj.id == member.id:
-                name = getattr(member, 'name', str(member))
-                self.compiler.abort(
-                    None,
-                    f"Group '{name}' references itself recursively",
-                )
-                return
-            self._is_recursive_group(grid, member)
-            self._is_recursive_group(member.id, member)
+        member = self.compiler.group_graph.recursive_member(obj)
+        if member is not None:
+            name = getattr(member, 'name', str(member))
+            self.compiler.abort(
+                None,
+                f"Group '{name}' references itself recursively",
+            )
 
     def process_next(self) -> bool:
         rule = self.prev_processor.get_next_rule()
@@ -405,7 +376,7 @@ class RecursiveGroupsInRE(BasicRuleProcessor):
 
         for obj in elements:
             if isinstance(obj, Group):
-                self._is_recursive_group(obj.id, obj)
+                self._is_recursive_group(obj)
 
         self.tmp_queue.append(rule)
         return True
@@ -780,6 +751,157 @@ class EliminateDuplicatesInSRV(BasicRuleProcessor):
         return True
 
 
+class AggregateAddresses(BasicRuleProcessor):
+    """Merge overlapping and adjacent addresses of an address element.
+
+    A group of networks that together form a larger one, or a host that
+    is also inside a network of the same element, each cost a match of
+    their own - on iptables a rule of their own once the element is made
+    atomic.  This replaces every run of addresses that overlap or touch
+    by the fewest CIDR blocks covering it, keeping the original object
+    wherever one block is exactly one of them, and leaves the run alone
+    if the blocks would not be fewer.  The element matches the same
+    packets before and after.
+
+    Only plain addresses, networks and address ranges take part.  A
+    negated element, "any", an address of 0.0.0.0 or ``::`` (reported by
+    the zero-address check) and an object marked with errors stay as
+    they are.  In verbose mode the processor says how many entries it
+    removed in total.
+
+    Switched on by the firewall option ``aggregate_addresses``.  fwbuilder
+    has no counterpart.
+    """
+
+    def __init__(self, name: str, slot: str) -> None:
+        super().__init__(name)
+        self._slot = slot
+        self._removed = 0
+
+    def process_next(self) -> bool:
+        rule = self.prev_processor.get_next_rule()
+        if rule is None:
+            if self._removed and getattr(self.compiler, 'verbose', False):
+                self.compiler.info(
+                    f' {self.name}: {self._removed} addresses merged away'
+                )
+            self._removed = 0
+            return False
+
+        elements = getattr(rule, self._slot)
+        if (
+            len(elements) > 1
+            and not rule.get_neg(self._slot)
+            and not getattr(rule, f'{self._slot}_single_object_negation', False)
+        ):
+            aggregated = aggregate_addresses(elements)
+            if len(aggregated) < len(elements):
+                self._removed += len(elements) - len(aggregated)
+                setattr(rule, self._slot, aggregated)
+
+        self.tmp_queue.append(rule)
+        return True
+
+
+_AGGREGATABLE = (IPv4, IPv6, Network, NetworkIPv6, AddressRange)
+
+
+def _aggregatable_range(obj):
+    """Return the address range of *obj* if it may be merged, else None."""
+    if type(obj) not in _AGGREGATABLE:
+        return None
+    if (obj.data or {}).get('rule_error', False):
+        return None
+    parsed = parsed_address(obj)
+    r = parsed.range
+    if parsed.is_any or r is None or r.first == 0:
+        return None
+    return r
+
+
+def aggregate_addresses(elements: list) -> list:
+    """Return *elements* with overlapping and adjacent addresses merged.
+
+    The merged blocks take the place of the first address that went
+    into them; everything that does not take part keeps its position.
+    """
+    runs: list[list] = []  # [version, first, last, members]
+    for obj in elements:
+        r = _aggregatable_range(obj)
+        if r is not None:
+            runs.append([r.version, r.first, r.last, [(r, obj)]])
+    if len(runs) < 2:
+        return elements
+
+    runs.sort(key=lambda run: (run[0], run[1]))
+    merged = [runs[0]]
+    for run in runs[1:]:
+        last = merged[-1]
+        if run[0] == last[0] and run[1] <= last[2] + 1:
+            last[2] = max(last[2], run[2])
+            last[3].extend(run[3])
+        else:
+            merged.append(run)
+    if len(merged) == len(runs):
+        return elements
+
+    position = {}
+    for i, obj in enumerate(elements):
+        position.setdefault(id(obj), i)
+    replacement: dict[int, list] = {}
+    dropped: set[int] = set()
+    for version, first, last, members in merged:
+        if len(members) == 1:
+            continue
+        blocks = _merge_run(version, first, last, members)
+        if len(blocks) >= len(members):
+            continue
+        ids = {id(obj) for _r, obj in members}
+        replacement[min(position[i] for i in ids)] = blocks
+        dropped.update(ids)
+
+    if not replacement:
+        return elements
+    result = []
+    for i, obj in enumerate(elements):
+        if i in replacement:
+            result.extend(replacement[i])
+        elif id(obj) not in dropped:
+            result.append(obj)
+    return result
+
+
+def _merge_run(version: int, first: int, last: int, members: list) -> list:
+    """Return the fewest objects that cover *first* to *last*.
+
+    An object of *members* that covers the run on its own is returned
+    alone; otherwise the run is split into CIDR blocks, each of them an
+    object of *members* where one matches it exactly and a new network
+    otherwise.
+    """
+    for r, obj in members:
+        if r.first == first and r.last == last:
+            return [obj]
+    cls = _ipa.IPv4Address if version == 4 else _ipa.IPv6Address
+    by_range = {(r.first, r.last): obj for r, obj in members}
+    blocks = []
+    for net in _ipa.summarize_address_range(cls(first), cls(last)):
+        key = (int(net.network_address), int(net.broadcast_address))
+        obj = by_range.get(key)
+        if obj is None:
+            network_cls = Network if version == 4 else NetworkIPv6
+            obj = network_cls(
+                id=uuid.uuid4(),
+                name=net.with_prefixlen,
+                inet_addr_mask={
+                    'address': str(net.network_address),
+                    'netmask': str(net.netmask),
+                },
+            )
+        blocks.append(obj)
+    return blocks
+
+
 class DetectShadowing(BasicRuleProcessor):
     """Detect rule shadowing — abort if an earlier rule completely covers a later one.
 
@@ -801,6 +923,10 @@ class DetectShadowing(BasicRuleProcessor):
         # once per expanded variant pair, which is noise.  Track reported
         # (prev.position, rule.position) pairs and warn at most once.
         self._reported_shadows: set[tuple] = set()
+        # The seen rules filed by chain: a rule can only be shadowed by one
+        # in its own chain or in none, and within a chain only by the rules
+        # the address index returns for it.
+        self._indexes: dict[str, _ShadowIndex] = {}
 
     def process_next(self) -> bool:
         rule = self.prev_processor.get_next_rule()
@@ -834,7 +960,7 @@ class DetectShadowing(BasicRuleProcessor):
         ):
             return True
 
-        for prev in self._rules_seen:
+        for prev in self._candidates(rule):
             if prev.abs_rule_number == rule.abs_rule_number:
                 continue
             if self._rule_shadows(prev, rule):
@@ -863,9 +989,36 @@ class DetectShadowing(BasicRuleProcessor):
                     )
                 break
 
+        chain = rule.ipt_chain or ''
+        index = self._indexes.get(chain)
+        if index is None:
+            index = self._indexes[chain] = _ShadowIndex()
+        index.add(len(self._rules_seen), rule)
         self._rules_seen.append(rule)
         return True
 
+    def _candidates(self, rule: CompRule) -> list[CompRule]:
+        """Return the seen rules that may shadow *rule*, in the order seen.
+
+        Comparing every rule with every one above it is quadratic in the
+        number of atomic rules, and `ConvertToAtomic` makes a lot of them
+        out of a policy that uses groups.  The index only narrows the list
+        down; `_rule_shadows` still decides.  The order matters: the first
+        shadowing rule is the one reported.
+        """
+        if rule.ipt_chain:
+            indexes = [
+                self._indexes[chain]
+                for chain in (rule.ipt_chain, '')
+                if chain in self._indexes
+            ]
+        else:
+            indexes = self._indexes.values()
+        seqs = set()
+        for index in indexes:
+            seqs.update(index.candidates(rule))
+        return [self._rules_seen[seq] for seq in sorted(seqs)]
+
     @staticmethod
     def _overlap(rule: CompRule) -> str:
         """Name the one combination that is covered, if it is not the rule.
@@ -1064,65 +1217,139 @@ class DetectShadowing(BasicRuleProcessor):
         return all(any(_srv_contains(s1, s2) for s1 in e1) for s2 in e2)
 
 
+class _AddressIndex:
+    """The addresses of one rule element of the seen rules, by what they cover.
+
+    ``matches(obj)`` returns the sequence numbers of the rules with an
+    object *a1* for which ``_addr_contains(a1, obj)`` can hold: the same
+    object, or an address whose range covers the range of *obj*.  Networks
+    and hosts are CIDR blocks, filed under their network address and prefix
+    length, so the blocks that contain *obj* are found with one dict lookup
+    per prefix length in use instead of a scan.  Address ranges rarely line
+    up with a block and are kept in a plain list.
+    """
+
+    def __init__(self) -> None:
+        self._by_id: dict = {}
+        self._blocks: dict[tuple[int, int, int], list[int]] = {}
+        self._prefix_lengths: dict[int, set[int]] = {4: set(), 6: set()}
+        self._ranges: list[tuple[int, int, int, int]] = []
+
+    def add(self, seq: int, objects: list) -> None:
+        for obj in objects:
+            self._by_id.setdefault(obj.id, []).append(seq)
+            r = parsed_address(obj).range
+            if r is None:
+                continue
+            if r.prefixlen is not None:
+                key = (r.version, r.prefixlen, r.first)
+                self._blocks.setdefault(key, []).append(seq)
+                self._prefix_lengths[r.version].add(r.prefixlen)
+            else:
+                self._ranges.append((r.version, r.first, r.last, seq))
+
+    def matches(self, obj) -> set[int]:
+        seqs = set(self._by_id.get(obj.id, ()))
+        parsed = parsed_address(obj)
+        if parsed.is_any or parsed.range is None:
+            return seqs
+        version, first, last = (
+            parsed.range.version,
+            parsed.range.first,
+            parsed.range.last,
+        )
+        bits = 32 if version == 4 else 128
+        for prefix in self._prefix_lengths[version]:
+            size = 1 << (bits - prefix)
+            network = first & ~(size - 1)
+            if last <= network + size - 1:
+                seqs.update(self._blocks.get((version, prefix, network), ()))
+        for r_version, r_first, r_last, seq in self._ranges:
+            if r_version == version and r_first <= first and last <= r_last:
+                seqs.add(seq)
+        return seqs
+
+
+class _ShadowIndex:
+    """The seen rules of one chain, filed by source and destination.
+
+    A rule shadows one below it only if its source contains the source
+    below and its destination the destination below, so a rule is filed
+    under its source unless that is "any", under its destination unless
+    that is "any", and in a list of its own if both are.  A query returns
+    the rules filed under the source or the destination of the rule below
+    whose other element matches too.  An element matches when one of its
+    objects contains the *first* object of the element below; with more
+    than one object below, containing all of them is for `_rule_shadows`
+    to check.
+    """
+
+    def __init__(self) -> None:
+        self._src = _AddressIndex()
+        self._dst = _AddressIndex()
+        self._src_any: set[int] = set()
+        self._dst_any: set[int] = set()
+        self._both_any: list[int] = []
+
+    def add(self, seq: int, rule: CompRule) -> None:
+        src_any = _element_is_any(rule.src)
+        dst_any = _element_is_any(rule.dst)
+        if src_any:
+            self._src_any.add(seq)
+        else:
+            self._src.add(seq, rule.src)
+        if dst_any:
+            self._dst_any.add(seq)
+        else:
+            self._dst.add(seq, rule.dst)
+        if src_any and dst_any:
+            self._both_any.append(seq)
+
+    def candidates(self, rule: CompRule) -> set[int]:
+        seqs = set(self._both_any)
+        src = self._src.matches(rule.src[0]) if rule.src else set()
+        dst = self._dst.matches(rule.dst[0]) if rule.dst else set()
+        seqs.update(seq for seq in src if seq in dst or seq in self._dst_any)
+        seqs.update(seq for seq in dst if seq in self._src_any)
+        return seqs
+
+
+def _element_is_any(element: list) -> bool:
+    """Return True if an address element contains everything."""
+    return not element or any(_addr_is_any(obj) for obj in element)
+
+
+def _addr_is_any(obj) -> bool:
+    """Return True for the "any" address (AddressRange has no is_any)."""
+    return parsed_address(obj).is_any
+
+
 def _addr_contains(a1, a2) -> bool:
     """Return True if address a1 contains (is a superset of) a2.
 
-    Uses the ipaddress module for network/host containment checks.
+    Compares the integer ranges `parsed_address` keeps for the compile.
     """
     if a1 is a2 or a1.id == a2.id:
         return True
 
-    # "any" address contains everything (AddressRange has no is_any)
-    if isinstance(a1, Address) and not isinstance(a1, AddressRange) and a1.is_any():
+    p1 = parsed_address(a1)
+    p2 = parsed_address(a2)
+    # "any" address contains everything
+    if p1.is_any:
         return True
-    if isinstance(a2, Address) and not isinstance(a2, AddressRange) and a2.is_any():
+    if p2.is_any:
         return False
 
-    try:
-        r1 = _addr_range(a1)
-        r2 = _addr_range(a2)
-    except (ValueError, TypeError):
-        return False
-
-    if r1 is None or r2 is None:
+    if p1.range is None or p2.range is None:
         return False
-
-    # Addresses of different families never contain one another. Comparing an
-    # IPv4Address with an IPv6Address raises TypeError ("not of the same
-    # version"), which would otherwise abort the whole shadowing pass.
-    if r1[0].version != r2[0].version:
-        return False
-
-    return r1[0] <= r2[0] and r2[1] <= r1[1]
+    # Addresses of different families never contain one another.
+    return p1.range.contains(p2.range)
 
 
 def _addr_range(obj) -> tuple | None:
     """Return (first_addr, last_addr) for an address object."""
-    if isinstance(obj, AddressRange):
-        start = obj.get_start_address()
-        end = obj.get_end_address()
-        if start and end:
-            return (_ipa.ip_address(start), _ipa.ip_address(end))
-        return None
-
-    if isinstance(obj, (Network, NetworkIPv6)):
-        addr_s = obj.get_address()
-        mask_s = obj.get_netmask()
-        if addr_s and mask_s:
-            try:
-                net = _ipa.ip_network(f'{addr_s}/{mask_s}', strict=False)
-                return (net.network_address, net.broadcast_address)
-            except ValueError:
-                return None
-        return None
-
-    # Single host / IPv4 / IPv6 / Interface address
-    if isinstance(obj, Address):
-        addr_s = obj.get_address()
-        if addr_s:
-            addr = _ipa.ip_address(addr_s)
-            return (addr, addr)
-    return None
+    r = parsed_address(obj).range
+    return None if r is None else r.addresses()
 
 
 def _srv_data_val(srv, key: str) -> str:
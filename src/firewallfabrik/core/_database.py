@@ -12,7 +12,6 @@
 
 import contextlib
 import dataclasses
-import io
 import logging
 import pathlib
 import re
@@ -22,7 +21,8 @@ import sqlalchemy
 import sqlalchemy.event
 import sqlalchemy.orm
 
-from . import objects
+from . import _load_cache, objects
+from ._dynamic_groups import DynamicGroupIndex
 from ._xml_reader import XmlReader
 from ._yaml_reader import YamlReader
 from ._yaml_writer import YamlWriter
@@ -30,13 +30,78 @@ from ._yaml_writer import YamlWriter
 logger = logging.getLogger(__name__)
 
 
+# Undo/redo journal, after SQLite's own recipe
+# (https://www.sqlite.org/undoredo.html): a TEMP trigger on every table
+# writes two SQL statements per changed row into a TEMP table, one that
+# reverts the change and one that repeats it. save_state() moves what
+# has accumulated since the last state into the new history entry, so an
+# entry holds the rows an edit touched, not a copy of the database, and
+# undo/redo cost follows the size of the edit. TEMP objects are not part
+# of the main database, so serialize() and the saved file never see them.
+_JOURNAL = 'fwf_journal'
+
+
+def _journal_triggers(table):
+    """Return the CREATE TEMP TRIGGER statements that journal *table*.
+
+    Rows are addressed by rowid, which every table here has (none is
+    declared WITHOUT ROWID) and which, unlike the primary key, also
+    identifies a row of the association tables.
+    """
+    name = table.name
+    columns = [column.name for column in table.columns]
+    column_list = ','.join(f'"{column}"' for column in columns)
+
+    def values(ref):
+        return " || ',' || ".join(f'quote({ref}."{column}")' for column in columns)
+
+    def assignments(ref):
+        return " || ',' || ".join(
+            f'\'"{column}"=\' || quote({ref}."{column}")' for column in columns
+        )
+
+    def insert(ref):
+        return (
+            f'\'INSERT INTO "{name}"(rowid,{column_list}) VALUES(\' || {ref}.rowid'
+            f" || ',' || {values(ref)} || ')'"
+        )
+
+    def delete(ref):
+        return f'\'DELETE FROM "{name}" WHERE rowid=\' || {ref}.rowid'
+
+    def update(ref, where):
+        return (
+            f'\'UPDATE "{name}" SET \' || {assignments(ref)}'
+            f" || ' WHERE rowid=' || {where}.rowid"
+        )
+
+    def trigger(event, undo, redo):
+        return (
+            f'CREATE TEMP TRIGGER IF NOT EXISTS "{_JOURNAL}_{name}_{event.lower()}" '
+            f'AFTER {event} ON main."{name}" BEGIN '
+            f'INSERT INTO {_JOURNAL}(undo, redo) VALUES({undo}, {redo}); END'
+        )
+
+    return [
+        trigger('INSERT', delete('new'), insert('new')),
+        trigger('UPDATE', update('old', 'new'), update('new', 'old')),
+        trigger('DELETE', insert('old'), delete('old')),
+    ]
+
+
 @dataclasses.dataclass(frozen=True, slots=True)
 class HistoryEntry:
-    """Internal: snapshot + metadata."""
+    """Internal: journal delta + metadata.
+
+    *undo* takes the database from this entry to the one before it,
+    *redo* from the one before it to this one. Both are empty for the
+    first entry, the base every other entry builds on.
+    """
 
-    state: bytes
     timestamp: float
     description: str = ''
+    undo: tuple[str, ...] = ()
+    redo: tuple[str, ...] = ()
 
 
 @dataclasses.dataclass(frozen=True, slots=True)
@@ -139,9 +204,18 @@ def duplicate_object_name(exc, library_names=None, parent_names=None):
 
 
 class DatabaseManager:
+    # Oldest entries beyond this are dropped; the oldest one left becomes
+    # the new base state.
+    HISTORY_LIMIT = 1000
+
     def __init__(self, connection_string='sqlite:///:memory:'):
         self.engine = sqlalchemy.create_engine(connection_string, echo=False)
-        self._session_factory = sqlalchemy.orm.sessionmaker(self.engine)
+        # Sessions carry their manager, so that whatever reads through one
+        # can find the caches kept per database state.
+        self._session_factory = sqlalchemy.orm.sessionmaker(
+            self.engine, info={'database_manager': self}
+        )
+        self._dynamic_group_index = None
         self._history = []
         self._current_index = -1
         self._saved_index = -1
@@ -191,11 +265,23 @@ class DatabaseManager:
                 self.save_state(description)
         except Exception:
             session.rollback()
+            # It may have been built from the changes just rolled back.
+            self._dynamic_group_index = None
             raise
         finally:
             sqlalchemy.event.remove(session, 'do_orm_execute', _track_dml)
             session.close()
 
+    @contextlib.contextmanager
+    def read_session(self):
+        """Create a database session for reading only, e.g. for compiling. Nothing is flushed on the way, and the transaction is rolled back when the contextmanager exits, so whatever the caller added or changed (transient objects included) is discarded and never reaches the undo stack."""
+        session = self._session_factory(autoflush=False)
+        try:
+            yield session
+        finally:
+            session.rollback()
+            session.close()
+
     def create_session(self):
         """Create a new database session for manual use. Remember to call save_state() afterwards if any objects were added, changed, or updated."""
         return self._session_factory()
@@ -203,13 +289,24 @@ class DatabaseManager:
     def save_state(self, description=''):
         """Save the current state of the database to the history."""
         logger.debug('Saving database state to history')
+        self._dynamic_group_index = None
         del self._history[self._current_index + 1 :]
+        undo, redo = self._take_journal()
+        if not self._history:
+            # The base state: there is nothing before it to go back to.
+            undo = redo = ()
         entry = HistoryEntry(
-            state=self._dump_db(),
             timestamp=time.time(),
             description=description,
+            undo=undo,
+            redo=redo,
         )
         self._history.append(entry)
+        excess = len(self._history) - self.HISTORY_LIMIT
+        if excess > 0:
+            del self._history[:excess]
+            self._history[0] = dataclasses.replace(self._history[0], undo=(), redo=())
+            self._saved_index = max(self._saved_index - excess, -1)
         self._current_index = len(self._history) - 1
         logger.debug(
             'History has %d entries, current index %d',
@@ -239,6 +336,7 @@ class DatabaseManager:
         logger.debug('Clearing all saved database states')
         self._history.clear()
         self._current_index = -1
+        self._take_journal()
         self._notify_history_changed()
 
     def jump_to(self, index):
@@ -256,8 +354,18 @@ class DatabaseManager:
         if index == self._current_index:
             logger.info('Already at history index %d', index)
             return False
+        # Changes not saved to the history yet are reverted first: no
+        # history state contains them.
+        statements, _redo = self._take_journal()
+        if index < self._current_index:
+            for i in range(self._current_index, index, -1):
+                statements += self._history[i].undo
+        else:
+            for i in range(self._current_index + 1, index + 1):
+                statements += self._history[i].redo
         self._current_index = index
-        self._restore_db(self._history[self._current_index].state)
+        self._apply_journal(statements)
+        self._dynamic_group_index = None
         logger.debug('Jumped to history index %d', self._current_index)
         self._notify_history_changed()
         return True
@@ -278,17 +386,43 @@ class DatabaseManager:
         ]
         return snapshots
 
-    def load(self, path):
+    def dynamic_group_index(self, session):
+        """Return the DynamicGroup index of the current database state.
+
+        Built from *session* on first use; any change to the database
+        drops it.
+        """
+        if self._dynamic_group_index is None:
+            self._dynamic_group_index = DynamicGroupIndex(session)
+        return self._dynamic_group_index
+
+    def load(self, path, cache=False):
+        """Load the database file *path* and return the path to save it to.
+
+        With *cache*, the loaded database is restored from ``<path>.cache``
+        when that was made from the same file, and written there after a
+        full parse otherwise (see `_load_cache`).
+        """
         path = pathlib.Path(path)
         logger.debug('Loading database from %s', path)
-        match path.suffix:
-            case '.fwb':
+        if path.suffix not in ('.fwb', '.fwf'):
+            raise ValueError(f'Unsupported file extension: {path}')
+        key = _load_cache.cache_key(path) if cache else None
+        cached = _load_cache.read_cache(path, key) if cache else None
+        if cached is not None and cached[0].startswith(b'SQLite format 3\0'):
+            logger.debug('Restoring database from %s', _load_cache.cache_path(path))
+            image, ref_index = cached
+            self.deserialize(image)
+            self.ref_index = ref_index
+        else:
+            if path.suffix == '.fwb':
                 self._load_xml(path, exclude_libraries={'Deleted Objects'})
-                path = path.with_suffix('.fwf')
-            case '.fwf':
+            else:
                 self._load_yaml(path)
-            case _:
-                raise ValueError(f'Unsupported file extension: {path}')
+            if cache:
+                _load_cache.write_cache(path, key, self.serialize(), self.ref_index)
+        if path.suffix == '.fwb':
+            path = path.with_suffix('.fwf')
         self.save_state('Load file')
         self._saved_index = self._current_index
         return path
@@ -303,6 +437,30 @@ class DatabaseManager:
                 raise ValueError(f'Unsupported file extension: {path}')
         self._saved_index = self._current_index
 
+    def serialize(self):
+        """Return the current database as an SQLite image (the bytes of an on-disk database file)."""
+        connection = self.engine.raw_connection()
+        try:
+            return connection.dbapi_connection.serialize()
+        finally:
+            connection.close()
+
+    def deserialize(self, image):
+        """Replace the database with an SQLite image returned by serialize(). The undo history is cleared, since none of its states belong to the new database."""
+        # SQLite stops firing TEMP triggers on tables swapped in underneath
+        # them (and crashes dropping them afterwards), so the journal
+        # triggers go first and come back on the new tables.
+        self._drop_journal_triggers()
+        connection = self.engine.raw_connection()
+        try:
+            connection.dbapi_connection.deserialize(image)
+        finally:
+            connection.close()
+        self._create_journal_triggers()
+        self._dynamic_group_index = None
+        self.clear_states()
+        self._saved_index = self._current_index
+
     def _import(self, data):
         self.ref_index = data.ref_index
         # Build UUID-hex-to-name maps so that IntegrityError messages can
@@ -329,9 +487,23 @@ class DatabaseManager:
                 parts.append(lib.name)
                 parts.reverse()
                 self._parent_names[str(dev.id).replace('-', '')] = ' > '.join(parts)
+        # Loading into an empty history: the bulk insert becomes the base
+        # state, so journaling every row of it would be thrown away.
+        journal = bool(self._history)
+        if not journal:
+            self._drop_journal_triggers()
+        try:
+            self._import_rows(data)
+        finally:
+            if not journal:
+                self._create_journal_triggers()
+
+    def _import_rows(self, data):
+        # Plain executemany inserts instead of session.add(): the unit of
+        # work would track, sort and flush every object one by one.
         with self.session() as session:
-            session.add(data.database)
-            session.flush()
+            for table, rows in data.table_rows().items():
+                session.execute(table.insert(), rows)
             if data.memberships:
                 session.execute(
                     objects.group_membership.insert(),
@@ -363,18 +535,74 @@ class DatabaseManager:
         result = reader.parse(input_path)
         self._import(result)
 
-    def _dump_db(self):
-        backup = io.BytesIO()
-        for line in self.engine.raw_connection().iterdump():
-            backup.write(f'{line}\n'.encode())
-        return backup.getvalue()
+    def _create_journal_triggers(self):
+        connection = self.engine.raw_connection()
+        try:
+            connection.execute(
+                f'CREATE TEMP TABLE IF NOT EXISTS {_JOURNAL} '
+                '(seq INTEGER PRIMARY KEY, undo TEXT NOT NULL, redo TEXT NOT NULL)'
+            )
+            for table in objects.Base.metadata.sorted_tables:
+                for statement in _journal_triggers(table):
+                    connection.execute(statement)
+            connection.commit()
+        finally:
+            connection.close()
+
+    def _drop_journal_triggers(self):
+        connection = self.engine.raw_connection()
+        try:
+            for table in objects.Base.metadata.sorted_tables:
+                for event in ('insert', 'update', 'delete'):
+                    connection.execute(
+                        f'DROP TRIGGER IF EXISTS temp."{_JOURNAL}_{table.name}_{event}"'
+                    )
+            connection.commit()
+        finally:
+            connection.close()
+
+    def _take_journal(self):
+        """Empty the journal and return its ``(undo, redo)`` statements.
 
-    def _restore_db(self, state):
-        self._reset_db(False)
+        *undo* is in the order that reverts the changes (newest first),
+        *redo* in the order that repeats them.
+        """
+        connection = self.engine.raw_connection()
+        try:
+            rows = connection.execute(
+                f'SELECT undo, redo FROM temp.{_JOURNAL} ORDER BY seq'
+            ).fetchall()
+            connection.execute(f'DELETE FROM temp.{_JOURNAL}')
+            connection.commit()
+        finally:
+            connection.close()
+        return (
+            tuple(undo for undo, _redo in reversed(rows)),
+            tuple(redo for _undo, redo in rows),
+        )
+
+    def _apply_journal(self, statements):
+        # Foreign keys are off while replaying: the statements repeat the
+        # row changes of a cascade one by one, and the cascade must not
+        # run a second time. The PRAGMA only takes effect outside a
+        # transaction, hence the commit before it.
         connection = self.engine.raw_connection()
-        connection.execute('PRAGMA foreign_keys = OFF')
-        connection.executescript(state.decode('utf-8'))
-        connection.execute('PRAGMA foreign_keys = ON')
+        try:
+            connection.commit()
+            connection.execute('PRAGMA foreign_keys = OFF')
+            try:
+                for statement in statements:
+                    connection.execute(statement)
+                # The triggers journal the replay as well; it is no edit.
+                connection.execute(f'DELETE FROM temp.{_JOURNAL}')
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            finally:
+                connection.execute('PRAGMA foreign_keys = ON')
+        finally:
+            connection.close()
 
     def _reset_db(self, recreate_schema):
         logger.debug('Resetting database')
@@ -382,3 +610,4 @@ class DatabaseManager:
         if recreate_schema:
             logger.debug('Recreating database schema')
             objects.Base.metadata.create_all(self.engine)
+            self._create_journal_triggers()
@@ -0,0 +1,239 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Which objects a DynamicGroup selects.
+
+A DynamicGroup names its members by type and tag. Evaluating that against
+every address, group and device of the database, once per DynamicGroup and
+once more for every preview the editor draws, costs the size of the
+database each time. `DynamicGroupIndex` reads type, tags, library and
+nesting depth of every eligible object once and keeps an inverted index
+from type and from tag to object IDs, so that a group is resolved with a
+few set operations and only its members are loaded.
+
+The index belongs to a state of the database: `DatabaseManager` keeps one
+and drops it whenever the database changes (a saved edit, undo and redo,
+loading another file). A session without a `DatabaseManager` behind it
+keeps its own for as long as the session lives.
+
+`matches_dynamic_criteria` is the same selection for a single object, and
+the reference the index is held to.
+"""
+
+from __future__ import annotations
+
+import uuid
+from collections import defaultdict
+
+import sqlalchemy
+
+from .objects import Address, Group, Host, Library
+
+# Types eligible for DynamicGroup membership (mirrors fwbuilder's
+# Address::cast / ObjectGroup::cast / Host checks).
+DG_ADDRESS_TYPES = frozenset(
+    {
+        'AddressRange',
+        'AddressTable',
+        'AttachedNetworks',
+        'DNSName',
+        'DynamicGroup',
+        'IPv4',
+        'IPv6',
+        'MultiAddress',
+        'MultiAddressRunTime',
+        'Network',
+        'NetworkIPv6',
+        'PhysAddress',
+    }
+)
+DG_GROUP_TYPES = frozenset({'ObjectGroup'})
+DG_DEVICE_TYPES = frozenset({'Cluster', 'Firewall', 'Host'})
+DG_ELIGIBLE = DG_ADDRESS_TYPES | DG_GROUP_TYPES | DG_DEVICE_TYPES
+
+_DELETED_LIBRARY = 'Deleted Objects'
+
+# The tables eligible objects live in, in the order the members of a
+# group are listed before they are sorted by name.
+_CANDIDATE_CLASSES = (Address, Group, Host)
+
+
+def matches_dynamic_criteria(
+    obj, criteria: list[dict], match_mode: str = 'AND'
+) -> bool:
+    """Return True if *obj* matches the *criteria* under *match_mode*.
+
+    *match_mode*:
+      - ``'AND'`` (default for new groups): every criterion must match.
+      - ``'OR'``: at least one criterion must match. Used for groups
+        imported from fwbuilder ``.fwb`` files, since fwbuilder only
+        supports OR semantics in ``DynamicGroup::isMemberOfGroup()``.
+    """
+    obj_type = getattr(obj, 'type', '')
+    if obj_type not in DG_ELIGIBLE:
+        return False
+
+    # Exclude deleted-objects library.
+    lib = getattr(obj, 'library', None)
+    if lib is None:
+        return False
+    if getattr(lib, 'name', '') == _DELETED_LIBRARY:
+        return False
+
+    # Exclude standard ObjectGroups near the tree root (depth <= 3).
+    if obj_type in DG_GROUP_TYPES:
+        depth = 2
+        parent = getattr(obj, 'parent_group', None)
+        while parent is not None:
+            depth += 1
+            parent = getattr(parent, 'parent_group', None)
+        if depth <= 3:
+            return False
+
+    keywords = getattr(obj, 'keywords', None) or set()
+    active = []
+    for type_val, keyword_val in _active_criteria(criteria):
+        type_match = type_val == 'any' or obj_type == type_val
+        keyword_match = keyword_val == '' or keyword_val in keywords
+        active.append(type_match and keyword_match)
+
+    if not active:
+        return False
+    if match_mode == 'OR':
+        return any(active)
+    return all(active)
+
+
+def _active_criteria(criteria):
+    """Yield ``(type, keyword)`` of the criteria that select something.
+
+    A row with type ``'none'`` or keyword ``','`` is one the user has not
+    filled in yet (fwbuilder's ``DynamicGroup::makeFilter`` returns false
+    for it).
+    """
+    for entry in criteria:
+        type_val = entry.get('type', 'none')
+        keyword_val = entry.get('keyword', ',')
+        if type_val == 'none' or keyword_val == ',':
+            continue
+        yield type_val, keyword_val
+
+
+class DynamicGroupIndex:
+    """Eligible objects of one database state, by type and by tag."""
+
+    def __init__(self, session) -> None:
+        self._eligible: set[uuid.UUID] = set()
+        self._by_type: dict[str, set[uuid.UUID]] = defaultdict(set)
+        self._by_keyword: dict[str, set[uuid.UUID]] = defaultdict(set)
+        # ID -> (table, position in the table), the order of the scan
+        # this replaces, which the sort by name keeps for equal names.
+        self._origin: dict[uuid.UUID, tuple[int, int]] = {}
+
+        deleted = set(
+            session.scalars(
+                sqlalchemy.select(Library.id).where(Library.name == _DELETED_LIBRARY)
+            )
+        )
+        parents = dict(
+            session.execute(sqlalchemy.select(Group.id, Group.parent_group_id)).all()
+        )
+
+        for rank, cls in enumerate(_CANDIDATE_CLASSES):
+            rows = session.execute(
+                sqlalchemy.select(cls.id, cls.type, cls.keywords, cls.library_id)
+            )
+            for position, (obj_id, obj_type, keywords, library_id) in enumerate(rows):
+                if obj_type not in DG_ELIGIBLE:
+                    continue
+                if library_id is None or library_id in deleted:
+                    continue
+                # A standard ObjectGroup near the tree root (depth <= 3,
+                # two levels for the library and the group itself) is
+                # never a member.
+                if obj_type in DG_GROUP_TYPES:
+                    parent = parents.get(obj_id)
+                    if parent is None or parents.get(parent) is None:
+                        continue
+                self._eligible.add(obj_id)
+                self._by_type[obj_type].add(obj_id)
+                for keyword in keywords or ():
+                    self._by_keyword[keyword].add(obj_id)
+                self._origin[obj_id] = (rank, position)
+
+    def member_ids(
+        self, criteria: list[dict], match_mode: str = 'AND'
+    ) -> set[uuid.UUID]:
+        """Return the IDs of the objects *criteria* select under *match_mode*."""
+        selections = [
+            self._select(type_val, keyword_val)
+            for type_val, keyword_val in _active_criteria(criteria)
+        ]
+        if not selections:
+            return set()
+        if match_mode == 'OR':
+            return set().union(*selections)
+        selections.sort(key=len)
+        return selections[0].intersection(*selections[1:])
+
+    def _select(self, type_val: str, keyword_val: str) -> set[uuid.UUID]:
+        by_type = self._eligible if type_val == 'any' else self._by_type.get(type_val)
+        if keyword_val == '':
+            return by_type or set()
+        by_keyword = self._by_keyword.get(keyword_val)
+        if not by_type or not by_keyword:
+            return set()
+        if len(by_keyword) < len(by_type):
+            return by_keyword & by_type
+        return by_type & by_keyword
+
+    def members(
+        self,
+        session,
+        criteria: list[dict],
+        match_mode: str = 'AND',
+        exclude: uuid.UUID | None = None,
+    ) -> list:
+        """Return the objects *criteria* select, sorted by name.
+
+        *exclude* is the DynamicGroup itself, which is never its own
+        member.
+        """
+        ids = self.member_ids(criteria, match_mode)
+        ids.discard(exclude)
+        ids_by_class = defaultdict(list)
+        for obj_id in ids:
+            ids_by_class[_CANDIDATE_CLASSES[self._origin[obj_id][0]]].append(obj_id)
+        result = []
+        for cls, id_list in ids_by_class.items():
+            result.extend(
+                session.scalars(sqlalchemy.select(cls).where(cls.id.in_(id_list)))
+                .unique()
+                .all()
+            )
+        result.sort(key=lambda o: (getattr(o, 'name', ''), self._origin[o.id]))
+        return result
+
+
+def dynamic_group_index(session) -> DynamicGroupIndex:
+    """Return the index for the database state *session* reads.
+
+    Built from *session* on first use and kept by the `DatabaseManager`
+    the session came from, or by the session itself if there is none.
+    """
+    db = session.info.get('database_manager')
+    if db is not None:
+        return db.dynamic_group_index(session)
+    index = session.info.get('fwf_dynamic_group_index')
+    if index is None:
+        index = session.info['fwf_dynamic_group_index'] = DynamicGroupIndex(session)
+    return index
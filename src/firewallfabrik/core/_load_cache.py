@@ -0,0 +1,115 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""A ready-made copy of a loaded database, kept next to the file it came from.
+
+Before a CLI run can compile anything it parses the whole `.fwf` (or
+`.fwb`), builds an object per row and inserts them all; on a large file
+that takes longer than the compile. `DatabaseManager.load` with
+``cache=True`` keeps the result in ``<file>.cache``: the SQLite image
+`DatabaseManager.serialize` returns, with the tree-path index next to it.
+The next load with ``cache=True`` restores the image instead of parsing.
+
+The cache is only taken when it was made from a file with the same
+content, by the same firewallfabrik version and SQLite library, for the
+same schema; anything else, and any cache that cannot be read, means a
+full parse, after which the cache is written anew. Writing it is best
+effort: a directory the user may not write to just means no cache.
+
+File layout: a magic line, one line of JSON with the key and the
+tree-path index, then the image up to the end of the file.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import uuid
+from pathlib import Path
+
+import sqlalchemy
+import sqlalchemy.schema
+
+import firewallfabrik
+
+from . import objects
+
+_MAGIC = b'FWFCACHE1\n'
+
+
+def cache_path(path: Path) -> Path:
+    """Return where the cache of the database file *path* lives."""
+    return path.with_name(path.name + '.cache')
+
+
+def cache_key(path: Path) -> str:
+    """Return what a cache of *path* must have been made from to be taken."""
+    digest = hashlib.sha256()
+    with path.open('rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    schema = hashlib.sha256()
+    dialect = sqlalchemy.create_engine('sqlite://').dialect
+    for table in objects.Base.metadata.sorted_tables:
+        schema.update(
+            str(sqlalchemy.schema.CreateTable(table).compile(dialect=dialect)).encode()
+        )
+    return (
+        f'{digest.hexdigest()}:{firewallfabrik.__version__}:'
+        f'{sqlite3.sqlite_version}:{schema.hexdigest()}'
+    )
+
+
+def read_cache(path: Path, key: str) -> tuple[bytes, dict] | None:
+    """Return ``(image, ref_index)`` from the cache of *path*, if it fits *key*."""
+    try:
+        with cache_path(path).open('rb') as f:
+            if f.readline() != _MAGIC:
+                return None
+            header = json.loads(f.readline())
+            if header.get('key') != key:
+                return None
+            ref_index = {
+                name: uuid.UUID(value) for name, value in header['ref_index'].items()
+            }
+            return f.read(), ref_index
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def write_cache(path: Path, key: str, image: bytes, ref_index: dict) -> None:
+    """Keep *image* and *ref_index* as the cache of *path*, if it can be written."""
+    target = cache_path(path)
+    header = json.dumps(
+        {
+            'key': key,
+            'ref_index': {name: str(value) for name, value in ref_index.items()},
+        }
+    )
+    # Written next to the cache and renamed over it, so that a run
+    # reading it meanwhile never sees half of it.
+    with contextlib.suppress(OSError):
+        fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=f'.{target.name}.')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(_MAGIC)
+                f.write(header.encode())
+                f.write(b'\n')
+                f.write(image)
+            Path(tmp).replace(target)
+        except OSError:
+            Path(tmp).unlink(missing_ok=True)
+            raise
@@ -18,6 +18,10 @@ and YAML writer.
 """
 
 import dataclasses
+import functools
+
+import sqlalchemy
+import sqlalchemy.orm
 
 from . import objects
 
@@ -31,6 +35,135 @@ class ParseResult:
     rule_element_rows: list[dict]
     ref_index: dict = dataclasses.field(default_factory=dict)
 
+    def table_rows(self):
+        """Return the rows of the object graph, per table, in insert order.
+
+        The result maps each mapped table, in dependency order, to a list
+        of plain column dicts that Core ``insert()`` can take as one
+        executemany: every column is present, unset ones hold the column
+        default, foreign keys are taken from the relationships, and a row
+        referring to a row of its own table comes after it.  The objects
+        are the ones ``session.add(database)`` would cascade to.
+        """
+        root = sqlalchemy.inspect(self.database)
+        states = [root]
+        states.extend(
+            state
+            for _obj, _mapper, state, _dict in root.mapper.cascade_iterator(
+                'save-update', root
+            )
+        )
+
+        rows = {}
+        for state in states:
+            values = state.dict
+            row = {}
+            for name, key, default, keeps_none in _column_plan(state.mapper):
+                value = values.get(key)
+                if value is None and not (keeps_none and key in values):
+                    # Left out by the unit of work, so the default applies.
+                    value = default() if callable(default) else default
+                row[name] = value
+            rows[state] = row
+
+        # Only now, so that a key made from its column default is there.
+        for state, row in rows.items():
+            values = state.dict
+            for key, pairs in _reference_plan(state.mapper):
+                target = values.get(key)
+                if target is None:
+                    continue
+                target_row = rows[sqlalchemy.inspect(target)]
+                for local, remote in pairs:
+                    row[local] = target_row[remote]
+
+        by_table = {table: [] for table in _mapped_tables()}
+        for state, row in rows.items():
+            by_table[state.mapper.local_table].append(row)
+        return {
+            table: _parents_first(table, table_rows)
+            for table, table_rows in by_table.items()
+            if table_rows
+        }
+
+
+@functools.cache
+def _mapped_tables():
+    mapped = {mapper.local_table for mapper in objects.Base.registry.mappers}
+    return [table for table in objects.Base.metadata.sorted_tables if table in mapped]
+
+
+@functools.cache
+def _column_plan(mapper):
+    """Return how to fill each column of *mapper* the way a flush does.
+
+    One ``(column name, attribute key, default, keeps_none)`` per column;
+    *keeps_none* marks types such as JSON that store an explicit None
+    as a value of their own instead of SQL NULL.
+    """
+    plan = []
+    for column in mapper.local_table.columns:
+        key = mapper.get_property_by_column(column).key
+        keeps_none = column.type.should_evaluate_none
+        if column is mapper.polymorphic_on:
+            default = mapper.polymorphic_identity
+        elif column.default is None:
+            default = sqlalchemy.null() if keeps_none else None
+        elif column.default.is_callable:
+            default = functools.partial(column.default.arg, None)
+        else:
+            default = column.default.arg
+        plan.append((column.name, key, default, keeps_none))
+    return tuple(plan)
+
+
+@functools.cache
+def _reference_plan(mapper):
+    """Return ``(relationship key, ((local, remote), ...))`` per many-to-one."""
+    return tuple(
+        (
+            relationship.key,
+            tuple(
+                (local.name, remote.name)
+                for local, remote in relationship.local_remote_pairs
+            ),
+        )
+        for relationship in mapper.relationships
+        if relationship.direction is sqlalchemy.orm.MANYTOONE
+    )
+
+
+def _parents_first(table, rows):
+    """Order *rows* so that each comes after the row of *table* it refers to.
+
+    Level by level, top level first, like the flush of a self-referential
+    mapper does.
+    """
+    own = [
+        (fk.parent.name, fk.column.name)
+        for fk in table.foreign_keys
+        if fk.column.table is table
+    ]
+    if not own:
+        return rows
+    column, key = own[0]
+    parents = {row[key]: row[column] for row in rows}
+    depths = {}
+
+    def depth(row_key):
+        chain = []
+        while row_key in parents and row_key not in depths:
+            chain.append(row_key)
+            depths[row_key] = 0  # Placeholder, so that a cycle ends here.
+            row_key = parents[row_key]
+        level = depths.get(row_key, -1)
+        for row_key in reversed(chain):
+            level += 1
+            depths[row_key] = level
+        return depths[chain[0]] if chain else level
+
+    return sorted(rows, key=lambda row: depth(row[key]))
+
 
 ADDRESS_CLASSES = {
     'IPv4': objects.IPv4,
@@ -34,6 +34,10 @@ from ._util import (
 
 logger = logging.getLogger(__name__)
 
+# libyaml parses a .fwf several times faster than the pure-Python loader;
+# PyYAML built without it has only the latter.
+_SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 # Reverse enum maps: yaml key -> (orm column, enum class)
 _ENUM_REVERSE = {
     'PolicyRule': {
@@ -93,7 +97,7 @@ class YamlReader:
 
         # Phase 1: Load YAML file
         with pathlib.Path.open(input_path, encoding='utf-8') as f:
-            db_data = yaml.safe_load(f)
+            db_data = yaml.load(f, Loader=_SafeLoader)  # nosec B506
 
         # Phase 2: Create objects
         db = objects.FWObjectDatabase()
@@ -27,9 +27,40 @@ logger = logging.getLogger(__name__)
 
 
 class _QuotedValueDumper(yaml.SafeDumper):
+    """Dumper for .fwf files: every string value quoted, every sequence indented.
+
+    libyaml's emitter always writes a sequence inside a mapping without
+    indenting it and folds long strings by column, so the C dumper cannot
+    write this layout; the pure-Python emitter is kept.  What made it slow
+    is that it analyses every scalar character by character and resolves
+    its implicit tag, and a .fwf repeats the same keys and values tens of
+    thousands of times.  Both depend on the string alone, so each distinct
+    string is analysed and resolved once per file.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._analyses = {}
+        self._resolved = {}
+
     def increase_indent(self, flow=False, indentless=False):
         return super().increase_indent(flow, False)
 
+    def analyze_scalar(self, scalar):
+        analysis = self._analyses.get(scalar)
+        if analysis is None:
+            analysis = self._analyses[scalar] = super().analyze_scalar(scalar)
+        return analysis
+
+    def resolve(self, kind, value, implicit):
+        if kind is not yaml.ScalarNode:
+            return super().resolve(kind, value, implicit)
+        key = (value, implicit)
+        tag = self._resolved.get(key)
+        if tag is None:
+            tag = self._resolved[key] = super().resolve(kind, value, implicit)
+        return tag
+
 
 def _quoted_str(dumper, data):
     return dumper.represent_scalar('tag:yaml.org,2002:str', data, style="'")
@@ -23,6 +23,7 @@ from pathlib import Path
 from typing import TYPE_CHECKING, ClassVar
 
 from firewallfabrik.compiler._base import BaseCompiler
+from firewallfabrik.compiler._dns import DNSCache, compile_time_dns_names
 from firewallfabrik.core._options import option_is_true
 from firewallfabrik.core.objects import (
     Cluster,
@@ -97,6 +98,9 @@ class CompilerDriver(BaseCompiler):
         self.file_name_setting: str = ''
         self.prepend_cluster_name: bool = False
         self.source_dir: str = '.'
+        # Shared with every compiler of the run; replace it to change the
+        # resolver, the timeout or the file answers are kept in.
+        self.dns_cache: DNSCache = DNSCache()
 
         # Output
         self.file_names: dict[str, str] = {}
@@ -162,6 +166,18 @@ class CompilerDriver(BaseCompiler):
         """Platform-specific compilation. Override in subclasses."""
         return ''
 
+    def resolve_dns_names(self, session, fw, address_families) -> None:
+        """Resolve the compile-time DNS Names of *fw* before compiling.
+
+        All of them at once, in every address family that is compiled,
+        so that the compilers, which meet them one rule at a time, find
+        the answers waiting.
+        """
+        names = compile_time_dns_names(session, fw.id)
+        self.dns_cache.resolve_all(
+            (name, family) for name in names for family in address_families
+        )
+
     def warn_about_missing_top_rule_sets(self, fw, policies, nats) -> None:
         """Say when the firewall has rule sets but none of them is the top one.
 
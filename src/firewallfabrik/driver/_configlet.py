@@ -16,6 +16,11 @@ Supports:
 - {{$var}} — variable substitution
 - {{if var}}...{{endif}} — conditional blocks
 - ## comment lines — removed before expansion
+
+A configlet file is read and parsed once per process and kept until the
+file changes; `Configlet.expand` then walks the parsed blocks in a single
+pass, so the cost of expanding grows with the size of the result and not
+with the number of variables times the size of their values.
 """
 
 from __future__ import annotations
@@ -24,6 +29,15 @@ import importlib.resources
 import re
 from pathlib import Path
 
+_TOKEN_RE = re.compile(r'\{\{\$([^}]*)\}\}|\{\{if\s+([^}]+)\}\}|\{\{endif\}\}')
+
+# (resolved path, mtime) -> the lines of the file.  A configlet edited
+# while the GUI is running has a new mtime and is read again.
+_sources: dict[tuple[str, int], tuple[str, ...]] = {}
+
+# (resolved path, mtime, comment prefix or None) -> parsed template.
+_templates: dict[tuple[str, int, str | None], list] = {}
+
 
 def _get_package_resources_dir() -> Path:
     """Return the path to the package's resources directory."""
@@ -31,6 +45,74 @@ def _get_package_resources_dir() -> Path:
     return Path(str(ref))
 
 
+def _mtime(path: Path) -> int | None:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+class _If:
+    """A ``{{if var}}...{{endif}}`` block and the nodes it holds."""
+
+    __slots__ = ('body', 'name', 'token')
+
+    def __init__(self, name: str, token: str) -> None:
+        self.name = name
+        self.token = token
+        self.body: list = []
+
+
+def _parse(text: str) -> list:
+    """Parse configlet text into a list of nodes.
+
+    A node is a literal string, a ``('var', name)`` tuple or an `_If`.  An
+    ``{{if}}`` pairs with the nearest ``{{endif}}`` after it that no inner
+    ``{{if}}`` claims, which is the innermost-first pairing the engine has
+    always used.  A marker left without its partner stays in the output as
+    it was written.
+    """
+    root: list = []
+    stack: list[_If] = []
+    nodes = root
+    pos = 0
+    for m in _TOKEN_RE.finditer(text):
+        if m.start() > pos:
+            nodes.append(text[pos : m.start()])
+        pos = m.end()
+        var_name, if_name = m.group(1), m.group(2)
+        if var_name is not None:
+            nodes.append(('var', var_name))
+        elif if_name is not None:
+            block = _If(if_name.strip(), m.group(0))
+            nodes.append(block)
+            stack.append(block)
+            nodes = block.body
+        elif stack:
+            stack.pop()
+            nodes = stack[-1].body if stack else root
+        else:
+            nodes.append(m.group(0))
+    if pos < len(text):
+        nodes.append(text[pos:])
+
+    # An {{if}} that never found its {{endif}} is text again, and what it
+    # held moves up into the block around it.
+    for block in reversed(stack):
+        _unwrap(root, block)
+    return root
+
+
+def _unwrap(nodes: list, block: _If) -> bool:
+    for i, node in enumerate(nodes):
+        if node is block:
+            nodes[i : i + 1] = [block.token, *block.body]
+            return True
+        if isinstance(node, _If) and _unwrap(node.body, block):
+            return True
+    return False
+
+
 class Configlet:
     """Template engine for configlet files."""
 
@@ -47,7 +129,8 @@ class Configlet:
         self._name = filename
         self._prefix = prefix
         self._file_path = ''
-        self._code: list[str] = []
+        self._key: tuple[str, int] | None = None
+        self._code: tuple[str, ...] = ()
         self._vars: dict[str, str] = {}
         self._remove_comments = True
         self._comment_str = '##'
@@ -58,31 +141,46 @@ class Configlet:
 
     def _reload(self, prefix: str, filename: str) -> bool:
         self._prefix = prefix
-        self._code = []
+        self._code = ()
+        self._key = None
 
-        file_path = self._get_configlet_path(prefix, filename)
+        file_path, mtime = self._get_configlet_path(prefix, filename)
         self._file_path = str(file_path)
 
-        if not file_path.exists():
+        if mtime is None:
             return False
 
-        text = file_path.read_text(encoding='utf-8', errors='replace')
-        self._code = text.splitlines()
+        key = (self._file_path, mtime)
+        code = _sources.get(key)
+        if code is None:
+            text = file_path.read_text(encoding='utf-8', errors='replace')
+            code = _sources[key] = tuple(text.splitlines())
+        self._key = key
+        self._code = code
         return True
 
-    def _get_configlet_path(self, prefix: str, filename: str) -> Path:
+    def _get_configlet_path(
+        self, prefix: str, filename: str
+    ) -> tuple[Path, int | None]:
+        """Return where the configlet is and its mtime, None if it is missing.
+
+        One ``stat`` per candidate both tells whether the file is there and
+        keys the cache.
+        """
         p = Path(filename)
         if p.is_absolute():
-            return p
+            return p, _mtime(p)
 
         # Check home directory first (user overrides)
         home = Path.home()
         user_path = home / 'firewallfabrik' / 'configlets' / prefix / filename
-        if user_path.exists():
-            return user_path
+        mtime = _mtime(user_path)
+        if mtime is not None:
+            return user_path, mtime
 
         # Package resources
-        return _get_package_resources_dir() / 'configlets' / prefix / filename
+        path = _get_package_resources_dir() / 'configlets' / prefix / filename
+        return path, _mtime(path)
 
     def clear(self) -> None:
         self._vars.clear()
@@ -106,43 +204,9 @@ class Configlet:
         self._collapse_empty_strings = flag
 
     def expand(self) -> str:
-        # Remove comment lines
-        if self._remove_comments:
-            lines = [
-                line for line in self._code if not line.startswith(self._comment_str)
-            ]
-        else:
-            lines = list(self._code)
-
-        all_code = '\n'.join(lines)
-
-        # Substitute {{$var}}
-        var_re = re.compile(r'\{\{\$([^}]*)\}\}')
-        counter = 0
-        while counter < 1000:
-            m = var_re.search(all_code)
-            if not m:
-                break
-            var_name = m.group(1)
-            if var_name in self._vars:
-                all_code = all_code.replace(
-                    f'{{{{${var_name}}}}}', self._vars[var_name]
-                )
-            else:
-                # Replace {{$var}} with {{var}} for debugging
-                all_code = all_code.replace(
-                    f'{{{{${var_name}}}}}', f'{{{{{var_name}}}}}'
-                )
-            counter += 1
-
-        # Process {{if var}}...{{endif}}
-        counter = 0
-        while counter < 1000:
-            result = self._process_if(all_code)
-            if result is None:
-                break
-            all_code = result
-            counter += 1
+        out: list[str] = []
+        self._render(self._template(), out)
+        all_code = ''.join(out)
 
         # Add debug markers
         if self._debugging:
@@ -157,54 +221,51 @@ class Configlet:
 
         return all_code
 
-    def _process_if(self, stream: str) -> str | None:
-        """Process one {{if var}}...{{endif}} block (innermost first)."""
-        if_re = re.compile(r'\{\{if\s+([^}]+)\}\}')
-        endif_re = re.compile(r'\{\{endif\}\}')
-
-        if_matches = list(if_re.finditer(stream))
-        if not if_matches:
-            return None
-
-        # Find innermost if (one whose body contains no other if)
-        for if_match in reversed(if_matches):
-            if_end = if_match.end()
-            var_name = if_match.group(1).strip()
-
-            # Find matching endif
-            endif_match = endif_re.search(stream, if_end)
-            if endif_match is None:
-                continue
-
-            # Check if there's another if between this if and endif
-            nested_if = if_re.search(stream, if_end)
-            if nested_if and nested_if.start() < endif_match.start():
-                continue  # Not innermost
-
-            if_start = if_match.start()
-            endif_end = endif_match.end()
-            body = stream[if_end : endif_match.start()]
-
-            # For inline if/endif on a single line, strip surrounding
-            # whitespace so that "{{if v}} cmd {{endif}}" expands to
-            # "cmd" without extra leading/trailing spaces.
-            if '\n' not in body:
-                body = body.strip()
-
-            # Evaluate condition
-            replacement = ''
-            if var_name in self._vars:
-                try:
-                    val = int(self._vars[var_name])
-                    if val:
-                        replacement = body
-                except ValueError:
-                    if self._vars[var_name]:
-                        replacement = body
-
-            return stream[:if_start] + replacement + stream[endif_end:]
-
-        return None
+    def _template(self) -> list:
+        """Return the parsed configlet, parsing it on first use."""
+        comment_str = self._comment_str if self._remove_comments else None
+        key = (*self._key, comment_str) if self._key else None
+        template = _templates.get(key) if key else None
+        if template is None:
+            # Remove comment lines
+            if comment_str is not None:
+                lines = [
+                    line for line in self._code if not line.startswith(comment_str)
+                ]
+            else:
+                lines = self._code
+            template = _parse('\n'.join(lines))
+            if key:
+                _templates[key] = template
+        return template
+
+    def _render(self, nodes: list, out: list[str]) -> None:
+        for node in nodes:
+            if isinstance(node, str):
+                out.append(node)
+            elif isinstance(node, tuple):
+                name = node[1]
+                # An unknown {{$var}} is left as {{var}} for debugging
+                value = self._vars.get(name)
+                out.append(value if value is not None else f'{{{{{name}}}}}')
+            elif self._is_true(node.name):
+                body: list[str] = []
+                self._render(node.body, body)
+                text = ''.join(body)
+                # For inline if/endif on a single line, strip surrounding
+                # whitespace so that "{{if v}} cmd {{endif}}" expands to
+                # "cmd" without extra leading/trailing spaces.
+                if '\n' not in text:
+                    text = text.strip()
+                out.append(text)
+
+    def _is_true(self, var_name: str) -> bool:
+        if var_name not in self._vars:
+            return False
+        try:
+            return bool(int(self._vars[var_name]))
+        except ValueError:
+            return bool(self._vars[var_name])
 
     @staticmethod
     def set_debugging(flag: bool) -> None:
@@ -16,15 +16,26 @@ Follows the same resource resolution pattern as ``Configlet``:
 check ``~/firewallfabrik/templates/<platform>/`` for user overrides
 first, fall back to the package's ``resources/templates/<platform>/``
 directory.
+
+One environment is kept per platform and search path for the life of the
+process, so a run that compiles many firewalls, or a compile server,
+compiles ``script.sh.j2`` once instead of once per firewall.  Jinja2
+still reloads a template whose file has changed.  The compiled code is
+also kept on disk, so the next process skips the compile too.
 """
 
 from __future__ import annotations
 
 import importlib.resources
+import threading
+from collections.abc import Iterator
 from pathlib import Path
 
 import jinja2
 
+_environments: dict[tuple[str, ...], jinja2.Environment] = {}
+_lock = threading.Lock()
+
 
 def _get_package_resources_dir() -> Path:
     """Return the path to the package's resources directory."""
@@ -32,6 +43,39 @@ def _get_package_resources_dir() -> Path:
     return Path(str(ref))
 
 
+def _bytecode_cache() -> jinja2.BytecodeCache | None:
+    """Return the on-disk cache for compiled templates, if one can be had.
+
+    Jinja2 picks a directory of its own under the temp dir that only the
+    current user can write to, and refuses one it cannot trust; the
+    templates are then compiled in memory as before.
+    """
+    try:
+        return jinja2.FileSystemBytecodeCache()
+    except (OSError, RuntimeError):
+        return None
+
+
+def _environment(search_paths: tuple[str, ...]) -> jinja2.Environment:
+    with _lock:
+        env = _environments.get(search_paths)
+        if env is None:
+            # autoescape is intentionally disabled: firewallfabrik renders
+            # shell scripts and iptables/nftables rules, not HTML. HTML
+            # autoescape would corrupt the output by replacing e.g. `&` and
+            # `<` with entities.
+            env = jinja2.Environment(  # nosec B701
+                loader=jinja2.FileSystemLoader(search_paths),
+                undefined=jinja2.StrictUndefined,
+                trim_blocks=True,
+                lstrip_blocks=True,
+                keep_trailing_newline=True,
+                bytecode_cache=_bytecode_cache(),
+            )
+            _environments[search_paths] = env
+        return env
+
+
 class Jinja2Template:
     """Load and render a Jinja2 template by platform and name."""
 
@@ -47,19 +91,17 @@ class Jinja2Template:
         pkg_dir = _get_package_resources_dir() / 'templates' / platform
         search_paths.append(str(pkg_dir))
 
-        loader = jinja2.FileSystemLoader(search_paths)
-        # autoescape is intentionally disabled: firewallfabrik renders shell
-        # scripts and iptables/nftables rules, not HTML. HTML autoescape would
-        # corrupt the output by replacing e.g. `&` and `<` with entities.
-        self._env = jinja2.Environment(  # nosec B701
-            loader=loader,
-            undefined=jinja2.StrictUndefined,
-            trim_blocks=True,
-            lstrip_blocks=True,
-            keep_trailing_newline=True,
-        )
+        self._env = _environment(tuple(search_paths))
         self._template = self._env.get_template(template_name)
 
     def render(self, context: dict) -> str:
         """Render the template with the given context variables."""
         return self._template.render(context)
+
+    def generate(self, context: dict) -> Iterator[str]:
+        """Render the template piece by piece.
+
+        Written straight to a file, the script is never held in memory as
+        a whole next to the parts it is assembled from.
+        """
+        return self._template.generate(context)
@@ -12,6 +12,7 @@
 
 """Compile/install dialog — 2-page wizard using compileinstalldialog_q.ui."""
 
+import json
 import os
 import re
 import shutil
@@ -47,6 +48,10 @@ _PLATFORM_CLI = {
     'nftables': 'fwf-nft',
 }
 
+# Loads the database once and compiles every firewall of a run; see
+# firewallfabrik.cli.fwf_compile_server for the protocol.
+_COMPILE_SERVER = 'fwf-compile-server'
+
 # UserRole offsets for item data stored on selectTable items.
 _R = Qt.ItemDataRole.UserRole
 _R_TREE_PATH = _R  # +0
@@ -133,6 +138,11 @@ class CompileDialog(QDialog):
         self._display_order = []  # fw_ids in original compile queue order
         self._display_pos = 0  # next position to flush to log
         self._max_workers = min(os.cpu_count() or 4, 8)
+        self._server = None  # fwf-compile-server QProcess of the current run
+        self._server_buffer = b''  # partial JSON line read from the server
+        self._server_error = ''  # load error the server reported
+        self._server_failed = False  # server gone, use one process per firewall
+        self._server_jobs = {}  # fw_id -> fw_name, compiled by the server
 
         # Install state (sequential — requires user dialogs)
         self._current_fw_name = ''
@@ -453,6 +463,8 @@ class CompileDialog(QDialog):
         self._output_buffers.clear()
         self._completed_jobs.clear()
         self._active_jobs.clear()
+        self._server_jobs.clear()
+        self._server_failed = False
 
         if self._compile_queue:
             self._compiling = True
@@ -505,9 +517,12 @@ class CompileDialog(QDialog):
         """Kill all running processes and clear the queue."""
         self._compile_queue.clear()
         for process in list(self._active_jobs.values()):
+            if process is self._server:
+                continue
             if process.state() != QProcess.ProcessState.NotRunning:
                 process.kill()
                 process.waitForFinished(3000)
+        self._stop_compile_server(kill=True)
         self._active_jobs.clear()
         self._compiling = False
         self._flush_display_queue()
@@ -554,10 +569,6 @@ class CompileDialog(QDialog):
             if work_item is not None:
                 work_item.setText(1, 'Compiling...')
 
-            # Resolve compiler binary
-            cli_tool = _PLATFORM_CLI[platform]
-            program = compiler_path or shutil.which(cli_tool) or cli_tool
-
             args = []
             if cmdline:
                 args.extend(cmdline.split())
@@ -565,8 +576,6 @@ class CompileDialog(QDialog):
                 [
                     fw_id,
                     '-p',
-                    '-f',
-                    str(self._current_file),
                     '-d',
                     str(self._dest_dir),
                     '-v',
@@ -575,6 +584,23 @@ class CompileDialog(QDialog):
             if output_file:
                 args.extend(['-o', output_file])
 
+            self._output_buffers[fw_id] = []
+
+            # A firewall with a compiler of its own gets a process of its
+            # own; all others go to the compile server, which takes the
+            # same arguments minus -f.
+            if not compiler_path and self._start_compile_server():
+                request = {'id': fw_id, 'platform': platform, 'args': args}
+                self._server_jobs[fw_id] = fw_name
+                self._active_jobs[fw_id] = self._server
+                self._server.write(json.dumps(request).encode('utf-8') + b'\n')
+                continue
+
+            # Resolve compiler binary
+            cli_tool = _PLATFORM_CLI[platform]
+            program = compiler_path or shutil.which(cli_tool) or cli_tool
+            args.extend(['-f', str(self._current_file)])
+
             process = QProcess(self)
             process.setProperty('fw_id', fw_id)
             process.setProperty('fw_name', fw_name)
@@ -583,7 +609,6 @@ class CompileDialog(QDialog):
             process.finished.connect(self._on_job_finished)
 
             self._active_jobs[fw_id] = process
-            self._output_buffers[fw_id] = []
             process.start(program, args)
 
         # Update status labels
@@ -592,7 +617,7 @@ class CompileDialog(QDialog):
         done = self.compFirewallProgress.value()
         if active == 1:
             fw_id = next(iter(self._active_jobs))
-            self.fwMCLabel.setText(self._active_jobs[fw_id].property('fw_name'))
+            self.fwMCLabel.setText(self._work_items[fw_id].text(0))
             self.infoMCLabel.setText(f'Compiling... ({done}/{total})')
         elif active > 1:
             self.fwMCLabel.setText(f'{active} firewalls')
@@ -630,8 +655,13 @@ class CompileDialog(QDialog):
             if buf is not None:
                 buf.extend(text.splitlines())
 
+        self._complete_job(fw_id, fw_name, exit_code, exit_status)
+
+    def _complete_job(self, fw_id, fw_name, exit_code, exit_status):
+        """Record the result of one compilation job and start the next one."""
         # Remove from active jobs
         self._active_jobs.pop(fw_id, None)
+        self._server_jobs.pop(fw_id, None)
 
         # Update sidebar and track result
         output_lines = self._output_buffers.get(fw_id, [])
@@ -676,6 +706,107 @@ class CompileDialog(QDialog):
             # Update labels while waiting for remaining active jobs
             self._fill_compile_slots()
 
+    # ------------------------------------------------------------------
+    # Compile server
+
+    def _start_compile_server(self):
+        """Start ``fwf-compile-server`` for this run unless it is running.
+
+        Returns False when the server is not installed, does not start or
+        has died earlier in this run; the caller then falls back to one
+        compiler process per firewall.
+        """
+        if self._server is not None:
+            return True
+        if self._server_failed:
+            return False
+        program = shutil.which(_COMPILE_SERVER)
+        if program is None:
+            return False
+
+        server = QProcess(self)
+        # stdout carries the protocol; let the server's own stderr through.
+        server.setProcessChannelMode(QProcess.ProcessChannelMode.ForwardedErrorChannel)
+        server.readyReadStandardOutput.connect(self._on_server_output)
+        server.finished.connect(self._on_server_finished)
+        server.start(
+            program,
+            ['-f', str(self._current_file), '-j', str(self._max_workers)],
+        )
+        if not server.waitForStarted(5000):
+            self._server_failed = True
+            server.deleteLater()
+            return False
+        self._server = server
+        self._server_buffer = b''
+        self._server_error = ''
+        return True
+
+    def _stop_compile_server(self, kill=False):
+        """Let the server exit once stdin is closed, or kill it."""
+        server = self._server
+        if server is None:
+            return
+        self._server = None
+        server.readyReadStandardOutput.disconnect(self._on_server_output)
+        server.finished.disconnect(self._on_server_finished)
+        server.finished.connect(server.deleteLater)
+        if kill:
+            server.kill()
+            server.waitForFinished(3000)
+        else:
+            server.closeWriteChannel()
+
+    @Slot()
+    def _on_server_output(self):
+        """Dispatch the JSON lines of the compile server to their jobs."""
+        self._read_server_output(self._server)
+
+    def _read_server_output(self, server):
+        """Dispatch what *server* has written since the last call."""
+        self._server_buffer += server.readAllStandardOutput().data()
+        *lines, self._server_buffer = self._server_buffer.split(b'\n')
+        for raw in lines:
+            try:
+                message = json.loads(raw)
+            except ValueError:
+                continue
+            event = message.get('event')
+            fw_id = message.get('id')
+            if event == 'output':
+                buf = self._output_buffers.get(fw_id)
+                if buf is not None:
+                    buf.append(message.get('line', ''))
+            elif event == 'finished' and fw_id in self._server_jobs:
+                self._complete_job(
+                    fw_id,
+                    self._server_jobs[fw_id],
+                    message.get('exit_code', 1),
+                    QProcess.ExitStatus.NormalExit,
+                )
+            elif event == 'error':
+                self._server_error = message.get('message', '')
+
+    @Slot(int, QProcess.ExitStatus)
+    def _on_server_finished(self, exit_code, exit_status):
+        """Fail every job the server took with it; compile the rest without it."""
+        # Let go of the server before its last output is read: a job that
+        # finished there fills its slot again, and that job must go to a
+        # compiler process of its own, not to the server that has exited.
+        server = self._server
+        self._server = None
+        self._server_failed = True
+        self._read_server_output(server)
+        server.deleteLater()
+        reason = self._server_error or (
+            f'Error: {_COMPILE_SERVER} exited unexpectedly (exit code {exit_code})'
+        )
+        for fw_id, fw_name in list(self._server_jobs.items()):
+            buf = self._output_buffers.get(fw_id)
+            if buf is not None:
+                buf.append(reason)
+            self._complete_job(fw_id, fw_name, 1, exit_status)
+
     def _flush_display_queue(self):
         """Write completed job outputs to the log in the original queue order."""
         while self._display_pos < len(self._display_order):
@@ -756,6 +887,7 @@ class CompileDialog(QDialog):
 
     def _finish_compilation(self):
         self._compiling = False
+        self._stop_compile_server()
 
         total = self.compFirewallProgress.maximum()
         ok = len(self._compiled_fw_ids)
@@ -207,6 +207,16 @@ class IptablesSettingsDialog(QDialog):
             int(opts.get('ulog_nlgroup', _SCHEMA['ulog_nlgroup']['default'])),
         )
 
+        # ipset group threshold spin box
+        self.ipsetGroupThreshold.setValue(
+            int(
+                opts.get(
+                    'ipset_group_threshold',
+                    _SCHEMA['ipset_group_threshold']['default'],
+                ),
+            ),
+        )
+
         # IPv4 before IPv6 combo
         if str(opts.get('ipv4_6_order', '')).lower() == 'ipv6_first':
             self.ipv4before.setCurrentIndex(1)
@@ -265,6 +275,9 @@ class IptablesSettingsDialog(QDialog):
         opts['ulog_qthreshold'] = str(self.qthreshold.value())
         opts['ulog_nlgroup'] = str(self.nlgroup.value())
 
+        # ipset group threshold
+        opts['ipset_group_threshold'] = str(self.ipsetGroupThreshold.value())
+
         # IPv4/IPv6 order
         opts['ipv4_6_order'] = (
             'ipv6_first' if self.ipv4before.currentIndex() == 1 else 'ipv4_first'
@@ -3008,7 +3008,7 @@ class FWWindow(QMainWindow):
             'nftables': CompilerDriver_nft,
         }
 
-        with self._db_manager.session() as session:
+        with self._db_manager.read_session() as session:
             rs = session.get(RuleSet, rule_set_id)
             if rs is None:
                 return
@@ -3152,9 +3152,9 @@ class FWWindow(QMainWindow):
         obj_id = self._editor_mgr.current_obj_id
         obj_type = self._editor_mgr.current_obj_type
         # Close the editor session *before* the restore so that no stale
-        # ORM connection interferes with ``_restore_db`` (which drops and
-        # recreates all tables via raw SQL on the shared StaticPool
-        # connection).
+        # ORM connection interferes with ``_apply_journal`` (which replays
+        # the undo journal via raw SQL on the shared connection and
+        # commits it).
         self._close_editor()
         if self._db_manager.undo():
             self._refresh_after_history_change(obj_id, obj_type)
@@ -211,6 +211,16 @@ class NftablesSettingsDialog(QDialog):
             int(opts.get('ulog_nlgroup', _SCHEMA['ulog_nlgroup']['default'])),
         )
 
+        # Named set threshold spin box
+        self.namedSetThreshold.setValue(
+            int(
+                opts.get(
+                    'named_set_threshold',
+                    _SCHEMA['named_set_threshold']['default'],
+                ),
+            ),
+        )
+
         # IPv4 before IPv6 combo
         if str(opts.get('ipv4_6_order', '')).lower() == 'ipv6_first':
             self.ipv4before.setCurrentIndex(1)
@@ -269,6 +279,9 @@ class NftablesSettingsDialog(QDialog):
         opts['ulog_qthreshold'] = str(self.qthreshold.value())
         opts['ulog_nlgroup'] = str(self.nlgroup.value())
 
+        # Named set threshold
+        opts['named_set_threshold'] = str(self.namedSetThreshold.value())
+
         # IPv4/IPv6 order
         opts['ipv4_6_order'] = (
             'ipv6_first' if self.ipv4before.currentIndex() == 1 else 'ipv4_first'
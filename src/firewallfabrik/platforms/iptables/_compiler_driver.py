@@ -144,7 +144,7 @@ class CompilerDriver_ipt(CompilerDriver):
         )
 
         # -- Look up firewall --
-        with self.db.session() as session:
+        with self.db.read_session() as session:
             if fw_id:
                 fw_uuid = uuid.UUID(fw_id) if isinstance(fw_id, str) else fw_id
                 fw = session.execute(
@@ -285,6 +285,8 @@ class CompilerDriver_ipt(CompilerDriver):
                     if self.ipv4_run:
                         ipv4_6_runs.append(AF_INET)
 
+                self.resolve_dns_names(session, fw, ipv4_6_runs)
+
                 # Per-address-family compilation loop
                 for policy_af in ipv4_6_runs:
                     ipv6_policy = policy_af == AF_INET6
@@ -445,6 +447,7 @@ class CompilerDriver_ipt(CompilerDriver):
                     routing_compiler.debug_rule = self.debug_rule_routing
                     routing_compiler.rule_debug_on = self.debug_rule_routing >= 0
                     routing_compiler.source_dir = self.source_dir
+                    routing_compiler.dns_cache = self.dns_cache
 
                     routing_rules_count = routing_compiler.prolog()
                     if routing_rules_count > 0:
@@ -571,6 +574,10 @@ class CompilerDriver_ipt(CompilerDriver):
                 body_buf = io.StringIO()
 
                 body_buf.write(oscnf.process_firewall_options(have_ipv6))
+                # The rules match on the address group sets, so they are
+                # filled before any rule is loaded.
+                if oscnf.using_address_group_sets():
+                    body_buf.write('load_address_group_sets\n')
                 body_buf.write(generated_script)
                 body_buf.write(routing_output)
                 body_buf.write('\n')
@@ -867,6 +874,7 @@ class CompilerDriver_ipt(CompilerDriver):
             nat_rs, policy_af
         )
         nat_compiler.source_dir = self.source_dir
+        nat_compiler.dns_cache = self.dns_cache
         nat_compiler.debug_rule = self.debug_rule_nat
         nat_compiler.rule_debug_on = self.debug_rule_nat >= 0
 
@@ -968,6 +976,7 @@ class CompilerDriver_ipt(CompilerDriver):
             pol_rs, policy_af
         )
         mangle_compiler.source_dir = self.source_dir
+        mangle_compiler.dns_cache = self.dns_cache
 
         mangle_rules_count = mangle_compiler.prolog()
         if mangle_rules_count > 0:
@@ -1015,6 +1024,7 @@ class CompilerDriver_ipt(CompilerDriver):
             pol_rs, policy_af
         )
         policy_compiler.source_dir = self.source_dir
+        policy_compiler.dns_cache = self.dns_cache
         policy_compiler.debug_rule = self.debug_rule_policy
         policy_compiler.rule_debug_on = self.debug_rule_policy >= 0
 
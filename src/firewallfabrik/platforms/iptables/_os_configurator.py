@@ -23,14 +23,19 @@ from __future__ import annotations
 import re
 from typing import TYPE_CHECKING, ClassVar
 
+import sqlalchemy
+
 from firewallfabrik.compiler._os_configurator import OSConfigurator
 from firewallfabrik.core.objects import (
+    AddressTable,
     Firewall,
     Interface,
+    is_run_time_address_table,
 )
 from firewallfabrik.driver._configlet import Configlet
 from firewallfabrik.driver._interface_properties import LinuxInterfaceProperties
 from firewallfabrik.platforms.iptables._utils import (
+    IPSET_MAX_NAME_LENGTH,
     get_interface_var_name,
     get_iptables_version,
     get_wait_option,
@@ -48,6 +53,10 @@ if TYPE_CHECKING:
 ADDRESS_TABLE_V4_FILTER = "awk '$1 !~ /:/'"
 ADDRESS_TABLE_V6_FILTER = "awk '$1 ~ /:/'"
 
+# The longest group name a counter can be appended to and still come
+# through `normalize_set_name` whole, for either family.
+_GROUP_SET_NAME_BUDGET = IPSET_MAX_NAME_LENGTH - len(':net') - len('_v6')
+
 
 class OSConfigurator_linux24(OSConfigurator):
     """OS configurator for Linux 2.4+ with iptables."""
@@ -94,6 +103,12 @@ class OSConfigurator_linux24(OSConfigurator):
         super().__init__(session, fw, ipv6)
         self.using_ipset: bool = False
         self.address_table_objects: dict[str, tuple[str, bool, str]] = {}
+        # The ipsets address groups are matched on: set name -> the
+        # addresses it holds and whether it is an IPv6 set.
+        self.address_group_sets: dict[str, tuple[tuple[str, ...], bool]] = {}
+        # The set names run-time address tables may take, filled on the
+        # first address group.
+        self._address_table_set_names: frozenset[str] | None = None
         self.virtual_addresses: list = []
         self.virtual_addresses_for_nat: dict[str, str] = {}
         self.known_interfaces: list[str] = []
@@ -577,13 +592,74 @@ class OSConfigurator_linux24(OSConfigurator):
                 checked.add((base_name, source))
             load_cmds.append(
                 f'reload_address_table "{name}" "{source}" "{"-6" if ipv6 else "-4"}"'
+                ' || status=1'
             )
 
         rt.set_variable('check_files_commands', '\n'.join(check_cmds))
         rt.set_variable('load_files_commands', '\n'.join(load_cmds))
 
+        # Each set is filled from a here-document, one address per line;
+        # the count sizes the set, which the script cannot know up front.
+        group_cmds = []
+        for name, (entries, ipv6) in self.address_group_sets.items():
+            group_cmds.append(
+                f'reload_address_group "{name}" "{"-6" if ipv6 else "-4"}" '
+                f'"{len(entries)}" <<ADDRESSES'
+            )
+            group_cmds.extend(entries)
+            group_cmds.append('ADDRESSES')
+        rt.set_variable('using_address_groups', 1 if group_cmds else 0)
+        rt.set_variable('load_groups_commands', '\n'.join(group_cmds))
+
         return rt.expand()
 
+    def using_address_group_sets(self) -> bool:
+        return bool(self.address_group_sets)
+
+    def register_address_group(
+        self, name: str, entries: tuple[str, ...], ipv6: bool = False
+    ) -> str:
+        """Register the ipset of an address group and return its name.
+
+        The same group compiled into the filter and the mangle table gets
+        the same set.  A name an address table may take, or one taken by
+        another group of the same name with other addresses, gets a
+        counter, cut so that it survives `normalize_set_name` whole.  The
+        names of the address tables are reserved up front, because a table
+        always takes its own name and may only be printed after the group.
+        """
+        entries = tuple(entries)
+        taken = self._address_table_set_names_reserved()
+        set_name = normalize_set_name(name, ipv6)
+        counter = 1
+        while (
+            set_name in taken
+            or set_name in self.address_table_objects
+            or self.address_group_sets.get(set_name, (entries, ipv6)) != (entries, ipv6)
+        ):
+            counter += 1
+            tag = f'_{counter}'
+            stem = normalize_set_name(name)[: _GROUP_SET_NAME_BUDGET - len(tag)]
+            set_name = normalize_set_name(stem + tag, ipv6)
+        self.address_group_sets[set_name] = (entries, ipv6)
+        return set_name
+
+    def _address_table_set_names_reserved(self) -> frozenset[str]:
+        """Return the set names of every run-time address table, both families."""
+        if self._address_table_set_names is None:
+            tables = (
+                self.session.scalars(sqlalchemy.select(AddressTable))
+                if self.session is not None
+                else ()
+            )
+            self._address_table_set_names = frozenset(
+                normalize_set_name(table.name, ipv6)
+                for table in tables
+                if is_run_time_address_table(table)
+                for ipv6 in (False, True)
+            )
+        return self._address_table_set_names
+
     def print_bridge_interface_configuration_commands(self) -> str:
         """Generate bridge interface configuration commands.
 
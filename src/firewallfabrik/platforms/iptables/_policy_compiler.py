@@ -20,6 +20,7 @@ firewall policy rules into iptables commands.
 from __future__ import annotations
 
 import hashlib
+import ipaddress
 import uuid
 from collections import defaultdict
 from typing import TYPE_CHECKING, cast
@@ -28,6 +29,7 @@ from firewallfabrik.compiler._comp_rule import CompRule
 from firewallfabrik.compiler._policy_compiler import PolicyCompiler
 from firewallfabrik.compiler._rule_processor import PolicyRuleProcessor
 from firewallfabrik.compiler.processors._generic import (
+    AggregateAddresses,
     Begin,
     CheckForTCPEstablished,
     ConvertToAtomicForAddresses,
@@ -70,6 +72,7 @@ from firewallfabrik.compiler.processors._service import (
 from firewallfabrik.core.objects import (
     Address,
     AddressRange,
+    ClusterGroup,
     CustomService,
     Direction,
     Firewall,
@@ -78,8 +81,10 @@ from firewallfabrik.core.objects import (
     Interface,
     IPv4,
     IPv6,
+    MultiAddress,
     Network,
     NetworkIPv6,
+    ObjectGroup,
     PolicyAction,
     TagService,
     TCPService,
@@ -220,6 +225,10 @@ class PolicyCompiler_ipt(PolicyCompiler):
         # whether the target is compiled into this script at all.
         self.branch_chains: set[str] = set()
 
+        # Address groups matched as one ipset: group id -> the set entries,
+        # filled by `AddressGroupsToIpset` and printed by PrintRule.
+        self.address_group_sets: dict[uuid.UUID, tuple[str, ...]] = {}
+
         # Print rule processor reference
         self.print_rule_processor = None
 
@@ -341,6 +350,21 @@ class PolicyCompiler_ipt(PolicyCompiler):
         self.add(EmptyGroupsInRE('check for empty groups in SRV', 'srv'))
         self.add(EmptyGroupsInRE('check for empty groups in ITF', 'itf'))
 
+        ipset_threshold = int(self.fw.get_option('ipset_group_threshold') or 0)
+        if (
+            ipset_threshold > 0
+            and self.using_ipset
+            and version_compare(
+                self.version, MATCH_FIRST_RELEASE['set'][bool(self.ipv6_policy)]
+            )
+            >= 0
+        ):
+            self.add(
+                AddressGroupsToIpset(
+                    'match large address groups as ipsets', ipset_threshold
+                )
+            )
+
         self.add(ExpandGroups('expand all groups'))
         self.add(DropRuleWithEmptyRE('drop rules with empty elements'))
         self.add(EliminateDuplicatesInSRC('eliminate duplicates in SRC'))
@@ -506,6 +530,10 @@ class PolicyCompiler_ipt(PolicyCompiler):
             )
         )
 
+        if self.fw.get_option('aggregate_addresses'):
+            self.add(AggregateAddresses('aggregate addresses in Src', 'src'))
+            self.add(AggregateAddresses('aggregate addresses in Dst', 'dst'))
+
         self.add(CheckForUnnumbered('check for unnumbered interfaces'))
         self.add(
             CheckForDynamicInterfacesOfOtherObjects(
@@ -569,6 +597,8 @@ class PolicyCompiler_ipt(PolicyCompiler):
         self.add(SimplePrintProgress())
 
         self.run_rule_processors()
+        if self.verbose:
+            self.info(f' {self.render_hits} rules printed from the dedup text')
 
     def debug_print_rule(self, rule) -> str:
         """Rich debug output matching C++ PolicyCompiler_ipt::debugPrintRule."""
@@ -2529,6 +2559,119 @@ class ProcessMultiAddressObjectsInDst(ProcessMultiAddressObjectsInRE):
         super().__init__(name, 'dst')
 
 
+def _ipset_entries(obj) -> list[str] | None:
+    """The entries of a ``hash:net`` ipset covering *obj*, None if none do.
+
+    A host is an entry of its own and a network is written with its prefix
+    length; an address range becomes the networks covering it.  A set of
+    that type holds no network of length 0, so an address that means "any"
+    has no entries.
+    """
+    try:
+        if isinstance(obj, AddressRange):
+            networks = list(
+                ipaddress.summarize_address_range(
+                    ipaddress.ip_address(obj.get_start_address()),
+                    ipaddress.ip_address(obj.get_end_address()),
+                )
+            )
+        elif isinstance(obj, (Network, NetworkIPv6)):
+            networks = [
+                ipaddress.ip_network(
+                    f'{obj.get_address()}/{obj.get_netmask()}', strict=False
+                )
+            ]
+        else:
+            networks = [ipaddress.ip_network(obj.get_address())]
+    except (TypeError, ValueError):
+        return None
+    if any(
+        net.prefixlen == 0 or net.network_address.is_unspecified for net in networks
+    ):
+        return None
+    return [
+        net.with_prefixlen if net.num_addresses > 1 else str(net.network_address)
+        for net in networks
+    ]
+
+
+class AddressGroupsToIpset(PolicyRuleProcessor):
+    """Keep a large address group whole and match it as one ipset.
+
+    Expanding a group turns the rule into one rule per member, and a packet
+    walks all of them in turn.  A group holding at least *threshold*
+    addresses of the ruleset's family is kept whole instead: PrintRule
+    matches it with ``-m set``, a hash lookup, and the activation script
+    fills the set before the rules are loaded.
+
+    Only a group of standalone addresses, networks and address ranges
+    qualifies.  A member that is the firewall, a broadcast or multicast
+    address or a network the firewall is on moves the rule into another
+    chain, so the pipeline has to see it; a group holding one is expanded
+    as before, and so is a group holding anything resolved per member
+    later on - a host, an Address Table, a DNS Name.
+
+    Must run before ``ExpandGroups``.
+    """
+
+    def __init__(self, name: str, threshold: int) -> None:
+        super().__init__(name)
+        self._threshold = threshold
+        self._decided: set = set()
+
+    def process_next(self) -> bool:
+        rule = self.get_next()
+        if rule is None:
+            return False
+
+        ipt_comp = cast('PolicyCompiler_ipt', self.compiler)
+        for obj in [*rule.src, *rule.dst]:
+            if obj.id in self._decided:
+                continue
+            self._decided.add(obj.id)
+            entries = self._group_entries(obj)
+            if entries is None or len(entries) < self._threshold:
+                continue
+            ipt_comp.address_group_sets[obj.id] = tuple(entries)
+            ipt_comp.unexpanded_groups.add(obj.id)
+            if ipt_comp.verbose:
+                ipt_comp.info(
+                    f' {self.name}: "{obj.name}" is matched as a set of '
+                    f'{len(entries)} addresses'
+                )
+
+        self.tmp_queue.append(rule)
+        return True
+
+    def _group_entries(self, group) -> list[str] | None:
+        """The set entries of *group* in this ruleset's family, if it qualifies."""
+        if not isinstance(group, ObjectGroup) or isinstance(
+            group, (MultiAddress, ClusterGroup)
+        ):
+            return None
+        ipt_comp = cast('PolicyCompiler_ipt', self.compiler)
+        ipv6 = bool(ipt_comp.ipv6_policy)
+        entries: dict[str, None] = {}
+        for member in ipt_comp.group_graph.expand(group):
+            if (
+                not isinstance(member, (IPv4, IPv6, Network, NetworkIPv6, AddressRange))
+                or member.interface_id is not None
+            ):
+                return None
+            if member.is_v6() != ipv6:
+                continue
+            if (
+                ipt_comp.complex_match(member, ipt_comp.fw)
+                or ipt_comp.find_address_for(member, ipt_comp.fw) is not None
+            ):
+                return None
+            member_entries = _ipset_entries(member)
+            if member_entries is None:
+                return None
+            entries.update(dict.fromkeys(member_entries))
+        return list(entries)
+
+
 class SplitIfSrcMatchesFw(PolicyRuleProcessor):
     """Split rule if src contains the firewall object.
 
@@ -4279,9 +4422,8 @@ class Optimize3(PolicyRuleProcessor):
 
         # Building the command again would record every message of this
         # rule a second time and set the compiler status even on the rules
-        # dropped right below.
-        with self.compiler.muted():
-            command = pr.policy_rule_to_string(rule)
+        # dropped right below.  The printer reuses the text.
+        command = self.compiler.render_muted(rule, pr.policy_rule_to_string)
         rule_str = f'{rule.label} {command}'
         if rule_str in self._seen:
             return True  # duplicate, drop
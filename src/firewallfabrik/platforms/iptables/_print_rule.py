@@ -307,7 +307,7 @@ class PrintRule(PolicyRuleProcessor):
 
         # Build the command first: a rule the compiler cannot express yields
         # an empty one, and then not even its label belongs in the script.
-        cmd = self._build_rule_command(rule)
+        cmd = self.compiler.render(rule, self._build_rule_command)
         if not cmd:
             return True
 
@@ -830,29 +830,50 @@ class PrintRule(PolicyRuleProcessor):
             oscnf.register_multi_address_object(obj.name, source, ipv6)
 
         if getattr(ipt_comp, 'using_ipset', False):
-            # MATCH_FIRST_RELEASE carries the row for exactly this, but
-            # nothing asked it: `libxt_set.c` first shipped in v1.4.9 and
-            # there never was a `libip6t_set.c`, so an older ip6tables
-            # answers "Couldn't load match `set'" and the activation script
-            # stops with the built-in policies already at DROP.
-            if not self._match_available(rule, 'set'):
-                return None
-            # `--set` was renamed in iptables 1.4.4 and only kept as a
-            # deprecated alias since (netfilter extensions/libxt_set.c).
-            option = (
-                '--match-set'
-                if version_compare(self.version, '1.4.4') >= 0
-                else '--set'
-            )
-            suffix = 'src' if slot == 'src' else 'dst'
-            match = f'{option} {normalize_set_name(obj.name, ipv6)} {suffix}'
-            return f'-m set {self._print_single_option_with_negation("", rule, slot, match)}'
+            return self._print_set_match(rule, slot, normalize_set_name(obj.name, ipv6))
 
         rule.set_option('address_table_file', source)
         var = get_address_table_var_name(obj)
         flag = ' -s' if slot == 'src' else ' -d'
         return self._print_single_option_with_negation(flag, rule, slot, f'${var}')
 
+    def _print_address_group(self, obj, rule: CompRule, slot: str) -> str | None:
+        """Print the match for an address group kept whole as an ipset.
+
+        The addresses were taken from the group by `AddressGroupsToIpset`;
+        registering them gives the set its name and puts it into the
+        activation script, which fills it before the rules are loaded.
+        """
+        ipt_comp = cast('PolicyCompiler_ipt', self.compiler)
+        entries = ipt_comp.address_group_sets[obj.id]
+        ipv6 = bool(ipt_comp.ipv6_policy)
+        oscnf = getattr(ipt_comp, 'oscnf', None)
+        if oscnf is not None:
+            set_name = oscnf.register_address_group(obj.name, entries, ipv6)
+        else:
+            set_name = normalize_set_name(obj.name, ipv6)
+        return self._print_set_match(rule, slot, set_name)
+
+    def _print_set_match(self, rule: CompRule, slot: str, set_name: str) -> str | None:
+        """Print ``-m set`` on *set_name*, None when iptables has no such match."""
+        # MATCH_FIRST_RELEASE carries the row for exactly this, but nothing
+        # asked it: `libxt_set.c` first shipped in v1.4.9 and there never
+        # was a `libip6t_set.c`, so an older ip6tables answers "Couldn't
+        # load match `set'" and the activation script stops with the
+        # built-in policies already at DROP.
+        if not self._match_available(rule, 'set'):
+            return None
+        # `--set` was renamed in iptables 1.4.4 and only kept as a
+        # deprecated alias since (netfilter extensions/libxt_set.c).
+        option = (
+            '--match-set' if version_compare(self.version, '1.4.4') >= 0 else '--set'
+        )
+        suffix = 'src' if slot == 'src' else 'dst'
+        match = f'{option} {set_name} {suffix}'
+        return (
+            f'-m set {self._print_single_option_with_negation("", rule, slot, match)}'
+        )
+
     def _print_src_addr_from_rule(self, rule: CompRule) -> str | None:
         """Print the source match, None when the object could not be rendered."""
         if rule.is_src_any():
@@ -866,6 +887,8 @@ class PrintRule(PolicyRuleProcessor):
             return self._print_address_range(obj, rule, 'src')
         if is_run_time_address_table(obj):
             return self._print_address_table(obj, rule, 'src')
+        if obj.id in getattr(self.compiler, 'address_group_sets', {}):
+            return self._print_address_group(obj, rule, 'src')
         addr = self._print_addr(obj)
         if addr:
             return self._print_single_option_with_negation(' -s', rule, 'src', addr)
@@ -894,6 +917,8 @@ class PrintRule(PolicyRuleProcessor):
             return self._print_address_range(obj, rule, 'dst')
         if is_run_time_address_table(obj):
             return self._print_address_table(obj, rule, 'dst')
+        if obj.id in getattr(self.compiler, 'address_group_sets', {}):
+            return self._print_address_group(obj, rule, 'dst')
         addr = self._print_addr(obj)
         if addr:
             return self._print_single_option_with_negation(' -d', rule, 'dst', addr)
@@ -25,8 +25,10 @@ from __future__ import annotations
 import io
 import os
 import socket
+import tempfile
 import textwrap
 import uuid
+from collections.abc import Iterator
 from pathlib import Path
 from typing import TYPE_CHECKING
 
@@ -54,6 +56,10 @@ from firewallfabrik.platforms.linux._netfilter import (
 )
 from firewallfabrik.platforms.nftables import __compiler_version__
 from firewallfabrik.platforms.nftables._identifiers import nft_object_name
+from firewallfabrik.platforms.nftables._print_rule import (
+    dispatch_by_interface,
+    extract_named_sets,
+)
 
 if TYPE_CHECKING:
     import sqlalchemy.orm
@@ -100,6 +106,24 @@ def _declare_counters(names: list[str]) -> str:
     return ''.join(out)
 
 
+def _write_script(path: Path, chunks: Iterator[str]) -> None:
+    """Write the script as the template renders it.
+
+    It goes to a file next to the target and is renamed over it once
+    complete, so that a render that fails half way leaves the previous
+    script in place instead of the first half of a new one.
+    """
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.writelines(chunks)
+        Path(tmp).chmod(0o755)
+        Path(tmp).replace(path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
 _SET_LOADERS = {
     'file': 'load_address_table',
     'host': 'load_dns_name',
@@ -134,6 +158,29 @@ def _declare_address_tables(tables: dict[str, tuple[str, bool, str]]) -> str:
     return ''.join(out)
 
 
+def _declare_named_sets(sets: dict[str, tuple[str, list[str]]]) -> str:
+    """Declare the named sets `extract_named_sets` moved element lists into.
+
+    The elements are what the rules carried as anonymous sets, which may
+    hold networks, ranges and port ranges, hence ``flags interval``; and
+    ``auto-merge`` for the same reason as in `_declare_address_tables`.
+    """
+    if not sets:
+        return ''
+    out = []
+    for name, (set_type, elements) in sorted(sets.items()):
+        out.append(
+            f'    set {name} {{\n'
+            f'        type {set_type}\n'
+            f'        flags interval\n'
+            f'        auto-merge\n'
+            f'        elements = {{ {", ".join(elements)} }}\n'
+            f'    }}\n'
+        )
+    out.append('\n')
+    return ''.join(out)
+
+
 def _prepend(prefix: str, text: str) -> str:
     """Prepend a string to every non-empty line."""
     if not text:
@@ -210,7 +257,7 @@ class CompilerDriver_nft(CompilerDriver):
         )
 
         # -- Look up firewall --
-        with self.db.session() as session:
+        with self.db.read_session() as session:
             if fw_id:
                 fw_uuid = uuid.UUID(fw_id) if isinstance(fw_id, str) else fw_id
                 fw = session.execute(
@@ -320,6 +367,8 @@ class CompilerDriver_nft(CompilerDriver):
                     if self.ipv4_run:
                         ipv4_6_runs.append(AF_INET)
 
+                self.resolve_dns_names(session, fw, ipv4_6_runs)
+
                 # Collect all compiled rules per chain per AF
                 # Structure: {chain_name: [rule_lines]}
                 filter_chains: dict[str, list[str]] = {
@@ -466,6 +515,7 @@ class CompilerDriver_nft(CompilerDriver):
                     routing_compiler.debug_rule = self.debug_rule_routing
                     routing_compiler.rule_debug_on = self.debug_rule_routing >= 0
                     routing_compiler.source_dir = self.source_dir
+                    routing_compiler.dns_cache = self.dns_cache
 
                     routing_rules_count = routing_compiler.prolog()
                     if routing_rules_count > 0:
@@ -513,8 +563,7 @@ class CompilerDriver_nft(CompilerDriver):
                     try:
                         out_p = Path(output_path)
                         out_p.parent.mkdir(parents=True, exist_ok=True)
-                        out_p.write_text(script, encoding='utf-8')
-                        out_p.chmod(0o755)
+                        _write_script(out_p, script)
                         if self.all_errors:
                             self.info(' Compiled with errors')
                         elif self.all_warnings:
@@ -572,6 +621,7 @@ class CompilerDriver_nft(CompilerDriver):
             nat_rs, policy_af
         )
         nat_compiler.source_dir = self.source_dir
+        nat_compiler.dns_cache = self.dns_cache
         nat_compiler.debug_rule = self.debug_rule_nat
         nat_compiler.rule_debug_on = self.debug_rule_nat >= 0
 
@@ -644,6 +694,7 @@ class CompilerDriver_nft(CompilerDriver):
             pol_rs, policy_af
         )
         policy_compiler.source_dir = self.source_dir
+        policy_compiler.dns_cache = self.dns_cache
         policy_compiler.debug_rule = self.debug_rule_policy
         policy_compiler.rule_debug_on = self.debug_rule_policy >= 0
 
@@ -721,6 +772,7 @@ class CompilerDriver_nft(CompilerDriver):
             pol_rs, policy_af
         )
         mangle_compiler.source_dir = self.source_dir
+        mangle_compiler.dns_cache = self.dns_cache
         mangle_compiler.debug_rule = self.debug_rule_policy
         mangle_compiler.rule_debug_on = self.debug_rule_policy >= 0
 
@@ -780,6 +832,16 @@ class CompilerDriver_nft(CompilerDriver):
         mangle_table = f'{table_name}_mangle'
         mangle_chains = mangle_chains or {}
 
+        # Element lists that many rules of a table repeat become named sets
+        # of that table; the rule lists are rewritten before they are used.
+        threshold = int(self.firewall_option(fw, 'named_set_threshold') or 0)
+        filter_sets = extract_named_sets(filter_chains, threshold)
+        mangle_sets = extract_named_sets(mangle_chains, threshold)
+        nat_sets = {
+            fam: extract_named_sets(fam_chains, threshold)
+            for fam, fam_chains in nat_chains.items()
+        }
+
         out = io.StringIO()
 
         # Determine address family
@@ -814,6 +876,23 @@ class CompilerDriver_nft(CompilerDriver):
             for chain in filter_chains
             if chain not in ('input', 'forward', 'output')
         )
+        # Runs of rules bound to one interface each move into a chain per
+        # interface behind one verdict map lookup.
+        dispatch_chains: dict[str, str] = {}
+        if self.firewall_option(fw, 'interface_dispatch'):
+            taken = {'input', 'forward', 'output', *filter_chains}
+            input_rules, new_chains = dispatch_by_interface(
+                input_rules, 'input', 'iifname', taken
+            )
+            dispatch_chains.update(new_chains)
+            forward_rules, new_chains = dispatch_by_interface(
+                forward_rules, 'forward', 'iifname', taken
+            )
+            dispatch_chains.update(new_chains)
+            output_rules, new_chains = dispatch_by_interface(
+                output_rules, 'output', 'oifname', taken
+            )
+            dispatch_chains.update(new_chains)
         have_filter = bool(
             input_rules.strip()
             or forward_rules.strip()
@@ -904,6 +983,7 @@ class CompilerDriver_nft(CompilerDriver):
             out.write(_declare_counters(self.mangle_counters))
             out.write(_declare_dynamic_sets(self.mangle_dynamic_sets))
             out.write(_declare_address_tables(self.mangle_address_tables))
+            out.write(_declare_named_sets(mangle_sets))
             for index, (chain, rules) in enumerate(mangle_by_chain):
                 if index:
                     out.write('\n')
@@ -929,6 +1009,7 @@ class CompilerDriver_nft(CompilerDriver):
             out.write(_declare_counters(self.filter_counters))
             out.write(_declare_dynamic_sets(self.filter_dynamic_sets))
             out.write(_declare_address_tables(self.filter_address_tables))
+            out.write(_declare_named_sets(filter_sets))
 
             # Input chain
             out.write('    chain input {\n')
@@ -1008,6 +1089,11 @@ class CompilerDriver_nft(CompilerDriver):
                 out.write(f'    chain {chain} {{\n')
                 out.write(''.join(filter_chains[chain]))
                 out.write('    }\n')
+            for chain, rules in dispatch_chains.items():
+                out.write('\n')
+                out.write(f'    chain {chain} {{\n')
+                out.write(rules)
+                out.write('    }\n')
 
             out.write('}\n')
             out.write('\n')
@@ -1021,6 +1107,7 @@ class CompilerDriver_nft(CompilerDriver):
         ) in nat_by_family:
             out.write(f'table {fam} {nat_table} {{\n')
             out.write(_declare_address_tables(self.nat_address_tables.get(fam, {})))
+            out.write(_declare_named_sets(nat_sets.get(fam, {})))
 
             # Prerouting chain (DNAT)
             out.write('    chain prerouting {\n')
@@ -1067,8 +1154,12 @@ class CompilerDriver_nft(CompilerDriver):
         nft_rules_body: str,
         routing_output: str,
         oscnf=None,
-    ) -> str:
-        """Assemble the complete shell script using the Jinja2 template."""
+    ) -> Iterator[str]:
+        """Assemble the complete shell script using the Jinja2 template.
+
+        The script comes back in pieces, as the template renders it, so
+        that it goes to the file without being held in memory whole.
+        """
 
         user_name = os.environ.get('USER', 'unknown')
 
@@ -1262,7 +1353,7 @@ class CompilerDriver_nft(CompilerDriver):
         }
 
         template = Jinja2Template('nftables', 'script.sh.j2')
-        return template.render(context)
+        return template.generate(context)
 
     def _address_table_load_commands(
         self,
@@ -1274,27 +1365,46 @@ class CompilerDriver_nft(CompilerDriver):
         """Return one load command per address table set in the ruleset.
 
         The set lives in the table its rules are in, so a table used by both
-        the filter and the NAT rules is loaded once per table.
+        the filter and the NAT rules is loaded once per table.  A DNS name
+        is resolved in the background and waited for at the end, so a name
+        whose server does not answer holds up the others by one timeout
+        instead of each one after it adding its own.  Each background job
+        is waited for by its pid, which is how the shell hands back its
+        exit status; a failed load of either kind sets ``status``, which
+        ``load_address_tables`` returns.
         """
         lines: list[str] = []
+        background = False
+
+        def add(family: str, table: str, name: str, entry: tuple) -> None:
+            nonlocal background
+            source, ipv6, kind = entry
+            af = '-6' if ipv6 else '-4'
+            line = (
+                f'    {_SET_LOADERS[kind]} "{family}" "{table}" '
+                f'"{name}" "{source}" "{af}"'
+            )
+            if kind == 'host':
+                lines.append(line + ' &')
+                lines.append('    pids="$pids $!"')
+                background = True
+            else:
+                lines.append(line + ' || status=1')
+
         for table, tables in (
             (filter_table, self.filter_address_tables),
             (mangle_table, self.mangle_address_tables),
         ):
-            for name, (source, ipv6, kind) in sorted(tables.items()):
-                af = '-6' if ipv6 else '-4'
-                loader = _SET_LOADERS[kind]
-                lines.append(
-                    f'    {loader} "{filter_family}" "{table}" '
-                    f'"{name}" "{source}" "{af}"'
-                )
+            for name, entry in sorted(tables.items()):
+                add(filter_family, table, name, entry)
         for fam, tables in sorted(self.nat_address_tables.items()):
-            for name, (source, ipv6, kind) in sorted(tables.items()):
-                af = '-6' if ipv6 else '-4'
-                loader = _SET_LOADERS[kind]
-                lines.append(
-                    f'    {loader} "{fam}" "{nat_table}" "{name}" "{source}" "{af}"'
-                )
+            for name, entry in sorted(tables.items()):
+                add(fam, nat_table, name, entry)
+        if background:
+            lines.insert(0, '    pids=""')
+            lines.append('    for pid in $pids; do')
+            lines.append('        wait "$pid" || status=1')
+            lines.append('    done')
         return '\n'.join(lines)
 
     def _address_table_file_checks(self) -> str:
@@ -27,6 +27,7 @@ from firewallfabrik.compiler._combined_address import CombinedAddress
 from firewallfabrik.compiler._policy_compiler import PolicyCompiler
 from firewallfabrik.compiler._rule_processor import PolicyRuleProcessor
 from firewallfabrik.compiler.processors._generic import (
+    AggregateAddresses,
     Begin,
     CheckForTCPEstablished,
     ConvertToAtomicForInterfaces,
@@ -396,6 +397,10 @@ class PolicyCompiler_nft(PolicyCompiler):
             self.add(DropIPv6Rules('drop ipv6 rules'))
         self.add(DropRuleWithEmptyRE('drop rules after AF filter'))
 
+        if self.fw.get_option('aggregate_addresses'):
+            self.add(AggregateAddresses('aggregate addresses in Src', 'src'))
+            self.add(AggregateAddresses('aggregate addresses in Dst', 'dst'))
+
         self.add(CheckForUnnumbered('check for unnumbered interfaces'))
         self.add(CheckForDynamicInterfacesOfOtherObjects('check dynamic interfaces'))
 
@@ -431,15 +436,27 @@ class PolicyCompiler_nft(PolicyCompiler):
         self.add(SimplePrintProgress())
 
         self.run_rule_processors()
+        if self.verbose:
+            self.info(f' {self.render_hits} rules printed from the dedup text')
 
         # Post-processing: merge consecutive rules that differ only in
         # source or destination address into nftables anonymous sets.
         from firewallfabrik.platforms.nftables._print_rule import (
+            fold_concatenations,
             optimize_chain_rules,
         )
 
         optimize_chain_rules(self.chain_rules)
 
+        # Rules of one original rule that differ in more than one address
+        # or port fold into one rule with a concatenation set.  The option
+        # only exists for nftables, whatever platform the firewall names.
+        if self.fw.get_option('concatenation_sets', platform='nftables'):
+            folded = fold_concatenations(self.chain_rules)
+            if self.verbose:
+                for chain, (before, after) in folded.items():
+                    self.info(f' {chain}: {before} rules folded into {after}')
+
     def new_counter_name(self, rule) -> str:
         """Return the name of the counter that stands for *rule*.
 
@@ -2286,9 +2303,8 @@ class Optimize3(PolicyRuleProcessor):
         chain = rule.ipt_chain or ''
         # Building the command again would record every message of this
         # rule a second time and set the compiler status even on the rules
-        # dropped right below.
-        with self.compiler.muted():
-            command = pr.policy_rule_to_string(rule)
+        # dropped right below.  The printer reuses the text.
+        command = self.compiler.render_muted(rule, pr.policy_rule_to_string)
         rule_str = f'{rule.label} {chain}:{command}'
         if rule_str in self._seen:
             return True  # duplicate, drop
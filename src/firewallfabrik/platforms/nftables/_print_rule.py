@@ -24,6 +24,7 @@ separately in _nat_print_rule.py.
 from __future__ import annotations
 
 import datetime
+import hashlib
 import ipaddress
 import re
 from typing import TYPE_CHECKING, ClassVar, cast
@@ -524,7 +525,7 @@ class PrintRule_nft(PolicyRuleProcessor):
 
         # Build the rule first: one the compiler cannot express comes back
         # empty, and then not even its label belongs in the ruleset.
-        cmd = self._build_rule(rule)
+        cmd = self.compiler.render(rule, self._build_rule)
         if not cmd:
             return True
 
@@ -2606,28 +2607,62 @@ class PrintRule_nft(PolicyRuleProcessor):
 
 
 # ═══════════════════════════════════════════════════════════════════
-# Post-processing optimization: merge consecutive rules into sets
+# Post-processing optimization: merge rules into sets
 # ═══════════════════════════════════════════════════════════════════
 
-# Matches "ip saddr <addr>" or "ip6 saddr <addr>" anywhere in a rule line.
-# The pattern uses search(), so it finds the first occurrence in the line.
-# Group 1: "ip saddr " or "ip6 saddr " (with optional "!= ")
-# Group 2: address family ("ip" or "ip6")
-# Group 3: optional negation ("!= " or empty)
-# Group 4: the address value (single addr, CIDR, range, or { set })
-# Group 5: the rest of the rule after the address
-_SADDR_RE = re.compile(
-    r'((ip6?) saddr (!= )?)'  # af + saddr + optional negation
-    r'(\{[^}]+\}|[^\s]+)'  # address: set or single value
-    r'(.*)$',  # suffix: rest of the rule
+# An address or port match with its value: a single value or a set.  The
+# addresses of a conntrack direction ("ct original ip saddr") are left to
+# the signature, as they cannot be part of a concatenation with the others.
+_FIELD_RE = re.compile(
+    r'(?<!original )(?<!reply )'
+    r'\b(ip6?|tcp|udp) (saddr|daddr|sport|dport) (!= )?(\{[^{}]+\}|[^\s{}]+)'
 )
 
-# Same pattern for daddr.
-_DADDR_RE = re.compile(
-    r'((ip6?) daddr (!= )?)'
-    r'(\{[^}]+\}|[^\s]+)'
-    r'(.*)$',
-)
+# Statements that keep state per rule.  Folding two rules carrying one of
+# them into one rule shares the state: two rules limited to 5/second each
+# would become one rule limited to 5/second for both.
+_STATEFUL_RE = re.compile(r'\b(limit rate|quota|meter|ct count)\b|@\w+ \{')
+
+
+def _parse_fields(rule_line: str, allow_state: bool = False):
+    """Split *rule_line* into its signature and its address and port matches.
+
+    Returns ``(signature, matches)``, where the signature is the line with
+    the value of every match replaced by a placeholder, or ``None`` if the
+    line is not one to merge.  A line with per-rule state is only taken
+    with *allow_state*.
+
+    The key of a rate limit or a connection limit sits inside ``{ ... }``
+    and names the same header fields (``add @s { ip saddr ct count over
+    10 }``); it is not an address match of the rule, and merging two of
+    these would put a set inside the braces, which is a syntax error.
+    """
+    if not allow_state and _STATEFUL_RE.search(rule_line):
+        return None
+    matches = []
+    signature = []
+    pos = 0
+    for m in _FIELD_RE.finditer(rule_line):
+        if _inside_braces(rule_line, m.start()):
+            continue
+        if m.group(4) == '.' or rule_line[: m.start()].endswith('. '):
+            # Already part of a concatenation.
+            return None
+        if m.group(4).startswith('@'):
+            # A named set is not a value a set can hold.
+            return None
+        matches.append(m)
+        signature.append(rule_line[pos : m.start(4)])
+        pos = m.end(4)
+    if not matches:
+        return None
+    signature.append(rule_line[pos:])
+    return '\0'.join(signature), matches
+
+
+# An exact interface match.  Two rules on different interfaces never both
+# match a packet.
+_IFNAME_RE = re.compile(r'\b(iifname|oifname) "([^"*\\]+)"')
 
 
 def _split_entry(entry: str) -> tuple[str, str]:
@@ -2666,42 +2701,6 @@ def _inside_braces(line: str, index: int) -> bool:
     return line.count('{', 0, index) > line.count('}', 0, index)
 
 
-def _parse_addr(
-    rule_line: str,
-) -> tuple[str, str, str, str] | None:
-    """Try to extract an address field from a rule line.
-
-    Returns ``(prefix, addr, suffix, field)`` where *field* is
-    ``'saddr'`` or ``'daddr'``, or ``None`` if no address field is
-    found.
-
-    *prefix* and *suffix* together form the "signature" of the rule —
-    everything except the varying address.  Two rules can be merged if
-    their prefix, suffix, and field are identical.
-    """
-    for pattern, field in ((_SADDR_RE, 'saddr'), (_DADDR_RE, 'daddr')):
-        m = pattern.search(rule_line)
-        if m:
-            if _inside_braces(rule_line, m.start()):
-                # A rate limit or a connection limit carries its key inside
-                # `{ ... }`, and the key names the same header field:
-                # `add @s { ip saddr ct count over 10 }`.  That is not the
-                # rule's address match, and merging two of these would put
-                # a set inside the braces, which is a syntax error.  The
-                # other side of the rule may still hold a real one.
-                continue
-            before_match = rule_line[: m.start()]
-            prefix = before_match + m.group(1)
-            addr = m.group(4)
-            suffix = m.group(5)
-            if addr.lstrip().startswith('@'):
-                # A reference to a named set is not a value an anonymous
-                # set can hold; nftables rejects `{ @set, addr }`.
-                return None
-            return (prefix, addr, suffix, field)
-    return None
-
-
 def _addrs_from_value(value: str) -> list[str]:
     """Extract individual addresses from a value that may be a set.
 
@@ -2722,77 +2721,531 @@ def _build_addr_value(addrs: list[str]) -> str:
     return '{ ' + ', '.join(addrs) + ' }'
 
 
+class _PrintedRule:
+    """A printed rule line, taken apart into the values that may vary.
+
+    *matches* are the address and port matches of the line and *values*
+    the elements each of them holds; *signature* is the line with those
+    values taken out.  Two rules with the same signature differ in the
+    values of their matches and nothing else.
+    """
+
+    __slots__ = (
+        'changed',
+        'comments',
+        'line',
+        'matches',
+        'signature',
+        'stateful',
+        'values',
+    )
+
+    def __init__(
+        self, comments: str, line: str, signature: str, matches: list[re.Match]
+    ) -> None:
+        self.comments = comments
+        self.line = line
+        self.signature = signature
+        self.matches = matches
+        self.values = [_addrs_from_value(m.group(4)) for m in matches]
+        self.changed: set[int] = set()
+        self.stateful = bool(_STATEFUL_RE.search(line))
+
+    def merge_index(self, other: _PrintedRule, adjacent: bool) -> int | None:
+        """The one match *other* differs in, if it may be merged in.
+
+        A negated element of several addresses is printed one line per
+        address, and those lines stand for "none of them": merging them
+        back into ``!= { a, b }`` is part of this pass, but only for lines
+        that follow each other, the way they were printed.
+
+        Lines with per-rule state (`_STATEFUL_RE`) share it once merged,
+        so they are only merged the way this pass always merged them: with
+        the line right before them, on their source address or, if they
+        have none, their destination address.  Any other list, or a line
+        moved up from further down, would add traffic to a budget it was
+        never meant to draw on.
+        """
+        if other.signature != self.signature:
+            return None
+        differ = [
+            k
+            for k in range(len(self.values))
+            if set(self.values[k]) != set(other.values[k])
+        ]
+        if len(differ) != 1:
+            return None
+        if self.matches[differ[0]].group(3) and not adjacent:
+            return None
+        if (self.stateful or other.stateful) and (
+            not adjacent or differ[0] != self._address_index()
+        ):
+            return None
+        return differ[0]
+
+    def _address_index(self) -> int | None:
+        """The first source address match, else the first destination one."""
+        for field in ('saddr', 'daddr'):
+            for k, m in enumerate(self.matches):
+                if m.group(1) in ('ip', 'ip6') and m.group(2) == field:
+                    return k
+        return None
+
+    def merge(self, k: int, other: _PrintedRule) -> None:
+        for value in other.values[k]:
+            if value not in self.values[k]:
+                self.values[k].append(value)
+        self.changed.add(k)
+
+    def disjoint(self, other: _PrintedRule) -> bool:
+        """Report whether no packet can match both this rule and *other*.
+
+        Only what can be told from the line counts: another interface,
+        another address family or transport protocol, or a match on the
+        same field whose values do not overlap.  Anything else might.
+        """
+        ifaces = dict(_IFNAME_RE.findall(self.line))
+        for key, name in _IFNAME_RE.findall(other.line):
+            if ifaces.get(key, name) != name:
+                return True
+        for kind in (('ip', 'ip6'), ('tcp', 'udp')):
+            mine = {m.group(1) for m in self.matches if m.group(1) in kind}
+            theirs = {m.group(1) for m in other.matches if m.group(1) in kind}
+            if mine and theirs and mine.isdisjoint(theirs):
+                return True
+        for i, a in enumerate(self.matches):
+            if a.group(3):
+                continue
+            for j, b in enumerate(other.matches):
+                if b.group(3) or a.group(1, 2) != b.group(1, 2):
+                    continue
+                ours = _intervals(a.group(1), self.values[i])
+                theirs = _intervals(b.group(1), other.values[j])
+                if (
+                    ours is not None
+                    and theirs is not None
+                    and not any(
+                        lo <= t_hi and t_lo <= hi
+                        for lo, hi in ours
+                        for t_lo, t_hi in theirs
+                    )
+                ):
+                    return True
+        return False
+
+    def text(self) -> str:
+        out = []
+        pos = 0
+        for k, m in enumerate(self.matches):
+            if k in self.changed:
+                out.append(self.line[pos : m.start(4)])
+                out.append(_build_addr_value(self.values[k]))
+                pos = m.end(4)
+        out.append(self.line[pos:])
+        return f'{self.comments}{"".join(out)}\n'
+
+
+def _intervals(proto: str, values: list[str]) -> list[tuple[int, int]] | None:
+    """The addresses or ports *values* cover, or ``None`` if one is unclear.
+
+    A service name, or anything else that is not a number, an address,
+    a network or a range of them, makes the answer unknown.
+    """
+    out = []
+    for value in values:
+        lo, sep, hi = value.partition('-')
+        try:
+            if proto in ('tcp', 'udp'):
+                first = int(lo)
+                out.append((first, int(hi) if sep else first))
+            elif sep:
+                out.append(
+                    (int(ipaddress.ip_address(lo)), int(ipaddress.ip_address(hi)))
+                )
+            else:
+                net = ipaddress.ip_network(value, strict=False)
+                out.append((int(net.network_address), int(net.broadcast_address)))
+        except ValueError:
+            return None
+    return out
+
+
 def optimize_chain_rules(chain_rules: dict[str, list[str]]) -> None:
-    """Merge consecutive rules that differ only in source or destination address.
+    """Merge rules that differ only in one address or port into sets.
 
     Operates in-place on the per-chain rule lists produced by
-    :class:`PrintRule_nft`.  Two adjacent entries are merged when their
-    rule lines are structurally identical except for the ``ip saddr`` or
-    ``ip daddr`` value.  The merged rule uses nftables anonymous set
-    syntax: ``ip saddr { addr1, addr2 } ...``.
+    :class:`PrintRule_nft`.  A rule is merged into an earlier rule of
+    the same original firewall rule when the two lines are the same
+    except for the values of one address or port match; the merged rule
+    uses nftables anonymous set syntax: ``ip saddr { addr1, addr2 } ...``,
+    ``tcp dport { 22, 443 } ...``.
+
+    The two need not be next to each other.  The later rule moves up to
+    the earlier one, which is only done when no packet it matches can
+    match any rule in between (see `_PrintedRule.disjoint`), so every
+    packet still meets the same rules in the same order.
 
     Rules are never merged across different comment blocks (i.e. across
-    different original firewall rules).  Only entries whose rule lines
-    share the same "signature" (everything except the address value) are
-    candidates.
+    different original firewall rules).
     """
     for chain, entries in chain_rules.items():
         chain_rules[chain] = _optimize_entries(entries)
 
 
 def _optimize_entries(entries: list[str]) -> list[str]:
-    """Merge consecutive entries that differ only in one address field."""
+    """Merge the entries of one chain that differ in one match."""
     if len(entries) <= 1:
         return entries
 
-    result: list[str] = []
-    i = 0
+    result: list[str | _PrintedRule] = []
+    # Where in *result* the current original rule starts.
+    block_start = 0
 
-    while i < len(entries):
-        comments_i, rule_i = _split_entry(entries[i])
-        parsed_i = _parse_addr(rule_i) if rule_i else None
-
-        if parsed_i is None:
-            # Not a mergeable rule — emit as-is.
-            result.append(entries[i])
-            i += 1
+    for entry in entries:
+        comments, rule_line = _split_entry(entry)
+        if comments or not rule_line:
+            # A comment block signals a different original rule.
+            block_start = len(result)
+        parsed = _parse_fields(rule_line, allow_state=True) if rule_line else None
+        if parsed is None:
+            result.append(entry)
             continue
+        rule = _PrintedRule(comments, rule_line, *parsed)
+
+        merged = False
+        if not comments:
+            for distance, earlier in enumerate(reversed(result[block_start:])):
+                if not isinstance(earlier, _PrintedRule):
+                    break
+                k = earlier.merge_index(rule, adjacent=not distance)
+                if k is not None:
+                    earlier.merge(k, rule)
+                    merged = True
+                    break
+                if not rule.disjoint(earlier):
+                    break
+        if not merged:
+            result.append(rule)
+
+    return [r.text() if isinstance(r, _PrintedRule) else r for r in result]
 
-        prefix_i, addr_i, suffix_i, field_i = parsed_i
-        signature = (prefix_i, suffix_i, field_i)
-        merged_addrs = list(_addrs_from_value(addr_i))
-        merged_comments = comments_i
-
-        # Look ahead for consecutive entries with the same signature.
-        # Stop at comment boundaries — a non-empty comment block marks
-        # a new original firewall rule and must not be merged.
-        j = i + 1
-        while j < len(entries):
-            comments_j, rule_j = _split_entry(entries[j])
-            if not rule_j:
-                break
 
-            # A comment block signals a different original rule.
-            if comments_j:
-                break
+# ═══════════════════════════════════════════════════════════════════
+# Post-processing: named sets for element lists many rules repeat
+# ═══════════════════════════════════════════════════════════════════
 
-            parsed_j = _parse_addr(rule_j)
-            if parsed_j is None:
-                break
+# An anonymous set of addresses or ports right after the field it matches:
+# "ip saddr { ... }", "ip6 daddr != { ... }", "tcp dport { ... }".  The
+# key of a meter or a connection limit sits inside braces of its own and
+# is followed by a statement rather than a set, so it never matches, and
+# neither does the last field of a concatenation ("ip saddr . tcp dport").
+_ANON_SET_RE = re.compile(
+    r'(?<!\. )\b(ip6?|tcp|udp|th) (saddr|daddr|sport|dport) (!= )?\{ ([^{}]+) \}'
+)
 
-            prefix_j, addr_j, suffix_j, field_j = parsed_j
-            if (prefix_j, suffix_j, field_j) != signature:
+_SET_TYPES = {
+    'ip': 'ipv4_addr',
+    'ip6': 'ipv6_addr',
+    'tcp': 'inet_service',
+    'udp': 'inet_service',
+    'th': 'inet_service',
+}
+
+
+def extract_named_sets(
+    chain_rules: dict[str, list[str]], threshold: int
+) -> dict[str, tuple[str, list[str]]]:
+    """Move element lists used by more than *threshold* rules into named sets.
+
+    A group expands into an anonymous set in every rule that names it, so
+    a group of thousands of addresses used by forty rules is written out
+    forty times, and nftables builds and keeps forty copies of it.  Every
+    anonymous set of addresses or ports that more than *threshold* rule
+    lines of *chain_rules* carry with the same elements is replaced by a
+    reference to one named set instead; the lists are rewritten in place.
+
+    *chain_rules* has to hold all chains of one table, because a named set
+    belongs to its table.  Returns the sets to declare in it, each name
+    mapped to its type and elements.  The name is derived from the
+    elements, so it stays the same from one compile to the next as long
+    as the group does.
+    """
+    if threshold <= 0:
+        return {}
+
+    uses: dict[tuple[str, frozenset], int] = {}
+    first_seen: dict[tuple[str, frozenset], list[str]] = {}
+    for entries in chain_rules.values():
+        for entry in entries:
+            for line in entry.split('\n'):
+                if line.lstrip().startswith('#'):
+                    continue
+                for m in _ANON_SET_RE.finditer(line):
+                    elements = [e.strip() for e in m.group(4).split(',')]
+                    key = (_SET_TYPES[m.group(1)], frozenset(elements))
+                    uses[key] = uses.get(key, 0) + 1
+                    first_seen.setdefault(key, elements)
+
+    names: dict[tuple[str, frozenset], str] = {}
+    sets: dict[str, tuple[str, list[str]]] = {}
+    for key, count in uses.items():
+        if count <= threshold:
+            continue
+        set_type, elements = key
+        digest = hashlib.sha256('\n'.join(sorted(elements)).encode('utf-8')).hexdigest()
+        prefix = 'ports' if set_type == 'inet_service' else 'addrs'
+        suffix = '_v6' if set_type == 'ipv6_addr' else ''
+        # Eight digits are enough to tell the lists of a table apart; two
+        # that still share them get longer names instead of one set.
+        for length in (8, 16, len(digest)):
+            name = f'{prefix}_{digest[:length]}{suffix}'
+            if name not in sets:
                 break
+        else:
+            raise ValueError(f'named set {name} stands for two element lists')
+        names[key] = name
+        sets[name] = (set_type, first_seen[key])
+    if not names:
+        return {}
+
+    def _reference(m: re.Match) -> str:
+        elements = [e.strip() for e in m.group(4).split(',')]
+        name = names.get((_SET_TYPES[m.group(1)], frozenset(elements)))
+        if name is None:
+            return m.group(0)
+        neg = m.group(3) or ''
+        return f'{m.group(1)} {m.group(2)} {neg}@{name}'
 
-            # Same signature, same original rule — collect addresses.
-            merged_addrs.extend(_addrs_from_value(addr_j))
-            j += 1
+    for chain, entries in chain_rules.items():
+        chain_rules[chain] = [
+            '\n'.join(
+                line
+                if line.lstrip().startswith('#')
+                else _ANON_SET_RE.sub(_reference, line)
+                for line in entry.split('\n')
+            )
+            for entry in entries
+        ]
+    return sets
 
-        # Build the merged entry.
-        addr_value = _build_addr_value(merged_addrs)
-        merged_rule = f'{prefix_i}{addr_value}{suffix_i}'
-        merged_text = merged_comments + merged_rule + '\n'
-        result.append(merged_text)
-        i = j
 
-    return result
+# ═══════════════════════════════════════════════════════════════════
+# Post-processing: interface dispatch through verdict maps
+# ═══════════════════════════════════════════════════════════════════
+
+# A rule bound to exactly one interface by name, with the name captured and
+# the rest of the rule after it.  A wildcard ("eth*"), a negation or a set
+# of interfaces does not qualify: a packet can match more than one of those.
+_IFACE_RULE_RE = re.compile(r'^(\s*)(iifname|oifname) "([^"*\\]+)" (.+)$')
+
+# A verdict that means something else in a chain reached by a jump: "return"
+# in a hooked chain applies the policy, in a jumped-to chain it resumes the
+# caller, and "goto" would not come back to the dispatch rule either.
+_NON_LOCAL_VERDICT_RE = re.compile(r'\b(return|goto)\b')
+
+
+def dispatch_by_interface(
+    rules: str, chain: str, field: str, taken: set[str]
+) -> tuple[str, dict[str, str]]:
+    """Dispatch the interface-bound rules of *chain* through verdict maps.
+
+    Every rule of a hooked chain carries its own ``iifname``/``oifname``
+    match, so every packet walks the rules of every interface.  A run of
+    consecutive rules that each match one interface by name (*field*) is
+    moved into one chain per interface, and the run is replaced by a
+    single ``iifname vmap { "eth0" : jump input_eth0, ... }`` rule.
+
+    Order is kept: a packet can only be on one interface, so rules of
+    different interfaces inside a run never both match it and may be
+    regrouped, and a rule of any interface ends the run, so it is
+    evaluated exactly where it was.  A jumped-to chain that reaches its
+    end without a verdict returns to the rule after the dispatch, which
+    is where the rules of the run would have left the packet.  A rule
+    with ``return`` or ``goto`` ends the run as well.
+
+    *taken* holds the chain names in use in the table and is extended by
+    the names given out here.  Returns the rewritten rules of *chain* and
+    the new chains, each name mapped to its rules.
+    """
+    out: list[str] = []
+    chains: dict[str, str] = {}
+    run: dict[str, list[str]] = {}
+    run_original: list[str] = []
+    run_indent = ''
+    run_rules = 0
+    pending: list[str] = []
+
+    def _flush_run() -> None:
+        nonlocal run, run_original, run_rules
+        if run_rules < 2:
+            # Not worth a lookup; put the rules back as they were.
+            out.extend(run_original)
+        else:
+            entries = []
+            for iface, lines in run.items():
+                name = nft_object_name(f'{chain}_{iface}')
+                base, n = name, 1
+                while name in taken:
+                    n += 1
+                    name = f'{base}_{n}'
+                taken.add(name)
+                chains[name] = ''.join(lines)
+                entries.append(f'"{iface}" : jump {name}')
+            out.append(f'{run_indent}{field} vmap {{ {", ".join(entries)} }}\n')
+        run = {}
+        run_original = []
+        run_rules = 0
+
+    for line in rules.splitlines(keepends=True):
+        stripped = line.strip()
+        if not stripped or stripped.startswith('#'):
+            pending.append(line)
+            continue
+        m = _IFACE_RULE_RE.match(line.rstrip('\n'))
+        if (
+            m is None
+            or m.group(2) != field
+            or field in m.group(4)
+            or _NON_LOCAL_VERDICT_RE.search(m.group(4))
+        ):
+            # Anything else ends the run and stays where it is; the
+            # comments in front of it belong to it.
+            _flush_run()
+            out.extend(pending)
+            pending = []
+            out.append(line)
+            continue
+        indent, _field, iface, rest = m.groups()
+        if not run:
+            run_indent = indent
+        run.setdefault(iface, []).extend(pending)
+        run[iface].append(f'{indent}{rest}\n')
+        run_original.extend(pending)
+        run_original.append(line)
+        run_rules += 1
+        pending = []
+    _flush_run()
+    out.extend(pending)
+    return ''.join(out), chains
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Post-processing: fold the rules of one original rule into one
+# ═══════════════════════════════════════════════════════════════════
+
+
+def _fold_group(rule_line: str, group: list[list[re.Match]]) -> str | None:
+    """Write the rules of *group* as one rule, or return ``None``.
+
+    Every member has the signature of *rule_line*, so the members differ
+    only in the values of their matches.  One match that varies becomes
+    an anonymous set of all its values; several become one concatenation
+    of those fields holding every combination the members match.
+    """
+    first = group[0]
+    varying = [
+        k
+        for k in range(len(first))
+        if len({members[k].group(4) for members in group}) > 1
+    ]
+    if not varying or any(first[k].group(3) for k in varying):
+        # Duplicates are not this pass's business, and "not a" or "not b"
+        # is not "not in { a, b }".
+        return None
+
+    elements: list[str] = []
+    for members in group:
+        combos = [[]]
+        for k in varying:
+            combos = [
+                [*combo, value]
+                for combo in combos
+                for value in _addrs_from_value(members[k].group(4))
+            ]
+        for combo in combos:
+            element = ' . '.join(combo)
+            if element not in elements:
+                elements.append(element)
+
+    if len(varying) == 1:
+        k = varying[0]
+        replacement = f'{first[k].group(1)} {first[k].group(2)} ' + (
+            _build_addr_value(elements)
+        )
+    else:
+        keys = ' . '.join(f'{first[k].group(1)} {first[k].group(2)}' for k in varying)
+        replacement = f'{keys} {{ {", ".join(elements)} }}'
+
+    out = []
+    pos = 0
+    for k, m in enumerate(first):
+        out.append(rule_line[pos : m.start()])
+        pos = m.end()
+        if k == varying[0]:
+            out.append(replacement)
+        elif k in varying:
+            # The concatenation matches this field; drop it and its space.
+            if rule_line.startswith(' ', pos):
+                pos += 1
+        else:
+            out.append(m.group(0))
+    out.append(rule_line[pos:])
+    return ''.join(out)
+
+
+def fold_concatenations(
+    chain_rules: dict[str, list[str]],
+) -> dict[str, tuple[int, int]]:
+    """Fold the rules one original rule was split into into one rule.
+
+    A rule with several sources and services is split into one nft rule
+    per combination the printer cannot write as one line, for instance
+    one per service when each goes to another destination.  Consecutive
+    rules of the same original rule that differ only in the values of
+    their address and port matches become one rule: with one match
+    varying, its values go into an anonymous set, the way
+    `optimize_chain_rules` merges addresses; with several, they become a
+    concatenation such as ``ip saddr . tcp dport { a . 22, b . 443 }``
+    holding exactly the combinations the rules matched.
+
+    Rules are never folded across a comment block, nor when a varying
+    match is negated, nor when the rules keep per-rule state (a rate
+    limit, a quota, a meter).  Operates in place and returns, per chain
+    that changed, the number of rules before and after.
+    """
+    report = {}
+    for chain, entries in chain_rules.items():
+        result: list[str] = []
+        folded_any = False
+        i = 0
+        while i < len(entries):
+            comments_i, rule_i = _split_entry(entries[i])
+            parsed_i = _parse_fields(rule_i) if rule_i else None
+            if parsed_i is None:
+                result.append(entries[i])
+                i += 1
+                continue
+            signature, first = parsed_i
+            group = [first]
+            j = i + 1
+            while j < len(entries):
+                comments_j, rule_j = _split_entry(entries[j])
+                if not rule_j or comments_j:
+                    break
+                parsed_j = _parse_fields(rule_j)
+                if parsed_j is None or parsed_j[0] != signature:
+                    break
+                group.append(parsed_j[1])
+                j += 1
+            folded = _fold_group(rule_i, group) if len(group) > 1 else None
+            if folded is None:
+                result.append(entries[i])
+                i += 1
+                continue
+            result.append(f'{comments_i}{folded}\n')
+            folded_any = True
+            i = j
+        if folded_any:
+            report[chain] = (len(entries), len(result))
+            chain_rules[chain] = result
+    return report
@@ -48,7 +48,7 @@ def _get_db(fixture_path: Path) -> firewallfabrik.core.DatabaseManager:
     """Return a DatabaseManager loaded from a cached in-memory SQLite snapshot.
 
     The fixture file is parsed once and its database serialized via
-    ``sqlite3.Connection.serialize()``.  Each call creates a fresh
+    ``DatabaseManager.serialize()``.  Each call creates a fresh
     DatabaseManager and restores the snapshot with ``deserialize()``
     so that every test is fully isolated.
     """
@@ -56,16 +56,11 @@ def _get_db(fixture_path: Path) -> firewallfabrik.core.DatabaseManager:
     if resolved not in _db_cache:
         db = firewallfabrik.core.DatabaseManager()
         db.load(str(fixture_path))
-        conn = db.engine.raw_connection()
-        snapshot = conn.dbapi_connection.serialize()
-        conn.close()
-        _db_cache[resolved] = (snapshot, db.ref_index)
+        _db_cache[resolved] = (db.serialize(), db.ref_index)
 
     snapshot, ref_index = _db_cache[resolved]
     copy = firewallfabrik.core.DatabaseManager()
-    conn = copy.engine.raw_connection()
-    conn.dbapi_connection.deserialize(snapshot)
-    conn.close()
+    copy.deserialize(snapshot)
     copy.ref_index = ref_index
     return copy
 
@@ -0,0 +1,139 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""A compile-time Address Table is read once per file and address family.
+
+Every compiler that meets the table asks for it, so the second and every
+later compiler of a compile must get the objects the first one built, and
+a file that changed in between must be read again rather than answered
+from memory.  Only the plain addresses outlive the compile.
+"""
+
+import os
+import types
+
+import pytest
+
+from firewallfabrik.compiler import _address_table
+from firewallfabrik.compiler._address_table import (
+    TableAddress,
+    address_table_objects,
+    clear_address_tables,
+    load_address_table,
+    read_address_table,
+)
+
+
+@pytest.fixture(autouse=True)
+def _empty_cache():
+    clear_address_tables()
+    yield
+    clear_address_tables()
+
+
+def _write(path, text):
+    path.write_text(text)
+    return path
+
+
+def test_lines_are_read_the_way_the_cpp_compiler_reads_them(tmp_path):
+    path = _write(
+        tmp_path / 'blocked.txt',
+        '# comment\n'
+        '\n'
+        '  192.0.2.1   # a host\n'
+        '198.51.100.7/24\n'
+        '2001:db8::/32\n'
+        'Xnot-an-address\n',
+    )
+    assert list(read_address_table(path, ipv6=False)) == [
+        TableAddress('192.0.2.1', '192.0.2.1', '255.255.255.255'),
+        TableAddress('198.51.100.7/24', '198.51.100.0', '255.255.255.0'),
+    ]
+    assert list(read_address_table(path, ipv6=True)) == [
+        TableAddress('2001:db8::/32', '2001:db8::', 'ffff:ffff::'),
+    ]
+
+
+def _session():
+    return types.SimpleNamespace(info={})
+
+
+def test_a_second_load_returns_the_same_addresses(tmp_path):
+    path = _write(tmp_path / 'blocked.txt', '192.0.2.1\n192.0.2.0/24\n')
+    addresses, error = load_address_table(path, ipv6=False)
+    assert error is None
+    again, _error = load_address_table(path, ipv6=False)
+    assert again is addresses
+
+
+def test_the_compilers_of_one_compile_share_the_objects(tmp_path):
+    path = _write(tmp_path / 'blocked.txt', '192.0.2.1\n192.0.2.0/24\n')
+    session = _session()
+    objects, error = address_table_objects(session, path, ipv6=False)
+    assert error is None
+    assert [o.inet_addr_mask for o in objects] == [
+        {'address': '192.0.2.1', 'netmask': '255.255.255.255'},
+        {'address': '192.0.2.0', 'netmask': '255.255.255.0'},
+    ]
+    assert address_table_objects(session, path, ipv6=False)[0] is objects
+    assert address_table_objects(_session(), path, ipv6=False)[0] is not objects
+
+
+def test_only_the_addresses_outlive_a_compile(tmp_path):
+    path = _write(tmp_path / 'blocked.txt', '192.0.2.1\n')
+    address_table_objects(_session(), path, ipv6=False)
+    [table] = _address_table._tables.values()
+    assert all(type(a) is TableAddress for a in table.addresses)
+
+
+def test_only_the_last_tables_are_kept(tmp_path):
+    paths = [
+        _write(tmp_path / f'{i}.txt', '192.0.2.1\n')
+        for i in range(_address_table._MAX_TABLES + 1)
+    ]
+    for path in paths:
+        load_address_table(path, ipv6=False)
+    load_address_table(paths[1], ipv6=False)
+    load_address_table(paths[-1], ipv6=False)
+    kept = {path for path, _ipv6 in _address_table._tables}
+    assert len(kept) == _address_table._MAX_TABLES
+    assert str(paths[0].resolve()) not in kept
+    assert str(paths[1].resolve()) in kept
+
+
+def test_each_address_family_is_kept_on_its_own(tmp_path):
+    path = _write(tmp_path / 'blocked.txt', '192.0.2.1\n2001:db8::1\n')
+    session = _session()
+    ipv4, _error = address_table_objects(session, path, ipv6=False)
+    ipv6, _error = address_table_objects(session, path, ipv6=True)
+    assert [o.type for o in ipv4] == ['Network']
+    assert [o.type for o in ipv6] == ['NetworkIPv6']
+
+
+def test_a_changed_file_is_read_again(tmp_path):
+    path = _write(tmp_path / 'blocked.txt', '192.0.2.1\n')
+    session = _session()
+    before, _error = address_table_objects(session, path, ipv6=False)
+    _write(path, '192.0.2.1\n192.0.2.2\n')
+    # Same size on a coarse clock would still be caught by the mtime.
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 1_000_000_000))
+    after, _error = address_table_objects(session, path, ipv6=False)
+    assert after is not before
+    assert [o.name for o in after] == ['192.0.2.1', '192.0.2.2']
+
+
+def test_a_bad_line_is_reported_with_the_addresses_before_it(tmp_path):
+    path = _write(tmp_path / 'blocked.txt', '192.0.2.1\n192.0.2.300\n192.0.2.3\n')
+    addresses, error = load_address_table(path, ipv6=False)
+    assert [a.name for a in addresses] == ['192.0.2.1']
+    assert (error.line_num, error.value) == (2, '192.0.2.300')
@@ -0,0 +1,167 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Overlapping and adjacent addresses of an element are merged.
+
+With ``aggregate_addresses`` on, an element holding 10.0.0.0/25 and
+10.0.0.128/25 becomes 10.0.0.0/24, and a host inside a network of the same
+element goes away, so the printed rule carries fewer matches.  The element
+must match exactly the packets it matched before, and a negated element
+must be left alone: merging the addresses of "not these" changes nothing
+about what it matches, but it is not worth the risk of getting it wrong.
+"""
+
+import ipaddress
+import uuid
+
+from firewallfabrik.compiler._comp_rule import CompRule
+from firewallfabrik.compiler._rule_processor import BasicRuleProcessor
+from firewallfabrik.compiler.processors._generic import (
+    AggregateAddresses,
+    aggregate_addresses,
+)
+from firewallfabrik.core.objects import (
+    AddressRange,
+    IPv4,
+    Network,
+    NetworkIPv6,
+    PolicyAction,
+)
+
+
+def _net(cidr):
+    net = ipaddress.ip_network(cidr)
+    cls = NetworkIPv6 if net.version == 6 else Network
+    return cls(
+        id=uuid.uuid4(),
+        name=cidr,
+        inet_addr_mask={
+            'address': str(net.network_address),
+            'netmask': str(net.netmask),
+        },
+    )
+
+
+def _host(address):
+    return IPv4(
+        id=uuid.uuid4(),
+        name=address,
+        inet_addr_mask={'address': address, 'netmask': '255.255.255.255'},
+    )
+
+
+def _range(start, end):
+    return AddressRange(
+        id=uuid.uuid4(),
+        name=f'{start}-{end}',
+        start_address={'address': start},
+        end_address={'address': end},
+    )
+
+
+def _cidrs(elements):
+    return [
+        f'{o.get_address()}/{o.inet_addr_mask["netmask"]}'
+        if isinstance(o, (Network, NetworkIPv6))
+        else o.name
+        for o in elements
+    ]
+
+
+def test_two_halves_become_one_network():
+    merged = aggregate_addresses([_net('10.0.0.0/25'), _net('10.0.0.128/25')])
+    assert _cidrs(merged) == ['10.0.0.0/255.255.255.0']
+
+
+def test_a_host_inside_a_network_goes_away_and_the_network_stays():
+    network = _net('192.0.2.0/24')
+    merged = aggregate_addresses([_host('192.0.2.7'), network])
+    assert merged == [network]
+
+
+def test_addresses_that_do_not_touch_are_left_as_they_are():
+    elements = [_net('10.0.0.0/25'), _net('10.1.0.0/25'), _host('192.0.2.1')]
+    assert aggregate_addresses(elements) == elements
+
+
+def test_a_run_is_not_replaced_by_more_blocks_than_it_had():
+    """192.0.2.1-6 and .7 touch, but need three CIDR blocks together."""
+    elements = [_range('192.0.2.1', '192.0.2.6'), _host('192.0.2.7')]
+    assert aggregate_addresses(elements) == elements
+
+
+def test_families_are_never_merged_with_one_another():
+    elements = [_net('10.0.0.0/8'), _net('2001:db8::/32')]
+    assert aggregate_addresses(elements) == elements
+
+
+def test_what_does_not_take_part_keeps_its_place():
+    other = _net('0.0.0.0/0')
+    merged = aggregate_addresses([_net('10.0.0.0/25'), other, _net('10.0.0.128/25')])
+    assert merged[1] is other
+    assert _cidrs(merged) == ['10.0.0.0/255.255.255.0', '0.0.0.0/0.0.0.0']
+
+
+class _Feeder(BasicRuleProcessor):
+    def __init__(self, rules):
+        super().__init__(name='Feeder')
+        self.tmp_queue.extend(rules)
+
+    def process_next(self) -> bool:
+        return False
+
+
+class _Compiler:
+    verbose = True
+
+    def __init__(self):
+        self.messages = []
+
+    def info(self, msg):
+        self.messages.append(msg)
+
+
+def _run(src, negations=None):
+    rule = CompRule(
+        id=uuid.uuid4(),
+        type='PolicyRule',
+        position=1,
+        label='1',
+        comment='',
+        options={},
+        negations=negations or {},
+        action=PolicyAction.Accept,
+        src=src,
+    )
+    compiler = _Compiler()
+    proc = AggregateAddresses('aggregate addresses in Src', 'src')
+    proc.set_context(compiler)
+    proc.set_data_source(_Feeder([rule]))
+    out = []
+    while (r := proc.get_next_rule()) is not None:
+        out.append(r)
+    return out, compiler.messages
+
+
+def test_the_processor_merges_and_says_how_many_went():
+    out, messages = _run(
+        [_net('10.0.0.0/25'), _net('10.0.0.128/25'), _host('10.0.0.1')]
+    )
+    assert _cidrs(out[0].src) == ['10.0.0.0/255.255.255.0']
+    assert messages == [' aggregate addresses in Src: 2 addresses merged away']
+
+
+def test_a_negated_element_is_left_alone():
+    src = [_net('10.0.0.0/25'), _net('10.0.0.128/25')]
+    out, messages = _run(list(src), negations={'src': True})
+    assert out[0].src == src
+    assert messages == []
@@ -0,0 +1,104 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""A loaded file is inserted with plain executemany statements.
+
+`DatabaseManager._import` used to add the parsed object graph to a
+session and let the unit of work flush it object by object. It now
+inserts the rows `ParseResult.table_rows` returns, which must leave the
+very same rows, in the very same order, in every table.
+"""
+
+import itertools
+import uuid
+
+import pytest
+
+import firewallfabrik.core
+from firewallfabrik.core import objects
+from firewallfabrik.core._util import ParseResult
+
+from .conftest import FIXTURES_DIR
+
+
+class _FlushingDatabaseManager(firewallfabrik.core.DatabaseManager):
+    """Imports the way it was done before, through the unit of work."""
+
+    def _import_rows(self, data):
+        with self.session() as session:
+            session.add(data.database)
+            session.flush()
+            if data.memberships:
+                session.execute(objects.group_membership.insert(), data.memberships)
+            if data.rule_element_rows:
+                session.execute(objects.rule_elements.insert(), data.rule_element_rows)
+
+
+def _tables(db):
+    connection = db.engine.raw_connection()
+    try:
+        return {
+            table.name: connection.execute(
+                f'SELECT rowid, * FROM {table.name} ORDER BY rowid'  # nosec B608
+            ).fetchall()
+            for table in objects.Base.metadata.sorted_tables
+        }
+    finally:
+        connection.close()
+
+
+def _load(manager, path, monkeypatch):
+    # What the file has no id for gets a new one; the same in both loads.
+    ids = itertools.count(1)
+    monkeypatch.setattr(uuid, 'uuid4', lambda: uuid.UUID(int=next(ids)))
+    db = manager()
+    db.load(str(path))
+    return _tables(db)
+
+
+@pytest.mark.parametrize(
+    'fixture',
+    ['objects-for-regression-tests.fwb', 'cluster-tests.fwb', 'compiler-tests.fwf'],
+)
+def test_the_rows_are_those_a_flush_writes(fixture, monkeypatch):
+    path = FIXTURES_DIR / fixture
+    flushed = _load(_FlushingDatabaseManager, path, monkeypatch)
+    inserted = _load(firewallfabrik.core.DatabaseManager, path, monkeypatch)
+
+    assert inserted == flushed
+    assert inserted['groups']
+    assert inserted['rule_elements']
+
+
+def test_the_rows_are_complete_and_parents_come_first():
+    db = objects.FWObjectDatabase(id=uuid.uuid4(), name='db')
+    lib = objects.Library(id=uuid.uuid4(), name='lib', database=db)
+    # The child is created first.
+    child = objects.ObjectGroup(id=uuid.uuid4(), name='child', library=lib)
+    parent = objects.ObjectGroup(id=uuid.uuid4(), name='parent', library=lib)
+    child.parent_group = parent
+
+    rows = ParseResult(db, [], []).table_rows()
+
+    groups = rows[objects.Group.__table__]
+    assert [row['name'] for row in groups] == ['parent', 'child']
+    below = groups[1]
+    assert below['parent_group_id'] == parent.id
+    assert below['library_id'] == lib.id
+    assert below['type'] == 'ObjectGroup'
+    assert below['keywords'] == set()
+    assert below['comment'] == ''
+    assert list(rows) == [
+        objects.FWObjectDatabase.__table__,
+        objects.Library.__table__,
+        objects.Group.__table__,
+    ]
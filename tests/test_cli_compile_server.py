@@ -0,0 +1,113 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""`fwf-compile-server` answers a request the way the CLI answers its command line.
+
+The compile dialog hands every selected firewall to one server instead
+of starting `fwf-ipt` / `fwf-nft` per firewall. That is only safe if a
+request produces the same script and the same exit code the command
+line it stands for would have produced, whether the server compiles
+inline or in worker processes, and if a request the server cannot make
+sense of fails on its own instead of taking the server down.
+"""
+
+import io
+import json
+
+import pytest
+
+from firewallfabrik.cli import fwf_compile_server, fwf_ipt
+
+from .conftest import FIXTURES_DIR
+
+_FIXTURE = FIXTURES_DIR / 'compiler-tests.fwf'
+
+
+def _serve(monkeypatch, capsys, requests, jobs=1):
+    stdin = ''.join(
+        (r if isinstance(r, str) else json.dumps(r)) + '\n' for r in requests
+    )
+    monkeypatch.setattr('sys.stdin', io.StringIO(stdin))
+    rc = fwf_compile_server.main(['-f', str(_FIXTURE), '-j', str(jobs)])
+    messages = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    results = {}
+    for message in messages:
+        entry = results.setdefault(message.get('id'), {'lines': []})
+        if message['event'] == 'output':
+            entry['lines'].append(message['line'])
+        elif message['event'] == 'finished':
+            entry['exit_code'] = message['exit_code']
+    return rc, results
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_server_matches_cli(tmp_path, monkeypatch, capsys, jobs):
+    cli_dir = tmp_path / 'cli'
+    srv_dir = tmp_path / 'server'
+    cli_dir.mkdir()
+    srv_dir.mkdir()
+    cli_codes = {
+        name: fwf_ipt.main(['-f', str(_FIXTURE), '-d', str(cli_dir), name])
+        for name in ('fw-logging', 'fw-nat')
+    }
+    capsys.readouterr()
+
+    rc, results = _serve(
+        monkeypatch,
+        capsys,
+        [
+            {'id': name, 'platform': 'iptables', 'args': [name, '-d', str(srv_dir)]}
+            for name in cli_codes
+        ],
+        jobs=jobs,
+    )
+
+    assert rc == 0
+    assert {name: results[name]['exit_code'] for name in cli_codes} == cli_codes
+    assert any(line.startswith('Error: ') for line in results['fw-nat']['lines'])
+    for name in cli_codes:
+        assert (srv_dir / f'{name}.fw').read_text() == (
+            cli_dir / f'{name}.fw'
+        ).read_text()
+
+
+def test_bad_requests_fail_alone(tmp_path, monkeypatch, capsys):
+    rc, results = _serve(
+        monkeypatch,
+        capsys,
+        [
+            'not json',
+            {'id': 'pf', 'platform': 'pf', 'args': []},
+            {'id': 'opt', 'platform': 'iptables', 'args': ['--no-such-option']},
+            {
+                'id': 'ok',
+                'platform': 'iptables',
+                'args': ['fw-logging', '-d', str(tmp_path)],
+            },
+        ],
+    )
+
+    assert rc == 0
+    assert results[None]['exit_code'] == 2
+    assert results['pf']['exit_code'] == 2
+    assert results['opt']['exit_code'] == 2
+    assert results['ok']['exit_code'] == 0
+
+
+def test_unloadable_file_is_reported(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr('sys.stdin', io.StringIO(''))
+    rc = fwf_compile_server.main(['-f', str(tmp_path / 'missing.fwf')])
+
+    assert rc == 1
+    message = json.loads(capsys.readouterr().out)
+    assert message['event'] == 'error'
+    assert 'missing.fwf' in message['message']
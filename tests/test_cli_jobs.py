@@ -0,0 +1,62 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""``--jobs`` compiles in worker processes and changes nothing else.
+
+`fwf-ipt --all -j N` hands every firewall to a process pool whose
+workers restore the loaded database from an SQLite image. A build that
+switches from a sequential run to a parallel one must get the same
+scripts, the same messages in the same order and the same exit code,
+or the option is not safe to turn on in a pipeline that diffs the
+output.
+"""
+
+import re
+
+from firewallfabrik.cli import fwf_ipt
+
+from .conftest import FIXTURES_DIR
+
+_FIXTURE = FIXTURES_DIR / 'compiler-tests.fwf'
+
+
+def _run(tmp_path, capsys, jobs):
+    destdir = tmp_path / f'jobs-{jobs}'
+    destdir.mkdir()
+    rc = fwf_ipt.main(
+        ['-f', str(_FIXTURE), '--all', '-d', str(destdir), '-j', str(jobs)],
+    )
+    err = capsys.readouterr().err
+    # Object IDs are regenerated on every load and the compile time differs
+    # from run to run; everything else has to match.
+    err = re.sub(r'\(id: [0-9a-f-]+\)', '(id)', err)
+    err = re.sub(r'^Compile time: .*$', '', err, flags=re.MULTILINE)
+    scripts = {p.name: p.read_text() for p in sorted(destdir.iterdir())}
+    return rc, err, scripts
+
+
+def test_parallel_compile_matches_sequential(tmp_path, capsys):
+    seq_rc, seq_err, seq_scripts = _run(tmp_path, capsys, 1)
+    par_rc, par_err, par_scripts = _run(tmp_path, capsys, 3)
+
+    assert len(seq_scripts) > 3
+    assert par_rc == seq_rc
+    assert par_err == seq_err
+    assert par_scripts == seq_scripts
+
+
+def test_jobs_below_one_is_refused(tmp_path, capsys):
+    rc = fwf_ipt.main(['-f', str(_FIXTURE), '--all', '-d', str(tmp_path), '-j', '0'])
+
+    assert rc == 1
+    assert '--jobs must be at least 1' in capsys.readouterr().err
+    assert not any(tmp_path.iterdir())
@@ -0,0 +1,93 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Compiling a firewall leaves the database and its undo history alone.
+
+Both drivers work inside ``DatabaseManager.read_session()``: nothing the
+compiler builds on the way - the addresses a DNS Name or an Address
+Table resolves to, the objects a preprocessor adds - is flushed, and the
+transaction is rolled back at the end. A compile that wrote to the
+database would push an undo state the user never made, mark the file as
+modified and, worse, could leave its working objects in the policy the
+next compile reads.
+"""
+
+import tempfile
+import uuid
+
+import pytest
+import sqlalchemy
+
+import firewallfabrik.core
+from firewallfabrik.core.objects import Firewall, IPv4
+from firewallfabrik.platforms.iptables._compiler_driver import CompilerDriver_ipt
+from firewallfabrik.platforms.nftables._compiler_driver import CompilerDriver_nft
+
+from .conftest import FIXTURES_DIR
+
+_FIXTURE = FIXTURES_DIR / 'compiler-tests.fwf'
+
+
+def _dump(db):
+    connection = db.engine.raw_connection()
+    try:
+        return list(connection.iterdump())
+    finally:
+        connection.close()
+
+
+@pytest.fixture(scope='module')
+def loaded_db():
+    db = firewallfabrik.core.DatabaseManager()
+    db.load(str(_FIXTURE))
+    return db
+
+
+@pytest.mark.parametrize('driver_class', [CompilerDriver_ipt, CompilerDriver_nft])
+def test_compiling_every_firewall_writes_nothing(loaded_db, driver_class):
+    db = loaded_db
+    with db.read_session() as session:
+        fw_ids = [str(fw.id) for fw in session.scalars(sqlalchemy.select(Firewall))]
+    history = db.get_history()
+    before = _dump(db)
+
+    with tempfile.TemporaryDirectory() as wdir:
+        for fw_id in fw_ids:
+            driver = driver_class(db)
+            driver.wdir = wdir
+            driver.source_dir = str(_FIXTURE.parent)
+            driver.run(cluster_id='', fw_id=fw_id, single_rule_id='')
+
+    assert db.get_history() == history
+    assert not db.is_dirty
+    assert _dump(db) == before
+
+
+def test_read_session_discards_what_it_was_given(loaded_db):
+    db = loaded_db
+    history = db.get_history()
+    with db.read_session() as session:
+        fw = session.scalars(sqlalchemy.select(Firewall)).first()
+        fw_id = fw.id
+        fw.comment = 'changed while compiling'
+        session.add(IPv4(id=uuid.uuid4(), name='transient', library_id=fw.library_id))
+        session.flush()
+
+    with db.read_session() as session:
+        assert session.get(Firewall, fw_id).comment != 'changed while compiling'
+        assert (
+            session.scalars(
+                sqlalchemy.select(IPv4).where(IPv4.name == 'transient')
+            ).first()
+            is None
+        )
+    assert db.get_history() == history
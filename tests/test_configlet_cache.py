@@ -0,0 +1,84 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""A configlet is parsed once per process and expanded in one pass.
+
+The compilers create a `Configlet` dozens of times per firewall, several of
+them per rule, and `expand` used to rescan and copy the whole text once per
+variable and once per ``{{if}}`` block.  With the rule set injected as one
+multi-megabyte variable that grew with the square of its size.
+"""
+
+import os
+
+from firewallfabrik.driver import _configlet
+from firewallfabrik.driver._configlet import Configlet
+
+
+def _write(path, text, mtime_ns):
+    path.write_text(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_the_file_is_parsed_once(tmp_path):
+    path = tmp_path / 'greeting'
+    _write(path, 'hello {{$name}}', 1_000_000_000)
+
+    first = Configlet('x', str(path))
+    first.set_variable('name', 'world')
+    assert first.expand() == 'hello world'
+    template = first._template()
+
+    second = Configlet('x', str(path))
+    second.set_variable('name', 'there')
+    assert second._template() is template
+    assert second.expand() == 'hello there'
+
+
+def test_a_changed_file_is_read_again(tmp_path):
+    path = tmp_path / 'greeting'
+    _write(path, 'hello {{$name}}', 1_000_000_000)
+    Configlet('x', str(path)).expand()
+
+    _write(path, 'goodbye {{$name}}', 2_000_000_000)
+    configlet = Configlet('x', str(path))
+    configlet.set_variable('name', 'world')
+    assert configlet.expand() == 'goodbye world'
+
+
+def test_the_blocks_nest_innermost_first(tmp_path):
+    path = tmp_path / 'blocks'
+    path.write_text(
+        '{{if a}}\nA {{if b}} B {{endif}}\n{{endif}}\n'
+        '{{if c}}gone{{endif}}done {{$missing}} {{endif}}'
+    )
+    configlet = Configlet('x', str(path))
+    configlet.set_variable('a', True)
+    configlet.set_variable('b', 'yes')
+    assert configlet.expand() == '\nA B\n\ndone {{missing}} {{endif}}'
+
+
+def test_a_value_is_inserted_as_it_is(tmp_path):
+    path = tmp_path / 'script'
+    path.write_text('{{if filter}}\n{{$filter_script}}\n{{endif}}')
+    value = 'rule {{$x}} {{if y}}\n' * 100_000
+
+    configlet = Configlet('x', str(path))
+    configlet.set_variable('filter', True)
+    configlet.set_variable('filter_script', value)
+    assert configlet.expand() == '\n' + value.strip() + '\n'
+
+
+def test_a_missing_configlet_expands_to_nothing(tmp_path):
+    _configlet._sources.clear()
+    configlet = Configlet('x', str(tmp_path / 'nowhere'))
+    assert configlet.expand() == ''
@@ -0,0 +1,138 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Compile-time DNS Names are resolved up front, together, and once.
+
+The driver hands every compiler of a run the same `DNSCache` and fills it
+before the first compiler starts, with all lookups in flight at the same
+time. A name that hangs must not hold up the compile beyond the timeout,
+a name that does not resolve must say so instead of raising, and the
+answers kept in a file must only be used while they are younger than
+their TTL. All of it
+runs against a stub resolver, so none of it needs a network.
+"""
+
+import socket
+import threading
+
+import sqlalchemy
+
+from firewallfabrik.compiler._dns import DNSCache
+from firewallfabrik.core.objects import Firewall
+from firewallfabrik.platforms.iptables._compiler_driver import CompilerDriver_ipt
+
+from .conftest import FIXTURES_DIR, _get_db
+
+
+class _StubResolver:
+    def __init__(self, answers, barrier=None, hang=None):
+        self.answers = answers
+        self.barrier = barrier
+        self.hang = hang
+        self.calls = []
+
+    def __call__(self, name, family):
+        self.calls.append((name, family))
+        if self.barrier is not None:
+            self.barrier.wait(timeout=5)
+        if self.hang is not None and name == 'hangs.example':
+            self.hang.wait(timeout=5)
+        if name not in self.answers:
+            raise socket.gaierror(socket.EAI_NONAME, 'Name or service not known')
+        return self.answers[name]
+
+
+def test_names_are_resolved_together_and_once():
+    names = [f'host{n}.example' for n in range(8)]
+    # Every lookup waits until all eight are in flight: resolved one
+    # after the other, the first would never get past the barrier.
+    resolver = _StubResolver(
+        {name: ['192.0.2.1', '192.0.2.1', '192.0.2.2'] for name in names},
+        barrier=threading.Barrier(len(names)),
+    )
+    cache = DNSCache(resolver, timeout=10)
+    cache.resolve_all((name, socket.AF_INET) for name in names)
+
+    answer = cache.lookup('host3.example', socket.AF_INET)
+    assert answer.addresses == ('192.0.2.1', '192.0.2.2')
+    assert answer.error is None
+    assert len(resolver.calls) == len(names)
+
+
+def test_a_failure_and_a_hang_are_answers_too():
+    hang = threading.Event()
+    resolver = _StubResolver({'hangs.example': ['192.0.2.9']}, hang=hang)
+    cache = DNSCache(resolver, timeout=0.2)
+    try:
+        cache.resolve_all(
+            [('hangs.example', socket.AF_INET), ('missing.example', socket.AF_INET)]
+        )
+        assert cache.lookup('missing.example', socket.AF_INET).error == (
+            'DNS lookup failed'
+        )
+        assert cache.lookup('hangs.example', socket.AF_INET).error == (
+            'DNS lookup timed out after 0.2 seconds'
+        )
+        assert len(resolver.calls) == 2
+    finally:
+        hang.set()
+
+
+def test_answers_kept_in_a_file_are_used_while_fresh(tmp_path):
+    path = tmp_path / 'dns.json'
+    first = _StubResolver({'host.example': ['2001:db8::1']})
+    DNSCache(first, path=path).resolve_all(
+        [('host.example', socket.AF_INET6), ('missing.example', socket.AF_INET6)]
+    )
+
+    offline = _StubResolver({})
+    cache = DNSCache(offline, path=path)
+    assert cache.lookup('host.example', socket.AF_INET6).addresses == ('2001:db8::1',)
+    # a failure is not kept: it is asked again
+    assert cache.lookup('missing.example', socket.AF_INET6).error
+    assert offline.calls == [('missing.example', socket.AF_INET6)]
+
+    expired = DNSCache(offline, path=path, ttl=0)
+    assert expired.lookup('host.example', socket.AF_INET6).error
+
+
+def test_the_driver_resolves_before_it_compiles(tmp_path):
+    fixture = FIXTURES_DIR / 'compiler-tests.fwf'
+    db = _get_db(fixture)
+    with db.read_session() as session:
+        fw_id = session.scalars(
+            sqlalchemy.select(Firewall.id).where(Firewall.name == 'fw-dns-names')
+        ).one()
+
+    resolver = _StubResolver({'linuxfabrik.ch': ['198.51.100.7']})
+    driver = CompilerDriver_ipt(db)
+    driver.wdir = str(tmp_path)
+    driver.source_dir = str(fixture.parent)
+    driver.file_name_setting = 'fw-dns-names.fw'
+    driver.ipv6_run = False
+    driver.dns_cache = DNSCache(resolver)
+    batches = []
+    resolve_all = driver.dns_cache.resolve_all
+
+    def record_batch(queries):
+        queries = list(queries)
+        batches.append(queries)
+        resolve_all(queries)
+
+    driver.dns_cache.resolve_all = record_batch
+    driver.run(cluster_id='', fw_id=str(fw_id), single_rule_id='')
+
+    assert not driver.all_errors
+    # one batch up front, and no compiler had to ask for more
+    assert batches == [[('linuxfabrik.ch', socket.AF_INET)]]
+    assert resolver.calls == [('linuxfabrik.ch', socket.AF_INET)]
+    assert '198.51.100.7' in (tmp_path / 'fw-dns-names.fw').read_text()
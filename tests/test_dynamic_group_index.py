@@ -0,0 +1,114 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""The DynamicGroup index selects what the per-object check selects.
+
+`DynamicGroupIndex` answers a DynamicGroup from an inverted index by type
+and tag instead of checking every object of the database against it.
+Whatever it returns has to be what `matches_dynamic_criteria` accepts -
+deleted objects and the standard groups near the tree root left out - in
+the order the compiler always listed them, and an edit, an undo or a redo
+must not leave a stale answer behind.
+"""
+
+import random
+import uuid
+
+import pytest
+import sqlalchemy
+
+import firewallfabrik.core
+from firewallfabrik.core._dynamic_groups import (
+    dynamic_group_index,
+    matches_dynamic_criteria,
+)
+from firewallfabrik.core.objects import Address, Group, Host, Library
+
+from .conftest import FIXTURES_DIR
+
+_KEYWORDS = ('prod', 'dmz', 'web', 'db')
+_TYPES = ('any', 'IPv4', 'Network', 'Host', 'Firewall', 'ObjectGroup', 'IPService')
+
+
+@pytest.fixture()
+def db():
+    db = firewallfabrik.core.DatabaseManager()
+    db.load(FIXTURES_DIR / 'compiler-tests.fwf')
+    return db
+
+
+def _tag_everything(db, seed):
+    rng = random.Random(seed)
+    with db.session('Tag everything') as session:
+        user = session.scalars(
+            sqlalchemy.select(Library).where(Library.name == 'User')
+        ).one()
+        deleted = Library(
+            id=uuid.uuid4(), database_id=user.database_id, name='Deleted Objects'
+        )
+        session.add(deleted)
+        session.flush()
+        for cls in (Address, Group, Host):
+            for obj in session.scalars(sqlalchemy.select(cls)).unique():
+                obj.keywords = set(rng.sample(_KEYWORDS, rng.randint(0, 2)))
+                if cls is Address and obj.library_id is not None and rng.random() < 0.1:
+                    obj.library_id = deleted.id
+
+
+def _brute_force(session, criteria, match_mode):
+    result = []
+    for cls in (Address, Group, Host):
+        for obj in session.scalars(sqlalchemy.select(cls)).unique():
+            if matches_dynamic_criteria(obj, criteria, match_mode):
+                result.append(obj)
+    result.sort(key=lambda o: o.name)
+    return [o.id for o in result]
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_the_index_selects_what_the_check_selects(db, seed):
+    _tag_everything(db, seed)
+    rng = random.Random(seed)
+    with db.read_session() as session:
+        index = dynamic_group_index(session)
+        for _ in range(40):
+            criteria = [
+                {
+                    'type': rng.choice(_TYPES),
+                    'keyword': rng.choice((*_KEYWORDS, '', 'unused')),
+                }
+                for _ in range(rng.randint(1, 3))
+            ]
+            for match_mode in ('AND', 'OR'):
+                expected = _brute_force(session, criteria, match_mode)
+                members = index.members(session, criteria, match_mode)
+                assert [o.id for o in members] == expected, (criteria, match_mode)
+
+
+def test_an_edit_undo_and_redo_are_seen(db):
+    criteria = [{'type': 'any', 'keyword': 'edited'}]
+    with db.read_session() as session:
+        assert dynamic_group_index(session).member_ids(criteria) == set()
+
+    with db.session('Tag one host') as session:
+        host = session.scalars(sqlalchemy.select(Host)).first()
+        host.keywords = {'edited'}
+        host_id = host.id
+
+    with db.read_session() as session:
+        assert dynamic_group_index(session).member_ids(criteria) == {host_id}
+    db.undo()
+    with db.read_session() as session:
+        assert dynamic_group_index(session).member_ids(criteria) == set()
+    db.redo()
+    with db.read_session() as session:
+        assert dynamic_group_index(session).member_ids(criteria) == {host_id}
@@ -18,7 +18,7 @@ preserve fwbuilder's original semantics
 (``DynamicGroup::isMemberOfGroup()`` only supports OR).
 """
 
-from firewallfabrik.compiler._compiler import _matches_dynamic_criteria
+from firewallfabrik.core._dynamic_groups import matches_dynamic_criteria
 
 
 class _Library:
@@ -27,7 +27,7 @@ class _Library:
 
 
 class _FakeObj:
-    """Minimal stub matching what _matches_dynamic_criteria reads."""
+    """Minimal stub matching what matches_dynamic_criteria reads."""
 
     def __init__(self, type_, keywords=None, library_name='User'):
         self.type = type_
@@ -45,11 +45,11 @@ class TestSingleCriterion:
 
     def test_match_and_default(self):
         obj = _FakeObj('Firewall', keywords={'prod03'})
-        assert _matches_dynamic_criteria(obj, [_crit('Firewall', 'prod03')])
+        assert matches_dynamic_criteria(obj, [_crit('Firewall', 'prod03')])
 
     def test_match_or(self):
         obj = _FakeObj('Firewall', keywords={'prod03'})
-        assert _matches_dynamic_criteria(
+        assert matches_dynamic_criteria(
             obj,
             [_crit('Firewall', 'prod03')],
             match_mode='OR',
@@ -57,14 +57,14 @@ class TestSingleCriterion:
 
     def test_no_match_and(self):
         obj = _FakeObj('Firewall', keywords={'prod01'})
-        assert not _matches_dynamic_criteria(
+        assert not matches_dynamic_criteria(
             obj,
             [_crit('Firewall', 'prod03')],
         )
 
     def test_no_match_or(self):
         obj = _FakeObj('Firewall', keywords={'prod01'})
-        assert not _matches_dynamic_criteria(
+        assert not matches_dynamic_criteria(
             obj,
             [_crit('Firewall', 'prod03')],
             match_mode='OR',
@@ -80,7 +80,7 @@ class TestMultiCriterionAndDefault:
             _crit('Firewall', 'monitoring'),
             _crit('Firewall', 'prod03'),
         ]
-        assert _matches_dynamic_criteria(obj, criteria)
+        assert matches_dynamic_criteria(obj, criteria)
 
     def test_and_one_missing(self):
         # Object only carries one of the two required tags.
@@ -89,7 +89,7 @@ class TestMultiCriterionAndDefault:
             _crit('Firewall', 'monitoring'),
             _crit('Firewall', 'prod03'),
         ]
-        assert not _matches_dynamic_criteria(obj, criteria)
+        assert not matches_dynamic_criteria(obj, criteria)
 
     def test_and_neither(self):
         obj = _FakeObj('Firewall', keywords={'unrelated'})
@@ -97,7 +97,7 @@ class TestMultiCriterionAndDefault:
             _crit('Firewall', 'monitoring'),
             _crit('Firewall', 'prod03'),
         ]
-        assert not _matches_dynamic_criteria(obj, criteria)
+        assert not matches_dynamic_criteria(obj, criteria)
 
 
 class TestMultiCriterionOr:
@@ -109,7 +109,7 @@ class TestMultiCriterionOr:
             _crit('Firewall', 'monitoring'),
             _crit('Firewall', 'prod03'),
         ]
-        assert _matches_dynamic_criteria(obj, criteria, match_mode='OR')
+        assert matches_dynamic_criteria(obj, criteria, match_mode='OR')
 
     def test_or_other_match(self):
         obj = _FakeObj('Firewall', keywords={'prod03'})
@@ -117,7 +117,7 @@ class TestMultiCriterionOr:
             _crit('Firewall', 'monitoring'),
             _crit('Firewall', 'prod03'),
         ]
-        assert _matches_dynamic_criteria(obj, criteria, match_mode='OR')
+        assert matches_dynamic_criteria(obj, criteria, match_mode='OR')
 
     def test_or_neither(self):
         obj = _FakeObj('Firewall', keywords={'unrelated'})
@@ -125,7 +125,7 @@ class TestMultiCriterionOr:
             _crit('Firewall', 'monitoring'),
             _crit('Firewall', 'prod03'),
         ]
-        assert not _matches_dynamic_criteria(obj, criteria, match_mode='OR')
+        assert not matches_dynamic_criteria(obj, criteria, match_mode='OR')
 
     def test_or_cross_type_union(self):
         # Classic OR use case: a group covering both Hosts and Networks
@@ -136,14 +136,14 @@ class TestMultiCriterionOr:
             _crit('Host', 'production'),
             _crit('Network', 'production'),
         ]
-        assert _matches_dynamic_criteria(host, criteria, match_mode='OR')
-        assert not _matches_dynamic_criteria(host, criteria)  # AND -> no
+        assert matches_dynamic_criteria(host, criteria, match_mode='OR')
+        assert not matches_dynamic_criteria(host, criteria)  # AND -> no
 
 
 class TestEdgeCases:
     def test_empty_criteria(self):
         obj = _FakeObj('Firewall', keywords={'prod03'})
-        assert not _matches_dynamic_criteria(obj, [])
+        assert not matches_dynamic_criteria(obj, [])
 
     def test_only_inactive_criteria(self):
         # 'none' / ',' marker rows are ignored as inactive (matches
@@ -151,26 +151,26 @@ class TestEdgeCases:
         # or keyword==KEYWORD_NONE).
         obj = _FakeObj('Firewall', keywords={'prod03'})
         criteria = [_crit('none', 'prod03'), _crit('Firewall', ',')]
-        assert not _matches_dynamic_criteria(obj, criteria)
+        assert not matches_dynamic_criteria(obj, criteria)
 
     def test_active_and_inactive_mixed_and(self):
         # AND with one active criterion that matches and one inactive
         # row: inactive rows are skipped, AND succeeds.
         obj = _FakeObj('Firewall', keywords={'prod03'})
         criteria = [_crit('Firewall', 'prod03'), _crit('none', 'foo')]
-        assert _matches_dynamic_criteria(obj, criteria)
+        assert matches_dynamic_criteria(obj, criteria)
 
     def test_excluded_object_type(self):
-        # IPService is not in _DG_ELIGIBLE.
+        # IPService is not in DG_ELIGIBLE.
         obj = _FakeObj('IPService', keywords={'prod03'})
-        assert not _matches_dynamic_criteria(
+        assert not matches_dynamic_criteria(
             obj,
             [_crit('IPService', 'prod03')],
         )
 
     def test_deleted_objects_library_excluded(self):
         obj = _FakeObj('Firewall', keywords={'prod03'}, library_name='Deleted Objects')
-        assert not _matches_dynamic_criteria(
+        assert not matches_dynamic_criteria(
             obj,
             [_crit('Firewall', 'prod03')],
         )
@@ -0,0 +1,113 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""The group graph expands groups from memory and finds every cycle.
+
+A compiler reads the group membership table once into
+``Compiler.group_graph`` and expands every group of every rule from it.
+The expansion must keep the order of the group and give a group reached
+twice only once, asking the database again for a group it has already
+expanded defeats the point, and a cycle anywhere below a group in a rule
+has to be found - the walk it replaces only terminated for a cycle that
+ran through the group the rule names.
+"""
+
+import uuid
+
+import pytest
+import sqlalchemy
+import sqlalchemy.orm
+
+from firewallfabrik.compiler._comp_rule import GroupGraph
+from firewallfabrik.core.objects import IPv4, ObjectGroup, group_membership
+from firewallfabrik.core.objects._base import Base
+
+_LIBRARY = uuid.uuid4()
+
+
+@pytest.fixture()
+def session():
+    engine = sqlalchemy.create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    s = sqlalchemy.orm.sessionmaker(bind=engine)()
+    yield s
+    s.close()
+
+
+def _group(session, name, *members):
+    group = ObjectGroup(id=uuid.uuid4(), name=name, library_id=_LIBRARY)
+    session.add(group)
+    session.flush()
+    _add_members(session, group, *members)
+    return group
+
+
+def _add_members(session, group, *members):
+    for position, member in enumerate(members):
+        session.execute(
+            group_membership.insert().values(
+                group_id=group.id, member_id=member.id, position=position
+            )
+        )
+
+
+def _host(session, name):
+    host = IPv4(
+        id=uuid.uuid4(),
+        name=name,
+        library_id=_LIBRARY,
+        inet_addr_mask={'address': '192.0.2.1', 'netmask': '255.255.255.255'},
+    )
+    session.add(host)
+    session.flush()
+    return host
+
+
+def test_expansion_keeps_order_and_reads_the_database_once(session):
+    a, b, c = (_host(session, n) for n in 'abc')
+    inner = _group(session, 'inner', c, b)
+    outer = _group(session, 'outer', b, inner, a)
+
+    graph = GroupGraph(session)
+    queries = []
+    sqlalchemy.event.listen(
+        session.get_bind(),
+        'before_cursor_execute',
+        lambda *args: queries.append(args[2]),
+    )
+    assert [m.name for m in graph.expand(outer)] == ['b', 'c', 'b', 'a']
+    first = len(queries)
+    assert [m.name for m in graph.expand(outer)] == ['b', 'c', 'b', 'a']
+    assert [m.name for m in graph.expand(inner)] == ['c', 'b']
+    assert len(queries) == first
+
+
+def test_a_cycle_below_the_group_is_found(session):
+    a = _group(session, 'a')
+    b = _group(session, 'b')
+    c = _group(session, 'c', a)
+    _add_members(session, a, b)
+    _add_members(session, b, c)
+    top = _group(session, 'top', _host(session, 'h'), a)
+
+    graph = GroupGraph(session)
+    assert graph.recursive_member(top).name == 'a'
+    assert [m.name for m in graph.expand(top)] == ['h']
+
+
+def test_a_group_held_twice_is_not_a_cycle(session):
+    shared = _group(session, 'shared', _host(session, 'h'))
+    top = _group(session, 'top', _group(session, 'x', shared), shared)
+
+    graph = GroupGraph(session)
+    assert graph.recursive_member(top) is None
+    assert [m.name for m in graph.expand(top)] == ['h']
@@ -0,0 +1,105 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""An address object is parsed once per compile, and parsed the same way.
+
+Containment, the address sort and the interface lookups read the integer
+ranges `parsed_address` keeps instead of parsing the JSON strings of an
+object on every call. The ranges must say what ``ipaddress`` said, a
+cached answer must not outlive the compile it was made in, and the cache
+must not hand the answer for one object to another that carries the same
+ID - a CombinedAddress wraps an address and reports its ID.
+"""
+
+import ipaddress
+import uuid
+
+from firewallfabrik.compiler._combined_address import CombinedAddress
+from firewallfabrik.compiler._compiler import _addr_sort_key, _check_addresses_match
+from firewallfabrik.compiler._ip_range import clear_parsed_addresses, parsed_address
+from firewallfabrik.core.objects import AddressRange, IPv4, Network, NetworkIPv6
+
+
+def _host(addr, mask='255.255.255.255', **kwargs):
+    return IPv4(
+        id=uuid.uuid4(),
+        name=addr,
+        inet_addr_mask={'address': addr, 'netmask': mask},
+        **kwargs,
+    )
+
+
+def test_networks_are_blocks_and_ranges_usually_are_not():
+    net = Network(
+        id=uuid.uuid4(),
+        name='net',
+        inet_addr_mask={'address': '10.1.2.3', 'netmask': '255.255.255.0'},
+    )
+    net6 = NetworkIPv6(
+        id=uuid.uuid4(),
+        name='net6',
+        inet_addr_mask={'address': 'fe80::', 'netmask': '64'},
+    )
+    rng = AddressRange(
+        id=uuid.uuid4(),
+        name='range',
+        start_address={'address': '10.0.0.1'},
+        end_address={'address': '10.0.0.5'},
+    )
+
+    r = parsed_address(net).range
+    assert (r.version, r.prefixlen) == (4, 24)
+    assert [str(a) for a in r.addresses()] == ['10.1.2.0', '10.1.2.255']
+    # the address keeps its host bits: it is what the address sort uses
+    assert parsed_address(net).address.first == int(ipaddress.ip_address('10.1.2.3'))
+    assert parsed_address(net6).range.prefixlen == 64
+    assert parsed_address(_host('10.0.0.1')).range.prefixlen == 32
+    assert parsed_address(rng).range.prefixlen is None
+
+
+def test_a_range_across_families_matches_nothing():
+    rng = AddressRange(
+        id=uuid.uuid4(),
+        name='mixed',
+        start_address={'address': '10.0.0.1'},
+        end_address={'address': 'fe80::1'},
+    )
+    assert parsed_address(rng).range is None
+
+
+def test_an_object_is_parsed_once_per_compile():
+    host = _host('192.0.2.1')
+    assert parsed_address(host) is parsed_address(host)
+
+    host.inet_addr_mask = {'address': '192.0.2.2', 'netmask': '255.255.255.255'}
+    clear_parsed_addresses()
+    assert str(parsed_address(host).range.addresses()[0]) == '192.0.2.2'
+
+
+def test_a_combined_address_does_not_take_the_place_of_its_address():
+    host = _host('192.0.2.1')
+    combined = CombinedAddress(host)
+
+    assert parsed_address(combined).range is None
+    assert parsed_address(host).range is not None
+    assert _addr_sort_key(combined) == (1, '192.0.2.1')
+    assert _addr_sort_key(host)[0] == 0
+
+
+def test_an_interface_address_covers_its_subnet():
+    itf_addr = _host('192.0.2.1', mask='255.255.255.0', interface_id=uuid.uuid4())
+    plain = _host('192.0.2.1', mask='255.255.255.0')
+    other = _host('192.0.2.77')
+
+    assert _check_addresses_match(itf_addr, other)
+    assert _check_addresses_match(other, itf_addr)
+    assert not _check_addresses_match(plain, other)
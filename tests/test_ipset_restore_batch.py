@@ -0,0 +1,181 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""An address table is loaded into ipset by one ``ipset restore`` batch.
+
+``reload_address_table`` used to call ``ipset -A`` once per line of the
+file, so a block list of 100k addresses took minutes at every activation.
+The shell functions are run here against a stand-in ``ipset`` that writes
+down its arguments and the batch it is handed.
+"""
+
+import shutil
+import subprocess  # nosec B404
+
+import pytest
+
+from firewallfabrik.driver._configlet import Configlet
+from firewallfabrik.platforms.iptables._os_configurator import OSConfigurator_linux24
+
+pytestmark = pytest.mark.skipif(
+    shutil.which('sh') is None or shutil.which('awk') is None,
+    reason='no POSIX shell',
+)
+
+# Records every call; a restore batch is kept, every --list fails, so the
+# function takes the sets it matches on to be missing.  With REJECT set,
+# the restore fails the way ipset does on a line it does not take.
+_FAKE_IPSET = """\
+#!/bin/sh
+echo "$*" >> "$LOG"
+case "$*" in
+    *restore*) cat > "$BATCH"; test -z "$REJECT" ;;
+    --list*) exit 1 ;;
+esac
+"""
+
+
+class _FakeFW:
+    version = ''
+
+    def get_option(self, key):
+        return key == 'use_m_set'
+
+
+def _functions():
+    rt = Configlet('linux24', 'run_time_address_tables')
+    rt.set_variable('using_ipset', 1)
+    return rt.expand()
+
+
+def _run(tmp_path, commands, functions=None, reject=False, check=True):
+    ipset = tmp_path / 'ipset'
+    ipset.write_text(_FAKE_IPSET)
+    ipset.chmod(0o755)
+    script = tmp_path / 'script.sh'
+    script.write_text((functions or _functions()) + '\n' + commands + '\n')
+    log = tmp_path / 'log'
+    batch = tmp_path / 'batch'
+    result = subprocess.run(  # nosec B603 B607
+        ['sh', str(script)],
+        check=check,
+        capture_output=True,
+        text=True,
+        env={
+            'IPSET': str(ipset),
+            'LOG': str(log),
+            'BATCH': str(batch),
+            'PATH': '/usr/bin:/bin',
+            'REJECT': '1' if reject else '',
+        },
+    )
+    if not check:
+        return result
+    return log.read_text().splitlines(), batch.read_text().splitlines()
+
+
+def test_the_table_is_handed_to_ipset_as_one_batch(tmp_path):
+    table = tmp_path / 'block.txt'
+    table.write_text(
+        '# a block list\n\n192.0.2.1\n198.51.100.0/24 ; a comment\n2001:db8::1\n'
+    )
+    calls, batch = _run(tmp_path, f'reload_address_table "block" "{table}" "-4"')
+
+    assert [call for call in calls if 'restore' in call] == ['-exist restore']
+    assert not any(call.startswith(('-A', 'add')) for call in calls)
+    assert batch == [
+        'create tmp_fwb_set:ip hash:ip family inet maxelem 65536',
+        'create tmp_fwb_set:net hash:net family inet maxelem 65536',
+        'create block:ip hash:ip family inet maxelem 65536',
+        'create block:net hash:net family inet maxelem 65536',
+        'create block list:set',
+        'add block block:ip',
+        'add block block:net',
+        'add tmp_fwb_set:ip 192.0.2.1',
+        'add tmp_fwb_set:net 198.51.100.0/24',
+        'swap block:ip tmp_fwb_set:ip',
+        'swap block:net tmp_fwb_set:net',
+        'destroy tmp_fwb_set:ip',
+        'destroy tmp_fwb_set:net',
+    ]
+
+
+def test_a_line_that_is_no_address_is_left_out_and_named(tmp_path):
+    table = tmp_path / 'block.txt'
+    table.write_text('192.0.2.1\n10.0.0.0/0\n192.0.2.300\n192.0.2\n198.51.100.0/24\n')
+    result = _run(tmp_path, f'reload_address_table "block" "{table}" "-4"', check=False)
+    batch = (tmp_path / 'batch').read_text().splitlines()
+
+    assert result.returncode == 0
+    assert [line for line in batch if line.startswith('add tmp_')] == [
+        'add tmp_fwb_set:ip 192.0.2.1',
+        'add tmp_fwb_set:net 198.51.100.0/24',
+    ]
+    assert batch.index('create block list:set') < batch.index(
+        'add tmp_fwb_set:ip 192.0.2.1'
+    )
+    assert f'{table}:2: not an address, skipped: 10.0.0.0/0' in result.stderr
+    assert f'{table}:3: not an address, skipped: 192.0.2.300' in result.stderr
+    assert f'{table}:4: not an address, skipped: 192.0.2' in result.stderr
+
+
+def test_a_batch_ipset_rejects_makes_the_load_fail(tmp_path):
+    table = tmp_path / 'block.txt'
+    table.write_text('192.0.2.1\n')
+    result = _run(
+        tmp_path,
+        f'reload_address_table "block" "{table}" "-4" || exit 3',
+        reject=True,
+        check=False,
+    )
+
+    assert result.returncode == 3
+    assert 'Can not load address table block' in result.stdout
+
+
+def test_the_ipv6_set_takes_the_ipv6_lines(tmp_path):
+    table = tmp_path / 'block.txt'
+    table.write_text('192.0.2.1\n2001:db8::1\n2001:db8:1::/48\n')
+    _, batch = _run(tmp_path, f'reload_address_table "block_v6" "{table}" "-6"')
+
+    assert [line for line in batch if line.startswith('add tmp_')] == [
+        'add tmp_fwb_set:ip 2001:db8::1',
+        'add tmp_fwb_set:net 2001:db8:1::/48',
+    ]
+    assert 'family inet6' in batch[0]
+
+
+def test_a_table_larger_than_the_default_sizes_its_sets(tmp_path):
+    table = tmp_path / 'block.txt'
+    table.write_text(
+        ''.join(f'10.{i >> 16}.{(i >> 8) & 255}.{i & 255}\n' for i in range(70000))
+    )
+    _, batch = _run(tmp_path, f'reload_address_table "block" "{table}"')
+
+    assert batch[0] == 'create tmp_fwb_set:ip hash:ip family inet maxelem 70000'
+    assert len(batch) == 70000 + 11
+
+
+def test_a_group_is_filled_from_its_here_document(tmp_path):
+    oscnf = OSConfigurator_linux24(None, _FakeFW())
+    oscnf.register_address_group('servers', ('192.0.2.1', '10.0.0.0/8'))
+    functions = oscnf.print_run_time_address_tables_code()
+    _, batch = _run(tmp_path, 'load_address_group_sets', functions)
+
+    assert batch == [
+        'create tmp_fwf_group hash:net family inet maxelem 65536',
+        'add tmp_fwf_group 192.0.2.1',
+        'add tmp_fwf_group 10.0.0.0/8',
+        'create servers hash:net family inet maxelem 65536',
+        'swap servers tmp_fwf_group',
+        'destroy tmp_fwf_group',
+    ]
@@ -0,0 +1,271 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""A large address group is matched as one ipset on iptables.
+
+With ``ipset_group_threshold`` set and the "set" module in use, a group of
+at least that many addresses is kept whole through group expansion, PrintRule
+matches it with ``-m set --match-set`` and the activation script fills a
+``hash:net`` set with its addresses before the rules are loaded.  A group
+the pipeline has to see member by member - one holding the firewall's own
+address, a host or an address table - is expanded as before.
+"""
+
+import ipaddress
+import uuid
+
+from firewallfabrik.compiler._comp_rule import CompRule
+from firewallfabrik.compiler._rule_processor import BasicRuleProcessor
+from firewallfabrik.core.objects import (
+    AddressRange,
+    AddressTable,
+    Host,
+    IPv4,
+    IPv6,
+    Network,
+    ObjectGroup,
+    PolicyAction,
+)
+from firewallfabrik.platforms.iptables._os_configurator import OSConfigurator_linux24
+from firewallfabrik.platforms.iptables._policy_compiler import (
+    AddressGroupsToIpset,
+    _ipset_entries,
+)
+
+
+def _net(cidr):
+    net = ipaddress.ip_network(cidr)
+    return Network(
+        id=uuid.uuid4(),
+        name=cidr,
+        inet_addr_mask={
+            'address': str(net.network_address),
+            'netmask': str(net.netmask),
+        },
+    )
+
+
+def _host(address):
+    cls = IPv6 if ':' in address else IPv4
+    return cls(
+        id=uuid.uuid4(),
+        name=address,
+        inet_addr_mask={'address': address, 'netmask': ''},
+    )
+
+
+def _range(start, end):
+    return AddressRange(
+        id=uuid.uuid4(),
+        name=f'{start}-{end}',
+        start_address={'address': start},
+        end_address={'address': end},
+    )
+
+
+def _group(name='servers'):
+    return ObjectGroup(id=uuid.uuid4(), name=name)
+
+
+def test_hosts_networks_and_ranges_become_set_entries():
+    assert _ipset_entries(_host('192.0.2.1')) == ['192.0.2.1']
+    assert _ipset_entries(_net('10.0.0.0/8')) == ['10.0.0.0/8']
+    assert _ipset_entries(_range('192.0.2.0', '192.0.2.4')) == [
+        '192.0.2.0/30',
+        '192.0.2.4',
+    ]
+
+
+def test_an_address_that_means_any_has_no_entry():
+    assert _ipset_entries(_net('0.0.0.0/0')) is None
+
+
+class _Feeder(BasicRuleProcessor):
+    def __init__(self, rules):
+        super().__init__(name='Feeder')
+        self.tmp_queue.extend(rules)
+
+    def process_next(self) -> bool:
+        return False
+
+
+class _GroupGraph:
+    def __init__(self, members):
+        self._members = members
+
+    def expand(self, group):
+        return list(self._members[group.id])
+
+
+class _Compiler:
+    verbose = False
+    fw = None
+
+    def __init__(self, members, ipv6=False, firewall_addresses=()):
+        self.group_graph = _GroupGraph(members)
+        self.ipv6_policy = ipv6
+        self.address_group_sets = {}
+        self.unexpanded_groups = set()
+        self._firewall_addresses = firewall_addresses
+
+    def complex_match(self, obj, fw):
+        return obj in self._firewall_addresses
+
+    def find_address_for(self, obj, fw):
+        return None
+
+
+def _run(group, members, threshold=3, **kwargs):
+    rule = CompRule(
+        id=uuid.uuid4(),
+        type='PolicyRule',
+        position=1,
+        label='1',
+        comment='',
+        options={},
+        negations={},
+        action=PolicyAction.Accept,
+        src=[group],
+    )
+    compiler = _Compiler({group.id: members}, **kwargs)
+    proc = AddressGroupsToIpset('match large address groups as ipsets', threshold)
+    proc.set_context(compiler)
+    proc.set_data_source(_Feeder([rule]))
+    while proc.get_next_rule() is not None:
+        pass
+    return compiler
+
+
+def test_a_group_of_enough_addresses_is_kept_whole():
+    group = _group()
+    members = [_host('192.0.2.1'), _net('10.0.0.0/8'), _host('192.0.2.2')]
+    compiler = _run(group, members)
+    assert group.id in compiler.unexpanded_groups
+    assert compiler.address_group_sets[group.id] == (
+        '192.0.2.1',
+        '10.0.0.0/8',
+        '192.0.2.2',
+    )
+
+
+def test_only_the_addresses_of_the_rulesets_family_count():
+    group = _group()
+    members = [_host('192.0.2.1'), _host('192.0.2.2'), _host('2001:db8::1')]
+    assert _run(group, members).unexpanded_groups == set()
+    compiler = _run(group, members, threshold=1, ipv6=True)
+    assert compiler.address_group_sets[group.id] == ('2001:db8::1',)
+
+
+def test_a_small_group_is_expanded():
+    group = _group()
+    assert (
+        _run(group, [_host('192.0.2.1'), _host('192.0.2.2')]).unexpanded_groups == set()
+    )
+
+
+def test_a_group_holding_the_firewalls_address_is_expanded():
+    group = _group()
+    own = _host('192.0.2.254')
+    members = [_host('192.0.2.1'), _host('192.0.2.2'), own]
+    compiler = _run(group, members, firewall_addresses=(own,))
+    assert compiler.unexpanded_groups == set()
+
+
+def test_a_group_holding_a_host_or_an_address_table_is_expanded():
+    addresses = [_host('192.0.2.1'), _host('192.0.2.2'), _host('192.0.2.3')]
+    for member in (
+        Host(id=uuid.uuid4(), name='web'),
+        AddressTable(id=uuid.uuid4(), name='blocklist'),
+    ):
+        group = _group()
+        assert _run(group, [*addresses, member]).unexpanded_groups == set()
+
+
+class _FakeFW:
+    version = ''
+
+    def get_option(self, key):
+        return key == 'use_m_set'
+
+
+class _FakeSession:
+    def __init__(self, tables):
+        self._tables = tables
+
+    def scalars(self, statement):
+        return iter(self._tables)
+
+
+def _configurator(tables=()):
+    session = _FakeSession(list(tables)) if tables else None
+    return OSConfigurator_linux24(session, _FakeFW())
+
+
+def test_the_same_group_gets_the_same_set_and_another_one_a_new_name():
+    oscnf = _configurator()
+    first = oscnf.register_address_group('servers', ('192.0.2.1',))
+    assert oscnf.register_address_group('servers', ('192.0.2.1',)) == first
+    assert oscnf.register_address_group('servers', ('192.0.2.9',)) == 'servers_2'
+    assert oscnf.register_address_group('servers', ('2001:db8::1',), True) == (
+        'servers_v6'
+    )
+
+
+def test_a_group_does_not_take_the_name_of_an_address_table():
+    oscnf = _configurator()
+    oscnf.register_multi_address_object('blocklist', '/etc/blocklist')
+    assert oscnf.register_address_group('blocklist', ('192.0.2.1',)) == 'blocklist_2'
+
+
+def test_a_group_printed_before_an_address_table_does_not_take_its_name():
+    table = AddressTable(id=uuid.uuid4(), name='blocklist', data={'run_time': True})
+    oscnf = _configurator([table])
+    assert oscnf.register_address_group('blocklist', ('192.0.2.1',)) == 'blocklist_2'
+    assert oscnf.register_address_group('blocklist', ('2001:db8::1',), True) == (
+        'blocklist_2_v6'
+    )
+    oscnf.register_multi_address_object('blocklist', '/etc/blocklist')
+    assert 'blocklist' in oscnf.address_table_objects
+    assert 'blocklist' not in oscnf.address_group_sets
+
+
+def test_a_compile_time_address_table_leaves_its_name_to_a_group():
+    table = AddressTable(id=uuid.uuid4(), name='blocklist', data={})
+    oscnf = _configurator([table])
+    assert oscnf.register_address_group('blocklist', ('192.0.2.1',)) == 'blocklist'
+
+
+def test_a_long_name_keeps_its_counter():
+    oscnf = _configurator()
+    name = 'a' * 40
+    oscnf.register_address_group(name, ('192.0.2.1',), True)
+    second = oscnf.register_address_group(name, ('192.0.2.2',), True)
+    assert second.endswith('_2_v6')
+    assert len(second) + len(':net') <= 31
+
+
+def test_the_script_fills_the_set_from_a_here_document():
+    oscnf = _configurator()
+    oscnf.register_address_group('servers', ('192.0.2.1', '10.0.0.0/8'))
+    code = oscnf.print_run_time_address_tables_code()
+    assert 'reload_address_group() {' in code
+    assert (
+        'reload_address_group "servers" "-4" "2" <<ADDRESSES\n'
+        '192.0.2.1\n'
+        '10.0.0.0/8\n'
+        'ADDRESSES\n'
+    ) in code
+
+
+def test_without_groups_the_script_does_not_change():
+    code = _configurator().print_run_time_address_tables_code()
+    assert 'reload_address_group' not in code
@@ -0,0 +1,65 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""The nftables script template is compiled once per process.
+
+`Jinja2Template` used to build a new environment and compile
+``script.sh.j2`` for every firewall, which a run over hundreds of
+firewalls, or a compile server, repeated hundreds of times.
+"""
+
+from pathlib import Path
+
+import jinja2
+import jinja2.meta
+import pytest
+
+from firewallfabrik.driver._jinja2_template import Jinja2Template
+from firewallfabrik.platforms.nftables._compiler_driver import _write_script
+
+
+def test_the_environment_and_template_are_shared():
+    first = Jinja2Template('nftables', 'script.sh.j2')
+    second = Jinja2Template('nftables', 'script.sh.j2')
+    assert first._env is second._env
+    assert first._template is second._template
+
+
+def test_generate_renders_what_render_does():
+    template = Jinja2Template('nftables', 'script.sh.j2')
+    env = template._env
+    source = env.loader.get_source(env, 'script.sh.j2')[0]
+    context = dict.fromkeys(
+        jinja2.meta.find_undeclared_variables(env.parse(source)), 'x'
+    )
+    assert ''.join(template.generate(context)) == template.render(context)
+
+
+def test_a_failed_render_leaves_the_previous_script(tmp_path):
+    path = tmp_path / 'fw.fw'
+    path.write_text('previous\n')
+
+    def chunks():
+        yield 'first half\n'
+        raise jinja2.UndefinedError('no such variable')
+
+    with pytest.raises(jinja2.UndefinedError):
+        _write_script(path, chunks())
+    assert path.read_text() == 'previous\n'
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_the_script_is_written_executable(tmp_path):
+    path = tmp_path / 'fw.fw'
+    _write_script(path, iter(['#!/bin/sh\n', 'exit 0\n']))
+    assert path.read_text() == '#!/bin/sh\nexit 0\n'
+    assert Path(path).stat().st_mode & 0o777 == 0o755
@@ -0,0 +1,116 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""A loaded database is kept next to its file and restored from there.
+
+Every CLI run parsed the whole database file before it could compile one
+firewall. With ``cache=True`` the loaded database is kept in
+``<file>.cache`` and restored from there while the file is unchanged.
+"""
+
+import shutil
+
+import pytest
+
+import firewallfabrik.core
+from firewallfabrik.core import _load_cache
+
+from .conftest import FIXTURES_DIR
+
+_FIXTURE = FIXTURES_DIR / 'compiler-tests.fwf'
+
+
+@pytest.fixture
+def fwf(tmp_path):
+    path = tmp_path / _FIXTURE.name
+    shutil.copy(_FIXTURE, path)
+    return path
+
+
+def _load(path, cache=True):
+    db = firewallfabrik.core.DatabaseManager()
+    db.load(str(path), cache=cache)
+    return db
+
+
+def _parse_count(monkeypatch):
+    calls = []
+    original = firewallfabrik.core.DatabaseManager._load_yaml
+
+    def counting(self, path):
+        calls.append(path)
+        return original(self, path)
+
+    monkeypatch.setattr(firewallfabrik.core.DatabaseManager, '_load_yaml', counting)
+    return calls
+
+
+def test_the_second_load_restores_what_the_first_one_parsed(fwf, tmp_path, monkeypatch):
+    parsed = _parse_count(monkeypatch)
+    first = _load(fwf)
+    assert _load_cache.cache_path(fwf).exists()
+    second = _load(fwf)
+
+    assert len(parsed) == 1
+    assert second.ref_index == first.ref_index
+    assert second.can_undo is False
+    assert second.is_dirty is False
+    out = tmp_path / 'out.fwf'
+    second.save(str(out))
+    assert out.read_bytes() == _FIXTURE.read_bytes()
+
+
+def test_a_changed_file_is_parsed_again(fwf, monkeypatch):
+    parsed = _parse_count(monkeypatch)
+    _load(fwf)
+    with fwf.open('a') as f:
+        f.write('# edited\n')
+    _load(fwf)
+    _load(fwf)
+
+    assert len(parsed) == 2
+
+
+def test_a_cache_of_another_version_is_not_taken(fwf, monkeypatch):
+    parsed = _parse_count(monkeypatch)
+    _load(fwf)
+    monkeypatch.setattr(firewallfabrik, '__version__', '0.0.0')
+    _load(fwf)
+
+    assert len(parsed) == 2
+
+
+@pytest.mark.parametrize(
+    'content',
+    [b'', b'FWFCACHE1\nnot json\n', b'FWFCACHE1\n{"key": "x"}\n', b'garbage'],
+)
+def test_a_broken_cache_means_a_full_parse(fwf, content, monkeypatch):
+    _load_cache.cache_path(fwf).write_bytes(content)
+    parsed = _parse_count(monkeypatch)
+    db = _load(fwf)
+
+    assert len(parsed) == 1
+    assert db.ref_index
+
+
+def test_a_cache_that_is_no_database_means_a_full_parse(fwf, monkeypatch):
+    key = _load_cache.cache_key(fwf)
+    _load_cache.write_cache(fwf, key, b'not an sqlite image', {})
+    parsed = _parse_count(monkeypatch)
+    _load(fwf)
+
+    assert len(parsed) == 1
+
+
+def test_without_cache_nothing_is_written(fwf):
+    _load(fwf, cache=False)
+    assert not _load_cache.cache_path(fwf).exists()
@@ -14,8 +14,10 @@
 
 import pytest
 import sqlalchemy
+import yaml
 
 import firewallfabrik.core
+import firewallfabrik.core._yaml_reader
 from firewallfabrik.core.objects import Host, Library, Rule, RuleSet, Service
 
 from .conftest import FIXTURES_DIR, _get_db
@@ -47,6 +49,23 @@ def test_load_save(fixture_path, tmp_path):
     )
 
 
+def test_load_save_without_libyaml(monkeypatch, tmp_path):
+    """PyYAML built without libyaml reads the same file the same way."""
+    monkeypatch.setattr(
+        firewallfabrik.core._yaml_reader, '_SafeLoader', yaml.SafeLoader
+    )
+    fixture_path = _FWF_FILES[0]
+    db = firewallfabrik.core.DatabaseManager()
+    db.load(str(fixture_path))
+
+    output_path = tmp_path / fixture_path.name
+    db.save(str(output_path))
+
+    assert output_path.read_text(encoding='utf-8') == fixture_path.read_text(
+        encoding='utf-8'
+    )
+
+
 def _assert_no_string_bools(d, context):
     """Assert no value in *d* (or nested dicts) is a string 'true'/'false'."""
     if not isinstance(d, dict):
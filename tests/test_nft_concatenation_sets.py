@@ -0,0 +1,120 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""The rules one policy rule is split into fold into one rule.
+
+With ``concatenation_sets`` on, consecutive rules of the same original
+rule that differ only in their addresses and ports become one rule: an
+anonymous set where one match varies, a concatenation set holding
+exactly the combinations the rules matched where several do.  Nothing
+may be folded that would change what matches: not across rules, not a
+negated match, and not a rule with a rate limit of its own.
+"""
+
+from firewallfabrik.platforms.nftables._print_rule import fold_concatenations
+
+_HEADER = '        #\n        # Rule 1 (global)\n        #\n'
+
+
+def _entry(line, header=''):
+    return f'{header}        {line}\n'
+
+
+def test_addresses_and_ports_that_vary_together_become_a_concatenation():
+    chains = {
+        'forward': [
+            _entry(
+                'ip saddr 192.0.2.1 ip daddr 198.51.100.1 tcp dport 22 accept', _HEADER
+            ),
+            _entry('ip saddr 192.0.2.2 ip daddr 198.51.100.1 tcp dport 443 accept'),
+            _entry('ip saddr 192.0.2.3 ip daddr 198.51.100.1 tcp dport 22 accept'),
+        ],
+    }
+    assert fold_concatenations(chains) == {'forward': (3, 1)}
+    assert chains['forward'] == [
+        _entry(
+            'ip saddr . tcp dport { 192.0.2.1 . 22, 192.0.2.2 . 443, '
+            '192.0.2.3 . 22 } ip daddr 198.51.100.1 accept',
+            _HEADER,
+        ),
+    ]
+
+
+def test_a_set_in_one_rule_contributes_every_combination():
+    chains = {
+        'input': [
+            _entry('ip saddr { 192.0.2.1, 192.0.2.2 } ip daddr 198.51.100.1 accept'),
+            _entry('ip saddr 192.0.2.9 ip daddr 198.51.100.2 accept'),
+        ],
+    }
+    fold_concatenations(chains)
+    assert chains['input'] == [
+        _entry(
+            'ip saddr . ip daddr { 192.0.2.1 . 198.51.100.1, '
+            '192.0.2.2 . 198.51.100.1, 192.0.2.9 . 198.51.100.2 } accept'
+        ),
+    ]
+
+
+def test_one_varying_field_becomes_an_anonymous_set():
+    chains = {
+        'input': [
+            _entry('ip saddr 192.0.2.0/24 ip daddr 198.51.100.1 tcp dport 22 accept'),
+            _entry('ip saddr 192.0.2.0/24 ip daddr 198.51.100.2 tcp dport 22 accept'),
+        ],
+    }
+    assert fold_concatenations(chains) == {'input': (2, 1)}
+    assert chains['input'] == [
+        _entry(
+            'ip saddr 192.0.2.0/24 ip daddr { 198.51.100.1, 198.51.100.2 } '
+            'tcp dport 22 accept'
+        ),
+    ]
+
+
+def test_rules_of_another_original_rule_are_left_apart():
+    entries = [
+        _entry('ip saddr 192.0.2.1 tcp dport 22 accept', _HEADER),
+        _entry('ip saddr 192.0.2.2 tcp dport 443 accept', _HEADER),
+    ]
+    chains = {'input': list(entries)}
+    assert fold_concatenations(chains) == {}
+    assert chains['input'] == entries
+
+
+def test_what_would_change_the_match_is_left_alone():
+    cases = [
+        # Another verdict.
+        [
+            _entry('ip saddr 192.0.2.1 tcp dport 22 accept'),
+            _entry('ip saddr 192.0.2.2 tcp dport 443 drop'),
+        ],
+        # "not a" and "not b" is not "not in { a, b }".
+        [
+            _entry('ip saddr != 192.0.2.1 tcp dport 22 accept'),
+            _entry('ip saddr != 192.0.2.2 tcp dport 443 accept'),
+        ],
+        # Each rule has a rate limit of its own.
+        [
+            _entry('ip saddr 192.0.2.1 tcp dport 22 limit rate 5/second accept'),
+            _entry('ip saddr 192.0.2.2 tcp dport 443 limit rate 5/second accept'),
+        ],
+        # A named set cannot be an element.
+        [
+            _entry('ip saddr @blocked tcp dport 22 drop'),
+            _entry('ip saddr @other tcp dport 443 drop'),
+        ],
+    ]
+    for entries in cases:
+        chains = {'input': list(entries)}
+        assert fold_concatenations(chains) == {}
+        assert chains['input'] == entries
@@ -0,0 +1,91 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Interface-bound rules are dispatched through a verdict map.
+
+With ``interface_dispatch`` on, a run of rules that each match one
+interface by name moves into a chain per interface, reached from one
+``iifname vmap`` rule.  A packet must meet the same rules in the same
+order as before: a rule for any interface stays between the runs around
+it, and a rule whose verdict means something else in a jumped-to chain
+is never moved.
+"""
+
+from firewallfabrik.platforms.nftables._print_rule import dispatch_by_interface
+
+
+def _rules(*lines):
+    return ''.join(f'        {line}\n' for line in lines)
+
+
+def test_a_run_is_split_by_interface_behind_one_lookup():
+    rules = _rules(
+        '#',
+        '# Rule 0 (eth0)',
+        'iifname "eth0" tcp dport 22 counter accept',
+        'iifname "eth1" udp dport 53 counter accept',
+        'iifname "eth0" counter drop',
+    )
+    text, chains = dispatch_by_interface(rules, 'input', 'iifname', {'input'})
+    assert text == _rules(
+        'iifname vmap { "eth0" : jump input_eth0, "eth1" : jump input_eth1 }'
+    )
+    assert chains == {
+        'input_eth0': _rules(
+            '#', '# Rule 0 (eth0)', 'tcp dport 22 counter accept', 'counter drop'
+        ),
+        'input_eth1': _rules('udp dport 53 counter accept'),
+    }
+
+
+def test_a_rule_for_any_interface_keeps_its_place_between_two_runs():
+    rules = _rules(
+        'iifname "eth0" tcp dport 22 counter accept',
+        'iifname "eth0" tcp dport 25 counter accept',
+        'ip saddr 192.0.2.1 counter drop',
+        'iifname "eth0" tcp dport 80 counter accept',
+        'iifname "eth0" tcp dport 443 counter accept',
+    )
+    text, chains = dispatch_by_interface(rules, 'input', 'iifname', {'input'})
+    assert text == _rules(
+        'iifname vmap { "eth0" : jump input_eth0 }',
+        'ip saddr 192.0.2.1 counter drop',
+        'iifname vmap { "eth0" : jump input_eth0_2 }',
+    )
+    assert list(chains) == ['input_eth0', 'input_eth0_2']
+
+
+def test_what_cannot_be_moved_is_left_as_it_is():
+    rules = _rules(
+        'iifname "eth*" counter accept',
+        'iifname != "eth0" counter drop',
+        'iifname { "eth0", "eth1" } counter accept',
+        'iifname "eth0" counter return',
+        'iifname "eth0" counter goto Policy_1',
+        'oifname "eth0" counter accept',
+        'iifname "eth0" counter accept',
+    )
+    text, chains = dispatch_by_interface(rules, 'input', 'iifname', {'input'})
+    assert text == rules
+    assert chains == {}
+
+
+def test_a_chain_name_already_in_use_is_not_given_out_again():
+    rules = _rules(
+        'oifname "eth0" counter accept',
+        'oifname "eth0" counter drop',
+    )
+    taken = {'output', 'output_eth0'}
+    text, chains = dispatch_by_interface(rules, 'output', 'oifname', taken)
+    assert text == _rules('oifname vmap { "eth0" : jump output_eth0_2 }')
+    assert 'output_eth0_2' in taken
+    assert list(chains) == ['output_eth0_2']
@@ -0,0 +1,144 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Element lists that many rules repeat are declared once, as named sets.
+
+With ``named_set_threshold`` set, every anonymous set of addresses or
+ports that more rule lines of a table carry than the threshold is moved
+into a named set of that table, and the rules refer to it by name.  What
+the rules match must not change: a negation stays a negation, a list used
+by few rules stays where it is, and comments are left alone.
+"""
+
+import hashlib
+
+from firewallfabrik.platforms.nftables import _print_rule
+from firewallfabrik.platforms.nftables._compiler_driver import _declare_named_sets
+from firewallfabrik.platforms.nftables._print_rule import extract_named_sets
+
+_ADMINS = '{ 192.0.2.1, 192.0.2.2, 198.51.100.0/24 }'
+
+
+def _chains():
+    return {
+        'input': [
+            f'ip saddr {_ADMINS} tcp dport 22 counter accept',
+            f'ip saddr != {_ADMINS} tcp dport 22 counter drop',
+        ],
+        'forward': [
+            f'# ip saddr {_ADMINS}\nip daddr {_ADMINS} counter accept',
+            'ip saddr { 203.0.113.1, 203.0.113.2 } counter accept',
+        ],
+    }
+
+
+def test_a_threshold_of_zero_changes_nothing():
+    chains = _chains()
+    assert extract_named_sets(chains, 0) == {}
+    assert chains == _chains()
+
+
+def test_a_list_used_more_often_than_the_threshold_becomes_a_named_set():
+    chains = _chains()
+    sets = extract_named_sets(chains, 2)
+    [(name, (set_type, elements))] = sets.items()
+    assert name.startswith('addrs_')
+    assert set_type == 'ipv4_addr'
+    assert elements == ['192.0.2.1', '192.0.2.2', '198.51.100.0/24']
+    assert chains['input'] == [
+        f'ip saddr @{name} tcp dport 22 counter accept',
+        f'ip saddr != @{name} tcp dport 22 counter drop',
+    ]
+    assert chains['forward'] == [
+        f'# ip saddr {_ADMINS}\nip daddr @{name} counter accept',
+        'ip saddr { 203.0.113.1, 203.0.113.2 } counter accept',
+    ]
+
+
+def test_a_list_used_no_more_often_than_the_threshold_stays_inline():
+    chains = _chains()
+    assert extract_named_sets(chains, 3) == {}
+    assert chains == _chains()
+
+
+def test_the_name_follows_the_elements_not_their_order():
+    first = {'input': [f'ip saddr {_ADMINS} accept'] * 2}
+    second = {
+        'input': ['ip saddr { 198.51.100.0/24, 192.0.2.2, 192.0.2.1 } accept'] * 2
+    }
+    assert extract_named_sets(first, 1).keys() == extract_named_sets(second, 1).keys()
+
+
+def test_ports_and_ipv6_addresses_get_sets_of_their_own_type():
+    chains = {
+        'input': [
+            'ip6 saddr { 2001:db8::1, 2001:db8::2 } tcp dport { 80, 443 } accept',
+            'ip6 daddr { 2001:db8::1, 2001:db8::2 } udp dport { 80, 443 } accept',
+        ],
+    }
+    sets = extract_named_sets(chains, 1)
+    assert sorted(t for t, _elements in sets.values()) == [
+        'inet_service',
+        'ipv6_addr',
+    ]
+    assert all(n.endswith('_v6') for n, (t, _e) in sets.items() if t == 'ipv6_addr')
+    assert '{' not in ''.join(chains['input'])
+
+
+def test_a_concatenation_is_left_alone():
+    line = 'ip saddr . tcp dport { 192.0.2.1 . 22, 192.0.2.2 . 22 } accept'
+    chains = {'input': [line, line]}
+    assert extract_named_sets(chains, 1) == {}
+    assert chains['input'] == [line, line]
+
+
+def test_the_declaration_allows_ranges_and_networks():
+    text = _declare_named_sets(
+        {'ports_0a1b2c3d': ('inet_service', ['22', '8000-8080'])}
+    )
+    assert text == (
+        '    set ports_0a1b2c3d {\n'
+        '        type inet_service\n'
+        '        flags interval\n'
+        '        auto-merge\n'
+        '        elements = { 22, 8000-8080 }\n'
+        '    }\n'
+        '\n'
+    )
+    assert _declare_named_sets({}) == ''
+
+
+def test_lists_whose_names_clash_get_sets_of_their_own(monkeypatch):
+    sha256 = hashlib.sha256
+
+    class _ShortDigest:
+        def __init__(self, data):
+            self._real = sha256(data).hexdigest()
+
+        def hexdigest(self):
+            return '0' * 8 + self._real[8:]
+
+    monkeypatch.setattr(_print_rule.hashlib, 'sha256', _ShortDigest)
+    chains = {
+        'input': [f'ip saddr {_ADMINS} accept'] * 2
+        + ['ip saddr { 203.0.113.1, 203.0.113.2 } accept'] * 2
+    }
+    sets = extract_named_sets(chains, 1)
+
+    assert len(sets) == 2
+    first, second = sets
+    assert first == 'addrs_00000000'
+    assert len(second) == len('addrs_') + 16
+    assert (
+        chains['input']
+        == [f'ip saddr @{first} accept'] * 2 + [f'ip saddr @{second} accept'] * 2
+    )
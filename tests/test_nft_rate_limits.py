@@ -149,8 +149,8 @@ def test_a_burst_nftables_would_cut_down_leaves_the_rule_out():
 @pytest.mark.parametrize(
     ('line', 'merges_on'),
     [
-        # An ordinary rule still merges on its address.
-        ('ip saddr 10.0.0.1 tcp dport 22 counter accept', 'saddr'),
+        # An ordinary rule still merges on its address and its port.
+        ('ip saddr 10.0.0.1 tcp dport 22 counter accept', ('saddr', 'dport')),
         # The `ip saddr` of a connection limit is the key of its set, not
         # the rule's address match: merging two of these would write a set
         # inside the braces, which nftables answers with a syntax error.
@@ -159,15 +159,15 @@ def test_a_burst_nftables_would_cut_down_leaves_the_rule_out():
         # The other side of such a rule is still a real address match.
         (
             'ip daddr 10.0.0.1 add @s { ip saddr ct count over 10 } counter drop',
-            'daddr',
+            ('daddr',),
         ),
     ],
 )
 def test_the_set_merge_ignores_an_address_inside_a_rate_limit(line, merges_on):
-    from firewallfabrik.platforms.nftables._print_rule import _parse_addr
+    from firewallfabrik.platforms.nftables._print_rule import _parse_fields
 
-    parsed = _parse_addr(line)
-    assert (parsed[3] if parsed else None) == merges_on
+    parsed = _parse_fields(line, allow_state=True)
+    assert (tuple(m.group(2) for m in parsed[1]) if parsed else None) == merges_on
 
 
 class _FirewallWithLogLimit:
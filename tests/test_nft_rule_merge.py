@@ -0,0 +1,219 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""The rules of one original rule merge into sets, adjacent or not.
+
+`optimize_chain_rules` merges a rule into an earlier rule of the same
+original rule when the two differ in the values of one address or port
+match, and moves it up past the rules in between when none of them can
+match a packet it matches.  Every case here is checked twice: for the text
+it produces, and with a small first-match evaluator over a grid of
+packets, for giving every packet the verdict it had before.
+"""
+
+import itertools
+import re
+
+import pytest
+
+from firewallfabrik.platforms.nftables._print_rule import optimize_chain_rules
+
+_HEADER = '        #\n        # Rule 1 (global)\n        #\n'
+
+_MATCH_RE = re.compile(
+    r'(iifname|ip saddr|ip daddr|tcp dport|udp dport) (!= )?(\{[^}]+\}|\S+)'
+)
+
+
+def _entries(*lines, header=_HEADER):
+    return [
+        f'{header if i == 0 else ""}        {line}\n' for i, line in enumerate(lines)
+    ]
+
+
+def _verdict(entries, packet):
+    """The verdict of the first rule of *entries* that matches *packet*."""
+    for entry in entries:
+        line = entry.rstrip('\n').split('\n')[-1].strip()
+        if line.startswith('#'):
+            continue
+        matched = True
+        for field, neg, value in _MATCH_RE.findall(line):
+            values = {v.strip().strip('"') for v in value.strip('{}').split(',')}
+            key = field.split()[-1] if field != 'iifname' else field
+            if field.startswith(('tcp', 'udp')) and packet['proto'] != field[:3]:
+                matched = False
+                break
+            if (packet[key] in values) == bool(neg):
+                matched = False
+                break
+        if matched:
+            return line.split()[-1]
+    return 'policy'
+
+
+_PACKETS = [
+    dict(zip(('iifname', 'saddr', 'daddr', 'proto', 'dport'), values, strict=True))
+    for values in itertools.product(
+        ('eth0', 'eth1'),
+        ('192.0.2.1', '192.0.2.2', '192.0.2.3'),
+        ('198.51.100.1', '198.51.100.2'),
+        ('tcp', 'udp'),
+        ('22', '443'),
+    )
+]
+
+
+def _optimize(entries):
+    chains = {'input': list(entries)}
+    optimize_chain_rules(chains)
+    return chains['input']
+
+
+def _assert_same_verdicts(before, after):
+    for packet in _PACKETS:
+        assert _verdict(before, packet) == _verdict(after, packet), packet
+
+
+CASES = {
+    'adjacent addresses': (
+        _entries(
+            'ip saddr 192.0.2.1 tcp dport 22 accept',
+            'ip saddr 192.0.2.2 tcp dport 22 accept',
+        ),
+        _entries('ip saddr { 192.0.2.1, 192.0.2.2 } tcp dport 22 accept'),
+    ),
+    'the destination when the source is the same': (
+        _entries(
+            'ip saddr 192.0.2.1 ip daddr 198.51.100.1 tcp dport 22 accept',
+            'ip saddr 192.0.2.1 ip daddr 198.51.100.2 tcp dport 22 accept',
+        ),
+        _entries(
+            'ip saddr 192.0.2.1 ip daddr { 198.51.100.1, 198.51.100.2 } '
+            'tcp dport 22 accept'
+        ),
+    ),
+    'ports': (
+        _entries(
+            'ip saddr 192.0.2.1 tcp dport 22 accept',
+            'ip saddr 192.0.2.1 tcp dport 443 accept',
+        ),
+        _entries('ip saddr 192.0.2.1 tcp dport { 22, 443 } accept'),
+    ),
+    'past a rule of another protocol': (
+        _entries(
+            'ip saddr 192.0.2.1 tcp dport 22 accept',
+            'ip saddr 192.0.2.1 udp dport 22 drop',
+            'ip saddr 192.0.2.2 tcp dport 22 accept',
+        ),
+        _entries(
+            'ip saddr { 192.0.2.1, 192.0.2.2 } tcp dport 22 accept',
+            'ip saddr 192.0.2.1 udp dport 22 drop',
+        ),
+    ),
+    'past a rule of another interface': (
+        _entries(
+            'iifname "eth0" ip saddr 192.0.2.1 accept',
+            'iifname "eth1" ip saddr 192.0.2.2 drop',
+            'iifname "eth0" ip saddr 192.0.2.2 accept',
+        ),
+        _entries(
+            'iifname "eth0" ip saddr { 192.0.2.1, 192.0.2.2 } accept',
+            'iifname "eth1" ip saddr 192.0.2.2 drop',
+        ),
+    ),
+    'adjacent addresses of a rate limited rule, as always': (
+        _entries(
+            'ip saddr 192.0.2.1 tcp dport 22 limit rate 5/second accept',
+            'ip saddr 192.0.2.2 tcp dport 22 limit rate 5/second accept',
+        ),
+        _entries(
+            'ip saddr { 192.0.2.1, 192.0.2.2 } tcp dport 22 limit rate 5/second accept'
+        ),
+    ),
+    'past a rule of other addresses': (
+        _entries(
+            'ip saddr 192.0.2.1 tcp dport 22 accept',
+            'ip saddr 192.0.2.3 drop',
+            'ip saddr 192.0.2.2 tcp dport 22 accept',
+        ),
+        _entries(
+            'ip saddr { 192.0.2.1, 192.0.2.2 } tcp dport 22 accept',
+            'ip saddr 192.0.2.3 drop',
+        ),
+    ),
+}
+
+
+@pytest.mark.parametrize(('before', 'expected'), CASES.values(), ids=CASES.keys())
+def test_rules_merge_and_every_packet_keeps_its_verdict(before, expected):
+    after = _optimize(before)
+    assert after == expected
+    _assert_same_verdicts(before, after)
+
+
+KEPT = {
+    'a rule in between that can match the same packets': _entries(
+        'ip saddr 192.0.2.1 tcp dport 22 accept',
+        'tcp dport 22 drop',
+        'ip saddr 192.0.2.2 tcp dport 22 accept',
+    ),
+    'a rule in between of overlapping addresses': _entries(
+        'ip saddr 192.0.2.1 tcp dport 22 accept',
+        'ip saddr 192.0.2.0/24 drop',
+        'ip saddr 192.0.2.2 tcp dport 22 accept',
+    ),
+    'a rule in between matching a service by name': _entries(
+        'ip saddr 192.0.2.1 tcp dport 22 accept',
+        'ip saddr 192.0.2.2 tcp dport ssh drop',
+        'ip saddr 192.0.2.2 tcp dport 22 accept',
+    ),
+    'two matches that differ': _entries(
+        'ip saddr 192.0.2.1 tcp dport 22 accept',
+        'ip saddr 192.0.2.2 tcp dport 443 accept',
+    ),
+    'another verdict': _entries(
+        'ip saddr 192.0.2.1 accept',
+        'ip saddr 192.0.2.2 drop',
+    ),
+    'negated lines that are not next to each other': _entries(
+        'ip daddr != 198.51.100.1 tcp dport 22 accept',
+        'ip daddr 198.51.100.2 udp dport 22 drop',
+        'ip daddr != 198.51.100.2 tcp dport 22 accept',
+    ),
+    # One rule of both would share one budget between them.
+    'rate limits on other ports': _entries(
+        'tcp dport 22 limit rate 5/second accept',
+        'tcp dport 443 limit rate 5/second accept',
+    ),
+    'rate limits on the destination of the same source': _entries(
+        'ip saddr 10.0.0.1 ip daddr 192.0.2.1 tcp dport 22 limit rate 5/second accept',
+        'ip saddr 10.0.0.1 ip daddr 192.0.2.2 tcp dport 22 limit rate 5/second accept',
+    ),
+    'quotas that are not next to each other': _entries(
+        'ip saddr 192.0.2.1 tcp dport 22 quota until 100 mbytes accept',
+        'ip saddr 192.0.2.3 udp dport 53 drop',
+        'ip saddr 192.0.2.2 tcp dport 22 quota until 100 mbytes accept',
+    ),
+}
+
+
+@pytest.mark.parametrize('before', KEPT.values(), ids=KEPT.keys())
+def test_rules_that_cannot_merge_are_left_as_they_are(before):
+    assert _optimize(before) == before
+
+
+def test_rules_of_another_original_rule_are_never_merged():
+    before = _entries('ip saddr 192.0.2.1 accept') + _entries(
+        'ip saddr 192.0.2.2 accept'
+    )
+    assert _optimize(before) == before
@@ -0,0 +1,198 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""The nftables script fills a run-time set from a batch file.
+
+``load_address_table`` used to join the whole file with ``paste -sd,`` and
+hand it to ``nft add element`` as one argument, which a block list of a
+million addresses overflows.  The shell functions are cut out of a compiled
+script and run here against a stand-in ``nft`` that keeps the file it is
+handed.
+"""
+
+import shutil
+import subprocess  # nosec B404
+from pathlib import Path
+
+import pytest
+import sqlalchemy
+
+from firewallfabrik.core import DatabaseManager
+from firewallfabrik.core.objects import Firewall
+from firewallfabrik.platforms.nftables._compiler_driver import CompilerDriver_nft
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+
+pytestmark = pytest.mark.skipif(
+    shutil.which('sh') is None or shutil.which('awk') is None,
+    reason='no POSIX shell',
+)
+
+# Records every call and appends every batch file it is handed.
+_FAKE_NFT = """\
+#!/bin/sh
+echo "$*" >> "$LOG"
+test "$1" = "-f" && cat "$2" >> "$BATCH"
+exit 0
+"""
+
+
+@pytest.fixture(scope='module')
+def script(tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp('nft')
+    db = DatabaseManager()
+    db.load(str(FIXTURES / 'objects-for-regression-tests.fwb'))
+    with db.session() as session:
+        fw_id = str(
+            session.execute(
+                sqlalchemy.select(Firewall).where(Firewall.name == 'firewall34'),
+            )
+            .scalar_one()
+            .id
+        )
+    driver = CompilerDriver_nft(db)
+    driver.wdir = str(tmp_path)
+    driver.source_dir = str(FIXTURES)
+    driver.file_name_setting = 'firewall34.fw'
+    driver.run(cluster_id='', fw_id=fw_id, single_rule_id='')
+    return Path(driver.file_names[fw_id]).read_text()
+
+
+def _run(tmp_path, script, commands):
+    functions = script[
+        script.index('load_set_elements() {') : script.index('load_address_tables() {')
+    ]
+    nft = tmp_path / 'nft'
+    nft.write_text(_FAKE_NFT)
+    nft.chmod(0o755)
+    run = tmp_path / 'run.sh'
+    run.write_text(f'NFT="{nft}"\n{functions}\n{commands}\n')
+    log = tmp_path / 'log'
+    batch = tmp_path / 'batch'
+    log.touch()
+    batch.touch()
+    subprocess.run(  # nosec B603 B607
+        ['sh', str(run)],
+        check=True,
+        capture_output=True,
+        text=True,
+        env={'LOG': str(log), 'BATCH': str(batch), 'PATH': '/usr/bin:/bin'},
+    )
+    return log.read_text().splitlines(), batch.read_text().splitlines()
+
+
+def test_the_table_is_handed_to_nft_as_one_file(tmp_path, script):
+    table = tmp_path / 'block.txt'
+    table.write_text(
+        '# a block list\n\n  192.0.2.1\n198.51.100.0/24 ; a comment\n2001:db8::1\n'
+    )
+    calls, batch = _run(
+        tmp_path, script, f'load_address_table "ip" "fwf_filter" "block" "{table}" "-4"'
+    )
+
+    assert len(calls) == 1
+    assert calls[0].startswith('-f ')
+    assert batch == [
+        'add element ip fwf_filter block { 192.0.2.1, 198.51.100.0/24 }',
+    ]
+
+
+def test_the_ipv6_set_takes_the_ipv6_lines(tmp_path, script):
+    table = tmp_path / 'block.txt'
+    table.write_text('192.0.2.1\n2001:db8::1\n2001:db8:1::/48\n')
+    _, batch = _run(
+        tmp_path, script, f'load_address_table "inet" "fwf_filter" "b6" "{table}" "-6"'
+    )
+
+    assert batch == ['add element inet fwf_filter b6 { 2001:db8::1, 2001:db8:1::/48 }']
+
+
+def test_a_large_table_is_written_in_bounded_commands(tmp_path, script):
+    table = tmp_path / 'block.txt'
+    table.write_text(
+        ''.join(f'10.{i >> 16}.{(i >> 8) & 255}.{i & 255}\n' for i in range(2500))
+    )
+    calls, batch = _run(
+        tmp_path, script, f'load_address_table "ip" "fwf_filter" "block" "{table}" "-4"'
+    )
+
+    assert len(calls) == 1
+    assert [line.count(',') + 1 for line in batch] == [1000, 1000, 500]
+    assert batch[2].endswith('10.0.9.195 }')
+
+
+def test_an_empty_table_does_not_call_nft(tmp_path, script):
+    table = tmp_path / 'block.txt'
+    table.write_text('# nothing to block yet\n')
+    calls, _ = _run(
+        tmp_path, script, f'load_address_table "ip" "fwf_filter" "block" "{table}" "-4"'
+    )
+
+    assert calls == []
+
+
+def test_dns_names_are_resolved_in_the_background():
+    driver = CompilerDriver_nft(DatabaseManager())
+    driver.filter_address_tables = {
+        'block': ('block.txt', False, 'file'),
+        'web': ('www.example.com', False, 'host'),
+        'web_v6': ('www.example.com', True, 'host'),
+    }
+    code = driver._address_table_load_commands(
+        'inet', 'fwf_filter', 'fwf_mangle', 'fwf_nat'
+    )
+
+    assert code.splitlines() == [
+        '    pids=""',
+        '    load_address_table "inet" "fwf_filter" "block" "block.txt" "-4" || status=1',
+        '    load_dns_name "inet" "fwf_filter" "web" "www.example.com" "-4" &',
+        '    pids="$pids $!"',
+        '    load_dns_name "inet" "fwf_filter" "web_v6" "www.example.com" "-6" &',
+        '    pids="$pids $!"',
+        '    for pid in $pids; do',
+        '        wait "$pid" || status=1',
+        '    done',
+    ]
+
+
+@pytest.mark.parametrize(
+    ('file_loader', 'dns_loader', 'returncode'),
+    [
+        ('true', 'true', 0),
+        ('false', 'true', 1),
+        ('true', 'false', 1),
+    ],
+)
+def test_a_failed_load_makes_loading_the_tables_fail(
+    tmp_path, file_loader, dns_loader, returncode
+):
+    driver = CompilerDriver_nft(DatabaseManager())
+    driver.filter_address_tables = {
+        'block': ('block.txt', False, 'file'),
+        'web': ('www.example.com', False, 'host'),
+        'web_v6': ('www.example.com', True, 'host'),
+    }
+    code = driver._address_table_load_commands(
+        'inet', 'fwf_filter', 'fwf_mangle', 'fwf_nat'
+    )
+    run = tmp_path / 'run.sh'
+    run.write_text(
+        f'load_address_table() {{ {file_loader}; }}\n'
+        f'load_dns_name() {{ test "$5" = "-6" || {dns_loader}; }}\n'
+        f'load_address_tables() {{\n    status=0\n{code}\n    return $status\n}}\n'
+        'load_address_tables\n'
+    )
+    result = subprocess.run(  # nosec B603 B607
+        ['sh', str(run)], check=False, env={'PATH': '/usr/bin:/bin'}
+    )
+
+    assert result.returncode == returncode
@@ -15,7 +15,7 @@
 Firewall Builder writes the tags of every object as one comma-separated
 `keywords` attribute (`FWObject::toXML`, `setToString`) and reads them
 back with `stringToSet`.  The `.fwb` reader left them in the untyped
-`data` dict, where the editor's tag field and `_matches_dynamic_criteria`
+`data` dict, where the editor's tag field and `matches_dynamic_criteria`
 - the only two consumers - never look, so an imported object came in
 untagged and every Dynamic Group naming a tag resolved to nothing.
 """
@@ -26,7 +26,7 @@ import pytest
 import sqlalchemy
 
 import firewallfabrik.core
-from firewallfabrik.compiler._compiler import _matches_dynamic_criteria
+from firewallfabrik.core._dynamic_groups import matches_dynamic_criteria
 from firewallfabrik.core.objects import Host, Interface, IPv4, ObjectGroup
 
 FWB = """\
@@ -104,5 +104,5 @@ def test_the_tag_is_not_left_in_the_untyped_data_dict(session):
 def test_a_dynamic_group_selects_on_the_imported_tag(session):
     """The one consumer in the compiler, and the reason this matters."""
     criteria = [{'type': 'Host', 'keyword': 'prod'}]
-    assert _matches_dynamic_criteria(_one(session, Host, 'tagged-host'), criteria)
-    assert not _matches_dynamic_criteria(_one(session, Host, 'plain-host'), criteria)
+    assert matches_dynamic_criteria(_one(session, Host, 'tagged-host'), criteria)
+    assert not matches_dynamic_criteria(_one(session, Host, 'plain-host'), criteria)
@@ -0,0 +1,136 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""The printer reuses the text the dedup pass rendered for a rule.
+
+Optimize3 renders every rule muted to compare it with the rules before it,
+and PrintRule used to render the same rule again.  The kept text may only
+stand in for a second render when that render would have produced the same
+text and the same messages: the rule is unchanged, nothing new was said
+about it, and being muted made no difference while the text was built.
+"""
+
+import uuid
+
+from firewallfabrik.compiler._comp_rule import CompRule
+from firewallfabrik.compiler._compiler import Compiler
+from firewallfabrik.core.objects import PolicyAction
+
+
+def _rule():
+    return CompRule(
+        id=uuid.uuid4(),
+        type='PolicyRule',
+        position=1,
+        label='1 (global)',
+        comment='',
+        options={},
+        negations={},
+        action=PolicyAction.Accept,
+    )
+
+
+class _Printer:
+    def __init__(self, compiler, warn=False, ask=False):
+        self.compiler = compiler
+        self.warn = warn
+        self.ask = ask
+        self.calls = 0
+
+    def __call__(self, rule):
+        self.calls += 1
+        if self.warn:
+            self.compiler.warning(rule, 'something about this rule')
+        if self.ask:
+            self.compiler.muted_now  # noqa: B018
+        return f'-A INPUT -j {rule.ipt_target or "ACCEPT"}'
+
+
+def _compiler():
+    return Compiler(None, None, False)
+
+
+def test_the_printer_takes_the_text_of_the_dedup_pass():
+    compiler = _compiler()
+    rule = _rule()
+    printer = _Printer(compiler)
+    text = compiler.render_muted(rule, printer)
+    assert compiler.render(rule, printer) == text
+    assert printer.calls == 1
+    assert compiler.render_hits == 1
+
+
+def test_the_text_is_used_once():
+    compiler = _compiler()
+    rule = _rule()
+    printer = _Printer(compiler)
+    compiler.render_muted(rule, printer)
+    compiler.render(rule, printer)
+    compiler.render(rule, printer)
+    assert printer.calls == 2
+
+
+def test_a_rule_changed_after_the_dedup_pass_is_rendered_again():
+    compiler = _compiler()
+    rule = _rule()
+    printer = _Printer(compiler)
+    compiler.render_muted(rule, printer)
+    rule.ipt_target = 'DROP'
+    assert compiler.render(rule, printer) == '-A INPUT -j DROP'
+    assert compiler.render_hits == 0
+
+
+def test_an_element_list_edited_in_place_counts_as_a_change():
+    compiler = _compiler()
+    rule = _rule()
+    printer = _Printer(compiler)
+    compiler.render_muted(rule, printer)
+    rule.src.append(object())
+    compiler.render(rule, printer)
+    assert printer.calls == 2
+
+
+def test_a_message_recorded_since_makes_the_printer_render_again():
+    compiler = _compiler()
+    rule = _rule()
+    printer = _Printer(compiler)
+    compiler.render_muted(rule, printer)
+    compiler.warning(rule, 'said between the two passes')
+    compiler.render(rule, printer)
+    assert printer.calls == 2
+
+
+def test_a_render_that_lost_a_message_to_muting_is_not_kept():
+    compiler = _compiler()
+    rule = _rule()
+    printer = _Printer(compiler, warn=True)
+    compiler.render_muted(rule, printer)
+    assert compiler.get_errors_for_rule(rule) == ''
+    compiler.render(rule, printer)
+    assert printer.calls == 2
+    assert 'something about this rule' in compiler.get_errors_for_rule(rule)
+
+
+def test_a_render_that_asked_whether_it_was_muted_is_not_kept():
+    compiler = _compiler()
+    rule = _rule()
+    printer = _Printer(compiler, ask=True)
+    compiler.render_muted(rule, printer)
+    compiler.render(rule, printer)
+    assert printer.calls == 2
+
+
+def test_a_clone_does_not_inherit_the_text():
+    compiler = _compiler()
+    rule = _rule()
+    compiler.render_muted(rule, _Printer(compiler))
+    assert rule.clone().rendered is None
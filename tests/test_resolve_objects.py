@@ -0,0 +1,62 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""A batch of object IDs is looked up only in the tables that hold them.
+
+`_resolve_objects` reads once per session which of the six object tables
+holds which ID. Asking the other five tables for every batch - every rule
+set loaded, every group expanded - is what it saves, and an object added
+after the index was read must still be found.
+"""
+
+import uuid
+
+import sqlalchemy
+
+import firewallfabrik.core
+from firewallfabrik.compiler._comp_rule import _resolve_objects
+from firewallfabrik.core.objects import IPv4, Library, Service
+
+from .conftest import FIXTURES_DIR
+
+
+def _count_queries(session):
+    queries = []
+    sqlalchemy.event.listen(
+        session.get_bind(),
+        'before_cursor_execute',
+        lambda *args: queries.append(args[2]),
+    )
+    return queries
+
+
+def test_a_batch_asks_only_the_tables_holding_it():
+    db = firewallfabrik.core.DatabaseManager()
+    db.load(FIXTURES_DIR / 'compiler-tests.fwf')
+    with db.read_session() as session:
+        address_ids = set(session.scalars(sqlalchemy.select(IPv4.id)).all()[:5])
+        service_ids = set(session.scalars(sqlalchemy.select(Service.id)).all()[:5])
+        _resolve_objects(session, address_ids)
+
+        queries = _count_queries(session)
+        resolved = _resolve_objects(session, address_ids | service_ids)
+        assert set(resolved) == address_ids | service_ids
+        assert len(queries) == 2
+
+        added = IPv4(
+            id=uuid.uuid4(),
+            name='added',
+            library_id=session.scalars(sqlalchemy.select(Library.id)).first(),
+        )
+        session.add(added)
+        session.flush()
+        assert _resolve_objects(session, {added.id}) == {added.id: added}
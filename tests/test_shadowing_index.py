@@ -0,0 +1,223 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""The shadowing index finds every shadow the full comparison finds.
+
+`DetectShadowing` no longer compares a rule with every rule above it; it
+asks an index of the seen rules for the ones whose source and destination
+could contain the rule's, and only checks those. An index that misses a
+candidate silently drops a finding, and one that returns them out of order
+reports a different shadowing rule than before. Both show up as a
+difference to the exhaustive scan on a policy mixing hosts, networks,
+ranges, both address families, "any", chains and directions.
+"""
+
+import random
+import uuid
+
+import pytest
+
+from firewallfabrik.compiler._comp_rule import CompRule
+from firewallfabrik.compiler._rule_processor import BasicRuleProcessor
+from firewallfabrik.compiler.processors._generic import DetectShadowing
+from firewallfabrik.core.objects import (
+    AddressRange,
+    Direction,
+    IPv4,
+    IPv6,
+    Network,
+    NetworkIPv6,
+    PolicyAction,
+    TCPService,
+)
+
+
+class _Feeder(BasicRuleProcessor):
+    def __init__(self, rules):
+        super().__init__(name='Feeder')
+        for rule in rules:
+            self.tmp_queue.append(rule)
+
+    def process_next(self) -> bool:
+        return False
+
+
+class _Compiler:
+    def __init__(self):
+        self.warnings = []
+
+    def warning(self, msg):
+        self.warnings.append(msg)
+
+
+class _ExhaustiveShadowing(DetectShadowing):
+    """Compare with every seen rule, as the processor did before the index."""
+
+    def _candidates(self, rule):
+        return self._rules_seen
+
+
+def _run(cls, rules):
+    compiler = _Compiler()
+    proc = cls()
+    proc.set_context(compiler)
+    proc.set_data_source(_Feeder(rules))
+    while proc.get_next_rule() is not None:
+        pass
+    return compiler.warnings
+
+
+def _address_pool(rng):
+    pool = []
+    for i in range(12):
+        pool.append(
+            IPv4(
+                id=uuid.uuid4(),
+                name=f'host-{i}',
+                inet_addr_mask={
+                    'address': f'10.0.{rng.randrange(4)}.{rng.randrange(8)}',
+                    'netmask': '255.255.255.255',
+                },
+            )
+        )
+    for i, (addr, mask) in enumerate(
+        [
+            ('10.0.0.0', '255.255.255.0'),
+            ('10.0.0.0', '255.255.0.0'),
+            ('10.0.2.0', '255.255.254.0'),
+            ('0.0.0.0', '0.0.0.0'),
+        ]
+    ):
+        pool.append(
+            Network(
+                id=uuid.uuid4(),
+                name=f'net-{i}',
+                inet_addr_mask={'address': addr, 'netmask': mask},
+            )
+        )
+    for i, (start, end) in enumerate(
+        [('10.0.0.1', '10.0.0.5'), ('10.0.0.0', '10.0.3.255'), ('10.0.1.7', '10.0.1.7')]
+    ):
+        pool.append(
+            AddressRange(
+                id=uuid.uuid4(),
+                name=f'range-{i}',
+                start_address={'address': start},
+                end_address={'address': end},
+            )
+        )
+    pool.append(
+        IPv6(
+            id=uuid.uuid4(),
+            name='host6',
+            inet_addr_mask={'address': 'fe80::1', 'netmask': '128'},
+        )
+    )
+    pool.append(
+        NetworkIPv6(
+            id=uuid.uuid4(),
+            name='net6',
+            inet_addr_mask={'address': 'fe80::', 'netmask': '64'},
+        )
+    )
+    return pool
+
+
+def _service_pool():
+    pool = []
+    for i, (start, end) in enumerate([(0, 0), (22, 22), (80, 80), (1, 1024)]):
+        svc = TCPService(id=uuid.uuid4(), name=f'tcp-{i}')
+        svc.src_range_start = 0
+        svc.src_range_end = 0
+        svc.dst_range_start = start
+        svc.dst_range_end = end
+        pool.append(svc)
+    return pool
+
+
+def _random_policy(seed, count=400):
+    rng = random.Random(seed)
+    addresses = _address_pool(rng)
+    services = _service_pool()
+
+    def element(pool, any_weight):
+        if rng.random() < any_weight:
+            return []
+        return rng.sample(pool, rng.choice((1, 1, 1, 2)))
+
+    rules = []
+    for number in range(count):
+        rules.append(
+            CompRule(
+                id=uuid.uuid4(),
+                type='PolicyRule',
+                position=number,
+                label=f'rule {number}',
+                comment='',
+                options={},
+                negations={},
+                src=element(addresses, 0.3),
+                dst=element(addresses, 0.3),
+                srv=element(services, 0.3),
+                action=rng.choice((PolicyAction.Accept, PolicyAction.Deny)),
+                direction=rng.choice(
+                    (Direction.Both, Direction.Inbound, Direction.Outbound)
+                ),
+                abs_rule_number=number,
+                ipt_chain=rng.choice(('', 'INPUT', 'FORWARD')),
+            )
+        )
+    return rules
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_index_reports_what_the_exhaustive_scan_reports(seed):
+    expected = _run(_ExhaustiveShadowing, _random_policy(seed))
+    assert expected, 'the policy is meant to produce shadowing findings'
+    assert _run(DetectShadowing, _random_policy(seed)) == expected
+
+
+def test_unrelated_rules_are_not_candidates():
+    hosts = [
+        IPv4(
+            id=uuid.uuid4(),
+            name=f'host-{i}',
+            inet_addr_mask={
+                'address': f'10.{i // 256}.{i % 256}.1',
+                'netmask': '255.255.255.255',
+            },
+        )
+        for i in range(2000)
+    ]
+    rules = [
+        CompRule(
+            id=uuid.uuid4(),
+            type='PolicyRule',
+            position=i,
+            label=f'rule {i}',
+            comment='',
+            options={},
+            negations={},
+            src=[host],
+            dst=[hosts[-1 - i]],
+            action=PolicyAction.Accept,
+            abs_rule_number=i,
+        )
+        for i, host in enumerate(hosts)
+    ]
+    proc = DetectShadowing()
+    proc.set_context(_Compiler())
+    proc.set_data_source(_Feeder(rules[:-1]))
+    while proc.get_next_rule() is not None:
+        pass
+
+    assert proc._candidates(rules[-1]) == []
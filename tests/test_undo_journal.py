@@ -0,0 +1,133 @@
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Undo and redo replay the rows an edit touched, and nothing else.
+
+The history used to hold a full dump of the database per state; it now
+holds, per state, the SQL the journal triggers recorded for the rows the
+edit changed. Whatever path the GUI takes through the history - undo,
+redo, a jump several states away - has to land on exactly the database
+that state had, down to the last row, or an undo silently keeps half of
+an edit.
+"""
+
+import sqlalchemy
+
+import firewallfabrik.core
+from firewallfabrik.core.objects import Firewall, Rule, rule_elements
+
+from .conftest import FIXTURES_DIR
+
+
+def _load():
+    db = firewallfabrik.core.DatabaseManager()
+    db.load(FIXTURES_DIR / 'compiler-tests.fwf')
+    return db
+
+
+def _dump(db):
+    connection = db.engine.raw_connection()
+    try:
+        return list(connection.iterdump())
+    finally:
+        connection.close()
+
+
+def _rename_first_firewall(db, name):
+    with db.session(f'Rename to {name}') as session:
+        fw = session.scalars(
+            sqlalchemy.select(Firewall).order_by(Firewall.name)
+        ).first()
+        fw.name = name
+
+
+def _delete_a_rule(db):
+    with db.session('Delete rule') as session:
+        rule_id = session.execute(sqlalchemy.select(rule_elements.c.rule_id)).first()[0]
+        session.execute(
+            sqlalchemy.delete(rule_elements).where(rule_elements.c.rule_id == rule_id)
+        )
+        session.execute(sqlalchemy.delete(Rule).where(Rule.id == rule_id))
+
+
+def test_undo_redo_and_jumps_restore_every_state():
+    db = _load()
+    states = [_dump(db)]
+    _rename_first_firewall(db, "it's renamed")
+    states.append(_dump(db))
+    _delete_a_rule(db)
+    states.append(_dump(db))
+    top = db.get_history()[-1].index
+
+    assert db.undo()
+    assert _dump(db) == states[1]
+    assert db.undo()
+    assert _dump(db) == states[0]
+    assert db.redo()
+    assert _dump(db) == states[1]
+    assert db.jump_to(top)
+    assert _dump(db) == states[2]
+    assert db.jump_to(top - 2)
+    assert _dump(db) == states[0]
+
+
+def test_an_entry_holds_only_the_rows_of_its_edit():
+    db = _load()
+    _rename_first_firewall(db, 'renamed')
+
+    entry = db._history[-1]
+    assert len(entry.undo) == 1
+    assert len(entry.redo) == 1
+    assert entry.undo[0].startswith('UPDATE "devices" SET ')
+
+
+def test_changes_not_saved_to_the_history_are_dropped_on_undo():
+    db = _load()
+    before = _dump(db)
+    _rename_first_firewall(db, 'renamed')
+
+    session = db.create_session()
+    fw = session.scalars(sqlalchemy.select(Firewall).order_by(Firewall.name)).first()
+    fw.comment = 'never saved to the history'
+    session.commit()
+    session.close()
+
+    assert db.undo()
+    assert _dump(db) == before
+
+
+def test_history_is_bounded():
+    db = _load()
+    db.HISTORY_LIMIT = 3
+    for i in range(5):
+        _rename_first_firewall(db, f'fw-{i}')
+
+    assert len(db.get_history()) == 3
+    assert db.is_dirty
+    assert db.undo()
+    assert db.undo()
+    assert not db.can_undo
+    with db.session() as session:
+        names = set(session.scalars(sqlalchemy.select(Firewall.name)))
+    assert 'fw-2' in names
+
+
+def test_a_deserialized_database_is_journaled():
+    image = _load().serialize()
+    db = firewallfabrik.core.DatabaseManager()
+    db.deserialize(image)
+    db.save_state('Base')
+    before = _dump(db)
+    _rename_first_firewall(db, 'renamed')
+
+    assert db.undo()
+    assert _dump(db) == before
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Time loading a compile-time Address Table of 500,000 lines.
+
+Every compiler that meets an Address Table - one per rule set and address
+family - used to read the file, pick each address out of its line a
+character at a time and build a network object per line.
+`load_address_table` reads a file once per address family and process and
+keeps the objects until the file changes. This writes a block list of
+IPv4 and IPv6 hosts and networks with the comments and blank lines such
+lists carry, and loads it the old way, once with an empty cache and once
+more from the cache, for each family:
+
+    python tools/benchmarks/address-table.py
+    python tools/benchmarks/address-table.py --lines 200000 --compilers 6
+
+A driver run with *--compilers* compilers meeting the table paid the old
+time that often; it now pays the first load once. Both ways must give the
+same addresses, or the script exits with 1.
+"""
+
+from __future__ import annotations
+
+import argparse
+import ipaddress
+import random
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from firewallfabrik.compiler._address_table import (
+    clear_address_tables,
+    load_address_table,
+)
+from firewallfabrik.core.objects import Network, NetworkIPv6
+
+
+def _write_table(path, lines, seed):
+    rng = random.Random(seed)
+    with path.open('w') as f:
+        f.write('# block list, generated\n\n')
+        for n in range(lines):
+            if n % 50 == 0:
+                f.write(f'# section {n // 50}\n')
+            if n % 5 == 0:
+                net = ipaddress.IPv6Network((rng.getrandbits(64) << 64, 64))
+                f.write(f'{net}\n')
+            elif n % 3 == 0:
+                f.write(f'{ipaddress.IPv4Address(rng.getrandbits(32))}/24  # range\n')
+            else:
+                f.write(f'  {ipaddress.IPv4Address(rng.getrandbits(32))}\n')
+
+
+def _old_load(path, ipv6):
+    """The loop every compiler ran before."""
+    cls = NetworkIPv6 if ipv6 else Network
+    results = []
+    for line in path.read_text().splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        addr_str = ''
+        for ch in line:
+            if ch in '0123456789abcdef:/.':
+                addr_str += ch
+            else:
+                break
+        if not addr_str:
+            continue
+        if ('.' in addr_str and not ipv6) or (':' in addr_str and ipv6):
+            net = ipaddress.ip_network(addr_str, strict=False)
+            results.append(
+                cls(
+                    id=uuid.uuid4(),
+                    type=cls.__name__,
+                    name=addr_str,
+                    inet_addr_mask={
+                        'address': str(net.network_address),
+                        'netmask': str(net.netmask),
+                    },
+                )
+            )
+    return results
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument(
+        '--lines',
+        type=int,
+        default=500000,
+        help='number of addresses in the table. Default: %(default)s',
+    )
+    parser.add_argument(
+        '--compilers',
+        type=int,
+        default=4,
+        help='compilers of one driver run meeting the table. Default: %(default)s',
+    )
+    parser.add_argument('--seed', type=int, default=1, help='Default: %(default)s')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'block-list.tbl'
+        _write_table(path, args.lines, args.seed)
+
+        print(
+            f'{"":10} {"addresses":>10} {"old":>8} {"first load":>11} '
+            f'{"cached":>8} {"old run":>8} {"new run":>8}'
+        )
+        for ipv6 in (False, True):
+            old_time, old = _timed(_old_load, path, ipv6)
+            clear_address_tables()
+            first_time, (objects, error) = _timed(load_address_table, path, ipv6)
+            cached_time, (cached, _error) = _timed(load_address_table, path, ipv6)
+
+            new = [(o.name, o.inet_addr_mask) for o in objects]
+            if (
+                error is not None
+                or new != [(o.name, o.inet_addr_mask) for o in old]
+                or cached is not objects
+            ):
+                print('the cached table differs from what the old loop read')
+                return 1
+            family = 'IPv6' if ipv6 else 'IPv4'
+            print(
+                f'{family:10} {len(new):10} {old_time:7.2f}s {first_time:10.2f}s '
+                f'{cached_time:7.3f}s '
+                f'{args.compilers * old_time:7.2f}s '
+                f'{first_time + (args.compilers - 1) * cached_time:7.2f}s'
+            )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Time `load_rules` and group expansion with and without the object index.
+
+Every compiler starts by loading its rule set, which resolves the objects
+of every rule element, and expanding a group resolves its members the same
+way. `_resolve_objects` used to ask each of the six tables an object can
+live in for every batch; it now reads once which table holds which ID and
+only asks those. This adds a Policy rule set of synthetic rules to a
+database - each naming objects of the database in source, destination and
+service - and groups of its objects, then loads the rule set and expands
+every group both ways, in a fresh session each time, the way a compile
+sees it:
+
+    python tools/benchmarks/load-rules.py
+    python tools/benchmarks/load-rules.py --rules 20000 --groups 5000 --file my.fwf
+
+Both ways must return the same rules and members, or the script exits
+with 1.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import sqlalchemy
+
+import firewallfabrik.compiler._comp_rule
+import firewallfabrik.core
+from firewallfabrik.core.objects import (
+    Address,
+    Firewall,
+    Group,
+    ObjectGroup,
+    Policy,
+    Rule,
+    Service,
+    group_membership,
+    rule_elements,
+)
+
+_FIXTURE = (
+    Path(__file__).resolve().parents[2] / 'tests' / 'fixtures' / 'compiler-tests.fwf'
+)
+
+
+def _add_objects(db, count, group_count, seed):
+    rng = random.Random(seed)
+    with db.session('Add benchmark policy') as session:
+        fw = session.scalars(sqlalchemy.select(Firewall)).first()
+        addresses = list(session.scalars(sqlalchemy.select(Address.id)))
+        services = list(session.scalars(sqlalchemy.select(Service.id)))
+        policy = Policy(id=uuid.uuid4(), device_id=fw.id, name='benchmark')
+        session.add(policy)
+        session.flush()
+        rules = []
+        elements = []
+        for position in range(count):
+            rule_id = uuid.uuid4()
+            rules.append(
+                {
+                    'id': rule_id,
+                    'type': 'PolicyRule',
+                    'rule_set_id': policy.id,
+                    'position': position,
+                    'policy_action': 0,
+                    'policy_direction': 0,
+                }
+            )
+            for slot, pool, n in (
+                ('src', addresses, 2),
+                ('dst', addresses, 2),
+                ('srv', services, 1),
+            ):
+                for i, target_id in enumerate(rng.sample(pool, n)):
+                    elements.append(
+                        {
+                            'rule_id': rule_id,
+                            'slot': slot,
+                            'target_id': target_id,
+                            'position': i,
+                        }
+                    )
+        session.execute(sqlalchemy.insert(Rule), rules)
+        session.execute(rule_elements.insert(), elements)
+
+        members = []
+        for n in range(group_count):
+            group = ObjectGroup(
+                id=uuid.uuid4(), name=f'benchmark-{n}', library_id=fw.library_id
+            )
+            session.add(group)
+            for position, member_id in enumerate(rng.sample(addresses, 5)):
+                members.append(
+                    {'group_id': group.id, 'member_id': member_id, 'position': position}
+                )
+        session.flush()
+        if members:
+            session.execute(group_membership.insert(), members)
+        return policy.id
+
+
+def _load(db, policy_id):
+    module = firewallfabrik.compiler._comp_rule
+    with db.read_session() as session:
+        policy = session.get(Policy, policy_id)
+        start = time.perf_counter()
+        rules = module.load_rules(session, policy)
+        load_time = time.perf_counter() - start
+        groups = list(session.scalars(sqlalchemy.select(Group)))
+        start = time.perf_counter()
+        graph = module.GroupGraph(session)
+        members = [[o.id for o in graph.expand(group)] for group in groups]
+        expand_time = time.perf_counter() - start
+        result = [
+            (r.id, [o.id for o in r.src], [o.id for o in r.dst], [o.id for o in r.srv])
+            for r in rules
+        ]
+        return load_time, expand_time, (result, members)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument(
+        '--file',
+        default=str(_FIXTURE),
+        help='database to take the objects from. Default: %(default)s',
+    )
+    parser.add_argument(
+        '--rules',
+        type=int,
+        default=10000,
+        help='number of rules of the policy. Default: %(default)s',
+    )
+    parser.add_argument(
+        '--groups',
+        type=int,
+        default=2000,
+        help='number of groups of five objects to add. Default: %(default)s',
+    )
+    parser.add_argument('--seed', type=int, default=1, help='Default: %(default)s')
+    args = parser.parse_args(argv)
+
+    db = firewallfabrik.core.DatabaseManager()
+    db.load(args.file)
+    policy_id = _add_objects(db, args.rules, args.groups, args.seed)
+
+    indexed = _load(db, policy_id)
+
+    # Without the index every ID is unknown, and unknown IDs are looked up
+    # in every table - which is what every lookup did before.
+    module = firewallfabrik.compiler._comp_rule
+    object_classes = module._object_classes
+    module._object_classes = lambda session: {}
+    try:
+        every_table = _load(db, policy_id)
+    finally:
+        module._object_classes = object_classes
+
+    if indexed[2] != every_table[2]:
+        print('the index resolves other objects than the per-table lookup')
+        return 1
+    print(f'{"":24} {"every table":>12} {"indexed":>10}')
+    print(
+        f'{f"load_rules, {args.rules} rules":24} '
+        f'{every_table[0]:11.2f}s {indexed[0]:9.2f}s'
+    )
+    print(f'{"expand all groups":24} {every_table[1]:11.2f}s {indexed[1]:9.2f}s')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
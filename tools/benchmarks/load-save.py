@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Time reading and writing a .fwf with and without the fast paths.
+
+`YamlReader` parses with libyaml when PyYAML has it, and `YamlWriter`
+analyses each distinct string once per file instead of once per
+occurrence. This saves a database as .fwf - the fixture the tests compile
+most, or a file of your own, .fwf or .fwb - then parses it with the
+pure-Python and the libyaml loader and writes it with the plain and the
+caching dumper:
+
+    python tools/benchmarks/load-save.py
+    python tools/benchmarks/load-save.py --file my.fwb
+
+Both loaders must read the same data and both dumpers must write the same
+bytes, or the script exits with 1.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+import firewallfabrik.core
+from firewallfabrik.core import _yaml_writer
+
+_FIXTURE = (
+    Path(__file__).resolve().parents[2]
+    / 'tests'
+    / 'fixtures'
+    / 'objects-for-regression-tests.fwb'
+)
+
+_DUMP_ARGS = {
+    'default_flow_style': False,
+    'sort_keys': False,
+    'allow_unicode': True,
+}
+
+
+class _PlainDumper(yaml.SafeDumper):
+    """`_QuotedValueDumper` as it was before it cached anything."""
+
+    def increase_indent(self, flow=False, indentless=False):
+        return super().increase_indent(flow, False)
+
+
+_PlainDumper.add_representer(str, _yaml_writer._quoted_str)
+_PlainDumper.represent_mapping = _yaml_writer._represent_mapping
+
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument(
+        '--file',
+        default=str(_FIXTURE),
+        help='database to save and time. Default: %(default)s',
+    )
+    args = parser.parse_args(argv)
+
+    if not hasattr(yaml, 'CSafeLoader'):
+        print('PyYAML is built without libyaml; only the pure-Python loader is there')
+        return 1
+
+    db = firewallfabrik.core.DatabaseManager()
+    db.load(args.file)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'benchmark.fwf'
+        db.save(str(path))
+        text = path.read_text(encoding='utf-8')
+
+    python_load, python_data = _timed(yaml.load, text, Loader=yaml.SafeLoader)  # nosec B506
+    c_load, c_data = _timed(yaml.load, text, Loader=yaml.CSafeLoader)  # nosec B506
+    plain_dump, plain_text = _timed(
+        yaml.dump, python_data, Dumper=_PlainDumper, **_DUMP_ARGS
+    )
+    cached_dump, cached_text = _timed(
+        yaml.dump, python_data, Dumper=_yaml_writer._QuotedValueDumper, **_DUMP_ARGS
+    )
+
+    if python_data != c_data:
+        print('libyaml reads other data than the pure-Python loader')
+        return 1
+    if plain_text != cached_text or cached_text != text:
+        print('the caching dumper writes other bytes than the plain one')
+        return 1
+    print(f'{len(text) / 1e6:.1f} MB of YAML')
+    print(f'{"":8} {"before":>8} {"now":>8}')
+    print(f'{"load":8} {python_load:7.2f}s {c_load:7.2f}s')
+    print(f'{"save":8} {plain_dump:7.2f}s {cached_dump:7.2f}s')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# Copyright (C) 2026 Linuxfabrik <info@linuxfabrik.ch>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# On Debian systems, the complete text of the GNU General Public License
+# version 2 can be found in /usr/share/common-licenses/GPL-2.
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+"""Time shadowing detection on a synthetic policy of up to 10,000 atomic rules.
+
+`DetectShadowing` gets every atomic rule of the policy, and used to compare
+each of them with every rule above it. This builds policies of growing size
+out of the kind of rules a large installation has - hosts and networks of a
+few hundred subnets, a handful of services, the odd rule with "any" on one
+side - and runs the processor on them, once with its index and, up to
+``--exhaustive-limit`` rules, once comparing with every seen rule as it did
+before:
+
+    python tools/benchmarks/shadowing.py
+    python tools/benchmarks/shadowing.py --sizes 500 1000 2000 --exhaustive-limit 2000
+
+Doubling the policy should roughly double the indexed time; the exhaustive
+time grows fourfold.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+import uuid
+
+from firewallfabrik.compiler._comp_rule import CompRule
+from firewallfabrik.compiler._rule_processor import BasicRuleProcessor
+from firewallfabrik.compiler.processors._generic import DetectShadowing
+from firewallfabrik.core.objects import (
+    IPv4,
+    Network,
+    PolicyAction,
+    TCPService,
+)
+
+
+class _Feeder(BasicRuleProcessor):
+    def __init__(self, rules):
+        super().__init__(name='Feeder')
+        self.tmp_queue.extend(rules)
+
+    def process_next(self) -> bool:
+        return False
+
+
+class _Compiler:
+    def __init__(self):
+        self.warnings = []
+
+    def warning(self, msg):
+        self.warnings.append(msg)
+
+
+class _ExhaustiveShadowing(DetectShadowing):
+    def _candidates(self, rule):
+        return self._rules_seen
+
+
+def _policy(size, seed):
+    rng = random.Random(seed)
+    subnets = [(10, rng.randrange(256), rng.randrange(256)) for _ in range(400)]
+    networks = [
+        Network(
+            id=uuid.uuid4(),
+            name=f'net-{a}.{b}.{c}.0',
+            inet_addr_mask={'address': f'{a}.{b}.{c}.0', 'netmask': '255.255.255.0'},
+        )
+        for a, b, c in subnets
+    ]
+    services = []
+    for port in (22, 25, 53, 80, 443, 3306, 5432, 8080):
+        svc = TCPService(id=uuid.uuid4(), name=f'tcp-{port}')
+        svc.src_range_start = svc.src_range_end = 0
+        svc.dst_range_start = svc.dst_range_end = port
+        services.append(svc)
+
+    def address():
+        if rng.random() < 0.2:
+            return rng.choice(networks)
+        a, b, c = rng.choice(subnets)
+        return IPv4(
+            id=uuid.uuid4(),
+            name=f'host-{a}.{b}.{c}.x',
+            inet_addr_mask={
+                'address': f'{a}.{b}.{c}.{rng.randrange(1, 255)}',
+                'netmask': '255.255.255.255',
+            },
+        )
+
+    rules = []
+    for number in range(size):
+        roll = rng.random()
+        rules.append(
+            CompRule(
+                id=uuid.uuid4(),
+                type='PolicyRule',
+                position=number,
+                label=f'rule {number}',
+                comment='',
+                options={},
+                negations={},
+                src=[] if roll < 0.03 else [address()],
+                dst=[] if 0.03 <= roll < 0.05 else [address()],
+                srv=[rng.choice(services)],
+                action=PolicyAction.Accept,
+                abs_rule_number=number,
+            )
+        )
+    return rules
+
+
+def _time(cls, rules):
+    compiler = _Compiler()
+    proc = cls()
+    proc.set_context(compiler)
+    proc.set_data_source(_Feeder(rules))
+    start = time.perf_counter()
+    while proc.get_next_rule() is not None:
+        pass
+    return time.perf_counter() - start, compiler.warnings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument(
+        '--sizes',
+        type=int,
+        nargs='+',
+        default=[1250, 2500, 5000, 10000],
+        help='number of atomic rules of each policy. Default: %(default)s',
+    )
+    parser.add_argument(
+        '--exhaustive-limit',
+        type=int,
+        default=1250,
+        help='largest policy to also time the exhaustive scan on. Default: %(default)s',
+    )
+    parser.add_argument('--seed', type=int, default=1, help='Default: %(default)s')
+    args = parser.parse_args(argv)
+
+    print(f'{"rules":>8} {"indexed":>10} {"exhaustive":>11} {"findings":>9}')
+    for size in args.sizes:
+        rules = _policy(size, args.seed)
+        indexed, warnings = _time(DetectShadowing, rules)
+        exhaustive = ''
+        if size <= args.exhaustive_limit:
+            seconds, expected = _time(_ExhaustiveShadowing, _policy(size, args.seed))
+            if expected != warnings:
+                print(f'{size}: the index reports other findings than the scan')
+                return 1
+            exhaustive = f'{seconds:10.2f}s'
+        print(f'{size:8} {indexed:9.2f}s {exhaustive:>11} {len(warnings):9}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())